@@ -0,0 +1,23 @@
+"""invoice period index
+
+Revision ID: 2026_10_19_0003
+Revises: 2026_02_16_0002
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0003'
+down_revision = '2026_02_16_0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Portfolio simulation scans a company's invoices for one period
+    op.create_index('idx_invoices_company_issue_date', 'invoices', ['tenant_id', 'company_id', 'issue_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_invoices_company_issue_date', table_name='invoices')
@@ -0,0 +1,97 @@
+"""partition audit_log by month
+
+Revision ID: 2026_10_19_0004
+Revises: 2026_10_19_0003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0004'
+down_revision = '2026_10_19_0003'
+branch_labels = None
+depends_on = None
+
+
+# Monthly partitions audit_log_pYYYYMM, bounds in UTC. Same naming as
+# postgres_tool.ensure_audit_log_partitions (run by Celery beat).
+_CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    m          date := date_trunc('month', COALESCE(
+                      (SELECT min(created_at) FROM audit_log_legacy),
+                      now()) AT TIME ZONE 'UTC')::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'audit_log_p' || to_char(m, 'YYYYMM'),
+            m::text || ' 00:00:00+00',
+            (m + interval '1 month')::date::text || ' 00:00:00+00'
+        );
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE audit_log RENAME TO audit_log_legacy')
+    op.execute('ALTER INDEX idx_audit_log_tenant RENAME TO idx_audit_log_legacy_tenant')
+    op.execute('ALTER INDEX idx_audit_log_entity RENAME TO idx_audit_log_legacy_entity')
+
+    # The partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE audit_log (
+            id          UUID          NOT NULL DEFAULT gen_random_uuid(),
+            tenant_id   UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            user_id     UUID          REFERENCES users(id) ON DELETE SET NULL,
+            action      VARCHAR(100)  NOT NULL,
+            entity_type VARCHAR(100),
+            entity_id   UUID,
+            payload     JSONB,
+            created_at  TIMESTAMPTZ   NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT')
+    op.execute(_CREATE_MONTHLY_PARTITIONS)
+
+    # Indexes on the parent are created on every partition
+    op.execute('CREATE INDEX idx_audit_log_tenant_created ON audit_log (tenant_id, created_at DESC)')
+    op.execute('CREATE INDEX idx_audit_log_entity ON audit_log (entity_type, entity_id)')
+
+    op.execute("""
+        INSERT INTO audit_log (id, tenant_id, user_id, action, entity_type, entity_id, payload, created_at)
+        SELECT id, tenant_id, user_id, action, entity_type, entity_id, payload, created_at
+        FROM audit_log_legacy
+    """)
+    op.execute('DROP TABLE audit_log_legacy')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE audit_log RENAME TO audit_log_partitioned')
+    op.execute('ALTER INDEX idx_audit_log_entity RENAME TO idx_audit_log_partitioned_entity')
+    op.execute("""
+        CREATE TABLE audit_log (
+            id          UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id   UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            user_id     UUID          REFERENCES users(id) ON DELETE SET NULL,
+            action      VARCHAR(100)  NOT NULL,
+            entity_type VARCHAR(100),
+            entity_id   UUID,
+            payload     JSONB,
+            created_at  TIMESTAMPTZ   NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO audit_log (id, tenant_id, user_id, action, entity_type, entity_id, payload, created_at)
+        SELECT id, tenant_id, user_id, action, entity_type, entity_id, payload, created_at
+        FROM audit_log_partitioned
+    """)
+    op.execute('DROP TABLE audit_log_partitioned CASCADE')
+    op.create_index('idx_audit_log_entity', 'audit_log', ['entity_type', 'entity_id'], unique=False)
+    op.create_index('idx_audit_log_tenant', 'audit_log', ['tenant_id'], unique=False)
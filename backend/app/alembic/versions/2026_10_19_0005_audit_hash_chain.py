@@ -0,0 +1,61 @@
+"""audit_log hash chain and checkpoints
+
+Revision ID: 2026_10_19_0005
+Revises: 2026_10_19_0004
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0005'
+down_revision = '2026_10_19_0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows written before this revision keep chain_seq NULL and stay outside the chain
+    op.execute("""
+        ALTER TABLE audit_log
+            ADD COLUMN chain_seq BIGINT,
+            ADD COLUMN prev_hash CHAR(64),
+            ADD COLUMN row_hash  CHAR(64)
+    """)
+    op.execute("""
+        CREATE INDEX idx_audit_log_chain ON audit_log (tenant_id, chain_seq)
+        WHERE chain_seq IS NOT NULL
+    """)
+
+    op.execute("""
+        CREATE TABLE audit_chain_heads (
+            tenant_id  UUID PRIMARY KEY REFERENCES tenants(id) ON DELETE CASCADE,
+            last_seq   BIGINT      NOT NULL DEFAULT 0,
+            last_hash  CHAR(64)    NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE audit_checkpoints (
+            id          UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id   UUID        NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            seq_from    BIGINT      NOT NULL,
+            seq_to      BIGINT      NOT NULL,
+            merkle_root CHAR(64)    NOT NULL,
+            head_hash   CHAR(64)    NOT NULL,
+            created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute('CREATE INDEX idx_audit_checkpoints_tenant ON audit_checkpoints (tenant_id, seq_to DESC)')
+
+
+def downgrade() -> None:
+    op.execute('DROP TABLE IF EXISTS audit_checkpoints')
+    op.execute('DROP TABLE IF EXISTS audit_chain_heads')
+    op.execute('DROP INDEX IF EXISTS idx_audit_log_chain')
+    op.execute("""
+        ALTER TABLE audit_log
+            DROP COLUMN IF EXISTS row_hash,
+            DROP COLUMN IF EXISTS prev_hash,
+            DROP COLUMN IF EXISTS chain_seq
+    """)
@@ -0,0 +1,53 @@
+"""audit_log payload GIN index and generated columns
+
+Revision ID: 2026_10_19_0006
+Revises: 2026_10_19_0005
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0006'
+down_revision = '2026_10_19_0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Containment (@>) and jsonpath (@?, @@) lookups over the whole payload
+    op.execute("""
+        CREATE INDEX idx_audit_log_payload ON audit_log
+        USING gin (payload jsonb_path_ops)
+    """)
+
+    # Hottest keys as generated columns with plain btree indexes.
+    # Adding STORED columns rewrites every partition once.
+    op.execute("""
+        ALTER TABLE audit_log
+            ADD COLUMN payload_invoice_number TEXT
+                GENERATED ALWAYS AS (payload->>'invoice_number') STORED,
+            ADD COLUMN payload_status TEXT
+                GENERATED ALWAYS AS (payload->>'status') STORED
+    """)
+    op.execute("""
+        CREATE INDEX idx_audit_log_invoice_number
+        ON audit_log (tenant_id, payload_invoice_number, created_at DESC)
+        WHERE payload_invoice_number IS NOT NULL
+    """)
+    op.execute("""
+        CREATE INDEX idx_audit_log_status
+        ON audit_log (tenant_id, payload_status, created_at DESC)
+        WHERE payload_status IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_audit_log_status')
+    op.execute('DROP INDEX IF EXISTS idx_audit_log_invoice_number')
+    op.execute("""
+        ALTER TABLE audit_log
+            DROP COLUMN IF EXISTS payload_status,
+            DROP COLUMN IF EXISTS payload_invoice_number
+    """)
+    op.execute('DROP INDEX IF EXISTS idx_audit_log_payload')
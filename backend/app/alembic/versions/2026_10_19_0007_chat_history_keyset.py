@@ -0,0 +1,42 @@
+"""chat history keyset indexes
+
+Revision ID: 2026_10_19_0007
+Revises: 2026_10_19_0006
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0007'
+down_revision = '2026_10_19_0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # History pages are keyset scans on (created_at, id), newest first.
+    # They replace the single-column indexes, which are their prefixes.
+    op.execute("""
+        CREATE INDEX idx_messages_conversation_created
+        ON messages (conversation_id, created_at DESC, id DESC)
+    """)
+    op.execute('DROP INDEX IF EXISTS idx_messages_conversation')
+
+    op.execute("""
+        CREATE INDEX idx_conversations_user_updated
+        ON conversations (tenant_id, user_id, updated_at DESC, id DESC)
+    """)
+    op.execute('DROP INDEX IF EXISTS idx_conversations_tenant_user')
+
+    # now() is the transaction start, so the user and assistant messages
+    # written in one request tied on created_at; clock_timestamp() orders them.
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at SET DEFAULT clock_timestamp()")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at SET DEFAULT now()")
+    op.execute('CREATE INDEX IF NOT EXISTS idx_conversations_tenant_user ON conversations (tenant_id, user_id)')
+    op.execute('DROP INDEX IF EXISTS idx_conversations_user_updated')
+    op.execute('CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id)')
+    op.execute('DROP INDEX IF EXISTS idx_messages_conversation_created')
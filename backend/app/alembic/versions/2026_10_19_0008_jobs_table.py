@@ -0,0 +1,53 @@
+"""jobs table
+
+Revision ID: 2026_10_19_0008
+Revises: 2026_10_19_0007
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0008'
+down_revision = '2026_10_19_0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The jobs router used to create this table (and add progress and the
+    # listing indexes) on every request; existing databases already have
+    # some of it, hence IF NOT EXISTS throughout.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id       UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+            job_type        VARCHAR(100) NOT NULL,
+            status          VARCHAR(30)  NOT NULL DEFAULT 'QUEUED',
+            idempotency_key VARCHAR(200),
+            payload         JSONB NOT NULL DEFAULT '{}',
+            result          JSONB,
+            error_message   TEXT,
+            created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+            updated_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+            UNIQUE (tenant_id, idempotency_key)
+        )
+    """)
+    op.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS progress JSONB")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs (tenant_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (tenant_id, status)")
+    # Keyset listing (newest first), covering the projected columns
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_jobs_tenant_created
+        ON jobs (tenant_id, created_at DESC, id DESC) INCLUDE (status, job_type, updated_at)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_jobs_tenant_status_created
+        ON jobs (tenant_id, status, created_at DESC, id DESC) INCLUDE (job_type, updated_at)
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_jobs_tenant_status_created')
+    op.execute('DROP INDEX IF EXISTS idx_jobs_tenant_created')
+    op.execute('ALTER TABLE jobs DROP COLUMN IF EXISTS progress')
@@ -1,7 +1,23 @@
 """Celery application – broker = Redis."""
 
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Queue
+
 from app.config import settings
+from app.core.metrics import install_worker_metrics
+from app.core.query_budget import install_task_budget
+from app.core.serialization import MSGPACK_EXT, register_serializers
+from app.core.tracing import setup_tracing
+from app.services.tenant_scheduling import (
+    PRIORITY_DEFAULT,
+    QUEUE_BATCH,
+    QUEUE_INTERACTIVE,
+    QUEUE_MAINTENANCE,
+    TASK_QUEUES,
+)
+
+register_serializers()
 
 celery = Celery(
     "tribultz",
@@ -11,13 +27,56 @@ celery = Celery(
 
 celery.conf.update(
     task_serializer="json",
-    accept_content=["json"],
+    accept_content=["json", MSGPACK_EXT],   # per-task opt-in, see core.serialization
     result_serializer="json",
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
     timezone="America/Sao_Paulo",
     enable_utc=True,
-    beat_schedule={},          # add periodic tasks here
+    # Routing: interactive work never waits behind batch work
+    task_queues=[Queue(QUEUE_INTERACTIVE), Queue(QUEUE_BATCH), Queue(QUEUE_MAINTENANCE)],
+    task_default_queue=QUEUE_BATCH,
+    task_routes={name: {"queue": queue} for name, queue in TASK_QUEUES.items()},
+    task_default_priority=PRIORITY_DEFAULT,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    },
+    # One message at a time per process so queued tasks stay visible to
+    # other workers (and other tenants) instead of sitting in a prefetch buffer
+    worker_prefetch_multiplier=1,
+    beat_schedule={            # add periodic tasks here
+        "evict-simulation-cache": {
+            "task": "task_c_evict_simulation_cache",
+            "schedule": 3600.0,
+        },
+        "maintain-audit-log-partitions": {
+            "task": "maintain_audit_log_partitions",
+            "schedule": 86400.0,
+        },
+        "prune-celery-results": {
+            "task": "prune_celery_results",
+            "schedule": 3600.0,
+        },
+        "verify-audit-chain": {
+            "task": "verify_audit_chain",
+            "schedule": 86400.0,
+        },
+    },
 )
 
+if settings.METRICS_ENABLED:
+    install_worker_metrics([QUEUE_INTERACTIVE, QUEUE_BATCH, QUEUE_MAINTENANCE])
+
+
+if settings.SQL_BUDGET_ENABLED:
+    install_task_budget()
+
+
+@worker_process_init.connect(weak=False)
+def _init_tracing(**_):
+    setup_tracing("tribultz-worker")
+
+
 # Auto-discover tasks
 celery.autodiscover_tasks([
     "app.tasks.task_a_validate",
@@ -25,4 +84,5 @@ celery.autodiscover_tasks([
     "app.tasks.task_c_simulation",
     "app.tasks.task_d_reconciliation",
     "app.tasks.task_e_hubspot",
+    "app.tasks.task_maintenance",
 ])
@@ -18,6 +18,14 @@ class Settings(BaseSettings):
     JWT_ALG: str = "HS256"
     JWT_EXPIRES_MIN: int = 480
 
+    # ── Login ─────────────────────────────────────────────────
+    BCRYPT_ROUNDS: int = 12                        # stored hashes below this are rehashed on login
+    PASSWORD_HASH_WORKERS: int = 4                 # concurrent bcrypt verifications per process
+    LOGIN_MAX_FAILURES_ACCOUNT: int = 5            # per tenant+email within the window
+    LOGIN_MAX_FAILURES_IP: int = 50                # per client IP within the window
+    LOGIN_TRUSTED_PROXIES: list[str] = []          # LB/proxy IPs or CIDRs whose X-Forwarded-For is used
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+
     # ── MinIO / S3 ────────────────────────────────────────────
     MINIO_ROOT_USER: str = "tribultz_minio"
     MINIO_ROOT_PASSWORD: str = "tribultz_minio_pw"
@@ -30,6 +38,58 @@ class Settings(BaseSettings):
     HUBSPOT_ENABLED: bool = False
     HUBSPOT_PRIVATE_APP_TOKEN: str = ""
 
+    # ── Task scheduling (per-tenant fairness) ─────────────────
+    TENANT_MAX_CONCURRENCY_INTERACTIVE: int = 4    # running tasks per tenant
+    TENANT_MAX_CONCURRENCY_BATCH: int = 2
+    TENANT_WEIGHTS: dict[str, float] = {}          # tenant_id → multiplier on the caps
+    TENANT_SLOT_LEASE_SECONDS: int = 900           # slot of a crashed worker frees after this
+    TENANT_REQUEUE_MAX_DELAY_SECONDS: int = 30
+    TENANT_REQUEUE_MAX_ATTEMPTS: int = 20          # then the task runs over the cap
+
+    # ── Celery results ────────────────────────────────────────
+    CELERY_RESULT_MODE: str = "full"               # "ack": persisted tasks keep a tiny ack in Redis
+    CELERY_RESULT_EXPIRES_SECONDS: int = 21600     # TTL of every result key in Redis
+
+    # ── Task serialization ────────────────────────────────────
+    TASK_MSGPACK_ENABLED: bool = False             # msgpack for batch-heavy tasks (opt-in)
+    TASK_COMPRESSION_THRESHOLD_BYTES: int = 16384  # gzip msgpack bodies above this
+
+    # ── Jobs listing ──────────────────────────────────────────
+    JOBS_STREAM_THRESHOLD: int = 500               # pages above this are streamed
+    JOB_RESULT_INLINE_MAX_BYTES: int = 65536       # larger results go to S3
+    JOB_PROGRESS_REDIS_INTERVAL_SECONDS: float = 1.0   # live progress (Redis) at most this often
+    JOB_PROGRESS_PERSIST_SECONDS: float = 10.0         # jobs.progress written at most this often
+
+    # ── Metrics ───────────────────────────────────────────────
+    METRICS_ENABLED: bool = True                   # /metrics on the API, exporter on workers
+    WORKER_METRICS_PORT: int = 9100                # worker exporter (main worker process)
+
+    # ── SQL statement budget ──────────────────────────────────
+    SQL_BUDGET_ENABLED: bool = True
+    SQL_QUERY_BUDGET_DEFAULT: int = 25             # per request/task; 0 = only N+1 checks
+    SQL_QUERY_BUDGETS: dict[str, int] = {}         # route template or task name -> budget
+    SQL_REPEAT_THRESHOLD: int = 5                  # identical statement this often = N+1
+
+    # ── Tracing (OpenTelemetry, optional) ─────────────────────
+    OTEL_ENABLED: bool = False
+    OTEL_EXPORTER: str = "otlp"                    # "otlp" | "file" | "console"
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://otel-collector:4318/v1/traces"
+    OTEL_FILE_PATH: str = "/tmp/tribultz-traces.jsonl"
+
+    # ── Tenant directory cache ────────────────────────────────
+    TENANT_CACHE_TTL_SECONDS: int = 300            # Redis entries; 0 disables the cache
+    TENANT_CACHE_LOCAL_TTL_SECONDS: int = 30       # per-process layer (staleness bound elsewhere)
+
+    # ── Chat history ──────────────────────────────────────────
+    CHAT_RECENT_CACHE_SIZE: int = 50               # latest messages cached per conversation; 0 disables
+    CHAT_RECENT_CACHE_TTL_SECONDS: int = 1800      # idle conversations drop out of the cache
+    CHAT_STREAM_POLL_SECONDS: float = 1.0          # job status poll interval on /chat/message/stream
+    CHAT_STREAM_MAX_SECONDS: float = 120.0         # stop following the job after this
+    CHAT_STREAM_KEEPALIVE_SECONDS: float = 15.0
+
+    # ── Simulation cache (Task C) ─────────────────────────────
+    SIMULATION_CACHE_TTL_SECONDS: int = 86400      # 0 disables reuse
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
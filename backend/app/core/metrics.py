@@ -0,0 +1,167 @@
+"""
+Prometheus metrics for the API and the Celery workers.
+
+API: `install_api_metrics(app)` adds a per-route latency middleware and
+the /metrics endpoint (SQL counts per request come from
+app.core.query_budget).  Workers: `install_worker_metrics()` hooks Celery
+signals and serves an exporter on WORKER_METRICS_PORT from the main
+worker process.  Prefork children write to PROMETHEUS_MULTIPROC_DIR,
+which the exporter aggregates; the API uses the same mode so /metrics
+covers every uvicorn worker.  Metrics are created at import time, so the
+directory is created and emptied before the process starts (see
+docker-entrypoint.sh), never from here.
+"""
+
+import logging
+import os
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ── 1. Metric definitions ────────────────────────────────────
+HTTP_REQUEST_SECONDS = Histogram(
+    "tribultz_http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+)
+HTTP_DB_QUERIES = Histogram(
+    "tribultz_http_db_queries_per_request",
+    "SQL statements executed while serving one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_QUERY_SECONDS = Histogram(
+    "tribultz_db_query_duration_seconds",
+    "SQL statement latency",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+TASK_SECONDS = Histogram(
+    "tribultz_celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900),
+)
+CACHE_REQUESTS = Counter(
+    "tribultz_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+SQL_BUDGET_VIOLATIONS = Counter(
+    "tribultz_sql_budget_violations_total",
+    "Requests/tasks over their SQL statement budget or repeating a statement (N+1)",
+    ["kind", "scope", "reason"],
+)
+S3_OPERATION_SECONDS = Histogram(
+    "tribultz_s3_operation_duration_seconds",
+    "Object storage call latency",
+    ["operation"],
+)
+S3_UPLOAD_BYTES = Histogram(
+    "tribultz_s3_upload_bytes",
+    "Size of objects uploaded to object storage",
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8),
+)
+
+# ── 2. API ───────────────────────────────────────────────────
+def _registry() -> CollectorRegistry:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def install_api_metrics(app: Any) -> None:
+    from fastapi import Request, Response
+
+    @app.middleware("http")
+    async def _observe_request(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            template = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(request.method, template, str(status)).observe(
+                time.perf_counter() - started
+            )
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+# ── 3. Workers ───────────────────────────────────────────────
+class QueueDepthCollector:
+    """Broker queue lengths, read from Redis at scrape time."""
+
+    # Kombu's Redis transport keeps one list per priority step: "<queue>\x06\x16<n>"
+    _SEP = "\x06\x16"
+
+    def __init__(self, queues: list[str]):
+        self.queues = queues
+
+    def collect(self):
+        from app.redis_client import get_redis
+
+        gauge = GaugeMetricFamily(
+            "tribultz_celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"],
+        )
+        r = get_redis()
+        if r is not None:
+            for queue in self.queues:
+                keys = [queue] + [f"{queue}{self._SEP}{step}" for step in range(1, 10)]
+                try:
+                    pipe = r.pipeline(transaction=False)
+                    for key in keys:
+                        pipe.llen(key)
+                    gauge.add_metric([queue], sum(pipe.execute()))
+                except Exception as e:
+                    logger.warning("Queue depth for %s unavailable: %s", queue, e)
+        yield gauge
+
+
+def install_worker_metrics(queues: list[str]) -> None:
+    from celery.signals import task_postrun, task_prerun, worker_init
+
+    started: dict[str, float] = {}
+
+    @task_prerun.connect(weak=False)
+    def _task_start(task_id=None, **_):
+        started[task_id] = time.perf_counter()
+
+    @task_postrun.connect(weak=False)
+    def _task_end(task_id=None, task=None, state=None, **_):
+        begin = started.pop(task_id, None)
+        if begin is not None and task is not None:
+            TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - begin)
+
+    @worker_init.connect(weak=False)
+    def _serve(**_):
+        if not settings.METRICS_ENABLED:
+            return
+        registry = _registry()
+        registry.register(QueueDepthCollector(queues))
+        try:
+            start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
+        except OSError as e:
+            logger.warning("Worker metrics exporter not started: %s", e)
@@ -0,0 +1,183 @@
+"""
+Per-request / per-task SQL statement accounting.
+
+Every statement executed through the engine is counted and timed against
+the `QueryStats` of the current request or Celery task.  When the scope
+ends its totals are checked against a budget (SQL_QUERY_BUDGETS, keyed by
+route template or task name, else SQL_QUERY_BUDGET_DEFAULT) and for
+repeated identical statements (N+1 patterns); offenders are logged and
+counted in `tribultz_sql_budget_violations_total`.  A request's scope lasts
+until its response body has been sent, so statements run while streaming
+count too.
+
+Scopes nest: a statement also counts towards every enclosing scope, so
+tests can pin a code path, or a whole request made through the TestClient,
+with `assert_max_queries(n)`.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.metrics import DB_QUERY_SECONDS, HTTP_DB_QUERIES, SQL_BUDGET_VIOLATIONS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self, scope: str = "", parent: Optional["QueryStats"] = None):
+        self.scope = scope
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[" ".join(statement.split())] += 1
+        if self.parent is not None:          # enclosing scope, e.g. a test around a request
+            self.parent.record(statement, seconds)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times, most frequent first."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("_current_query_stats", default=None)
+
+
+# ── 1. Engine hook ───────────────────────────────────────────
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement and charge it to the current scope, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        DB_QUERY_SECONDS.observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+
+# ── 2. Scopes ────────────────────────────────────────────────
+@contextmanager
+def track_queries(scope: str = "") -> Iterator[QueryStats]:
+    stats = QueryStats(scope, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def budget_for(scope: str) -> int:
+    return settings.SQL_QUERY_BUDGETS.get(scope, settings.SQL_QUERY_BUDGET_DEFAULT)
+
+
+def check_budget(stats: QueryStats, kind: str) -> list[str]:
+    """Log and count budget / N+1 offences for a finished scope; returns them."""
+    offences: list[str] = []
+    budget = budget_for(stats.scope)
+    if budget and stats.count > budget:
+        offences.append("budget")
+        SQL_BUDGET_VIOLATIONS.labels(kind, stats.scope, "budget").inc()
+        logger.warning(
+            "SQL budget exceeded: %s %s ran %d statements in %.1f ms (budget %d)",
+            kind, stats.scope, stats.count, stats.seconds * 1000, budget,
+        )
+    repeated = stats.repeated(settings.SQL_REPEAT_THRESHOLD)
+    if repeated:
+        offences.append("repeat")
+        SQL_BUDGET_VIOLATIONS.labels(kind, stats.scope, "repeat").inc()
+        statement, times = repeated[0]
+        logger.warning(
+            "Possible N+1 in %s %s: statement ran %d times: %.200s",
+            kind, stats.scope, times, statement,
+        )
+    return offences
+
+
+# ── 3. API / worker wiring ───────────────────────────────────
+class QueryBudgetMiddleware:
+    """
+    Pure ASGI middleware (unlike @app.middleware("http"), whose call_next
+    returns as soon as the headers are ready): the scope is closed only
+    after the whole response, including a StreamingResponse body, is sent.
+    Feeds the per-route histogram when METRICS_ENABLED and checks budgets
+    when SQL_BUDGET_ENABLED.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                route = scope.get("route")
+                stats.scope = getattr(route, "path", "unmatched")
+                if settings.METRICS_ENABLED:
+                    HTTP_DB_QUERIES.labels(stats.scope).observe(stats.count)
+                if settings.SQL_BUDGET_ENABLED:
+                    check_budget(stats, "route")
+
+
+def install_query_budget(app: Any) -> None:
+    app.add_middleware(QueryBudgetMiddleware)
+
+
+def install_task_budget() -> None:
+    from celery.signals import task_postrun, task_prerun
+
+    active: dict[str, tuple[QueryStats, Any]] = {}
+
+    @task_prerun.connect(weak=False)
+    def _task_start(task_id=None, task=None, **_):
+        stats = QueryStats(getattr(task, "name", ""))
+        active[task_id] = (stats, _current.set(stats))
+
+    @task_postrun.connect(weak=False)
+    def _task_end(task_id=None, **_):
+        entry = active.pop(task_id, None)
+        if entry is None:
+            return
+        stats, token = entry
+        _current.reset(token)
+        check_budget(stats, "task")
+
+
+# ── 4. Test helper ───────────────────────────────────────────
+@contextmanager
+def assert_max_queries(limit: int, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Fail if the block runs more than `limit` statements, or (with
+    `max_repeats`) any single statement more than `max_repeats` times.
+    """
+    with track_queries("test") as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(
+            f"{stats.count} SQL statements executed, budget {limit}:\n"
+            + "\n".join(f"{n}x {s}" for s, n in stats.statements.most_common(10))
+        )
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats + 1)
+        if repeated:
+            statement, times = repeated[0]
+            raise AssertionError(f"Statement repeated {times} times (max {max_repeats}): {statement}")
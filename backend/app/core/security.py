@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any, Union, Optional
 
@@ -6,13 +8,35 @@ from passlib.context import CryptContext
 
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool gives real parallelism
+# while bounding how many CPU-heavy verifications run at once.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash",
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify off the event loop.  Returns (ok, new_hash); new_hash is set
+    when the stored hash uses outdated parameters (e.g. fewer rounds
+    than BCRYPT_ROUNDS) and should replace it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_pool, pwd_context.verify_and_update, plain_password, hashed_password,
+    )
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
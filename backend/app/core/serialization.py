@@ -0,0 +1,77 @@
+"""Binary task serialization: msgpack with extension types + size-based gzip."""
+
+import gzip
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+import msgpack
+from kombu.serialization import register
+
+from app.config import settings
+
+MSGPACK_EXT = "tribultz-msgpack"
+CONTENT_TYPE = "application/x-tribultz-msgpack"
+
+# msgpack extension type codes
+_EXT_DECIMAL = 1
+_EXT_UUID = 2
+_EXT_DATE = 3
+_EXT_DATETIME = 4
+
+# One-byte frame header in front of the msgpack body
+_RAW = b"\x00"
+_GZIP = b"\x01"
+
+
+def _default(obj: Any) -> msgpack.ExtType:
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode("ascii"))
+    if isinstance(obj, UUID):
+        return msgpack.ExtType(_EXT_UUID, obj.bytes)
+    if isinstance(obj, datetime):        # before date: datetime is a date subclass
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode("ascii"))
+    if isinstance(obj, date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode("ascii"))
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode("ascii"))
+    if code == _EXT_UUID:
+        return UUID(bytes=data)
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("ascii"))
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode("ascii"))
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj: Any) -> bytes:
+    """msgpack-encode; bodies above TASK_COMPRESSION_THRESHOLD_BYTES are gzipped."""
+    body = msgpack.packb(obj, default=_default, use_bin_type=True, datetime=False)
+    if len(body) > settings.TASK_COMPRESSION_THRESHOLD_BYTES:
+        return _GZIP + gzip.compress(body, compresslevel=6)
+    return _RAW + body
+
+
+def loads(data: bytes) -> Any:
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    header, body = data[:1], data[1:]
+    if header == _GZIP:
+        body = gzip.decompress(body)
+    elif header != _RAW:
+        raise ValueError("Unknown task payload frame")
+    return msgpack.unpackb(body, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def register_serializers() -> None:
+    register(MSGPACK_EXT, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
+
+
+# Serializer for tasks with large argument payloads (items, invoices, CSVs).
+# Workers always accept both, so flipping the setting is safe mid-rollout.
+BATCH_TASK_SERIALIZER = MSGPACK_EXT if settings.TASK_MSGPACK_ENABLED else "json"
@@ -0,0 +1,82 @@
+"""
+OpenTelemetry tracing (optional).
+
+`setup_tracing()` installs a tracer provider and auto-instrumentation for
+FastAPI, SQLAlchemy (one span per statement), Celery (context travels in
+the message headers), Redis, botocore (S3) and httpx (HubSpot).  It is a
+no-op unless OTEL_ENABLED is set, and degrades to a warning when the
+opentelemetry packages are not installed.
+"""
+
+import logging
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+
+
+def _exporter():
+    if settings.OTEL_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if settings.OTEL_EXPORTER == "file":
+        return ConsoleSpanExporter(out=open(settings.OTEL_FILE_PATH, "a", encoding="utf-8"))
+    return ConsoleSpanExporter()
+
+
+def setup_tracing(service_name: str, app: Any = None) -> None:
+    """
+    Configure tracing for this process.  Call once per process: in the
+    API at import time, in workers from `worker_process_init` (span
+    processors run a background thread that does not survive fork).
+    """
+    global _configured
+    if not settings.OTEL_ENABLED or _configured:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.instrumentation.botocore import BotocoreInstrumentor
+        from opentelemetry.instrumentation.celery import CeleryInstrumentor
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as e:
+        logger.warning("OTEL_ENABLED is set but opentelemetry is not installed: %s", e)
+        return
+
+    from app.database import engine
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+
+    SQLAlchemyInstrumentor().instrument(engine=engine)
+    CeleryInstrumentor().instrument()
+    RedisInstrumentor().instrument()
+    BotocoreInstrumentor().instrument()
+    HTTPXClientInstrumentor().instrument()
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+
+    _configured = True
+    logger.info("Tracing enabled for %s (%s exporter)", service_name, settings.OTEL_EXPORTER)
+
+
+def annotate_span(**attributes: Any) -> None:
+    """Tag the current span (e.g. job_id, tenant_id); no-op without tracing."""
+    if not _configured:
+        return
+    from opentelemetry import trace
+
+    span = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(f"tribultz.{key}", str(value))
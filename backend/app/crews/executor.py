@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from uuid import UUID, uuid4
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
-from celery import Task
+from app.core.tracing import annotate_span
+from app.tools.postgres_tool import job_create, job_status_update
+from app.tools.tenant_directory_tool import get_tenant_slug
 
-from app.tasks.task_a_validate import task_a_validate_cbs_ibs
-from app.tools.postgres_tool import get_tenant_slug, job_create, job_status_update
+if TYPE_CHECKING:
+    from celery import Task
 
 class TribultzChatOpsExecutor:
     """
@@ -45,7 +47,13 @@ class TribultzChatOpsExecutor:
             },
         )
 
-        t = cast(Task, task_a_validate_cbs_ibs)
+        annotate_span(job_id=job_id, tenant_id=tenant_id_str)
+        # Imported here: loading Celery and the task modules is deferred until
+        # the first chat-triggered job.
+        from app.services.tenant_scheduling import PRIORITY_CHAT
+        from app.tasks.task_a_validate import task_a_validate_cbs_ibs
+
+        t = cast("Task", task_a_validate_cbs_ibs)
         try:
             t.apply_async(
                 kwargs={
@@ -58,6 +66,7 @@ class TribultzChatOpsExecutor:
                     "items": [{"sku": "CHAT-ITEM", "base_amount": "100.00"}],
                 },
                 task_id=job_id,
+                priority=PRIORITY_CHAT,
             )
         except Exception as exc:
             job_status_update(job_id=job_id, status="FAILED", error_message=f"enqueue failed: {exc}")
@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
 from app.config import settings
+from app.core.query_budget import instrument_engine
 
 engine = create_engine(
     settings.DATABASE_URL,
@@ -12,6 +13,8 @@ engine = create_engine(
     max_overflow=20,
 )
 
+instrument_engine(engine)     # per-request/task SQL accounting + metrics
+
 SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
 
 
@@ -3,6 +3,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import settings
+from app.core.metrics import install_api_metrics
+from app.core.query_budget import install_query_budget
+from app.core.tracing import setup_tracing
 from app.routers import auth, audit, chat, health, jobs, tasks, validate, validation
 
 app = FastAPI(
@@ -20,6 +24,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Metrics (/metrics + per-route latency) ─────────────────
+if settings.METRICS_ENABLED:
+    install_api_metrics(app)
+
+# ── SQL statement counts, budget / N+1 detection (outermost) ──
+if settings.SQL_BUDGET_ENABLED or settings.METRICS_ENABLED:
+    install_query_budget(app)
+
+# ── Tracing (no-op unless OTEL_ENABLED) ────────────────────
+setup_tracing("tribultz-api", app)
+
 # ── Routers ───────────────────────────────────────────────────
 app.include_router(auth.router)
 app.include_router(health.router)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, func
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Index, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -16,7 +16,16 @@ class Conversation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    # History is read page by page (services/chat_history); loading the whole
+    # collection is an error, and deletes rely on ON DELETE CASCADE.
+    messages = relationship(
+        "Message", back_populates="conversation", cascade="all, delete-orphan",
+        lazy="raise_on_sql", passive_deletes=True,
+    )
+
+    __table_args__ = (
+        Index("idx_conversations_user_updated", "tenant_id", "user_id", updated_at.desc(), id.desc()),
+    )
 
 class Message(Base):
     __tablename__ = "messages"
@@ -26,6 +35,13 @@ class Message(Base):
     role = Column(String(50), nullable=False)  # user, assistant
     content = Column(Text, nullable=False)
     metadata_ = Column("metadata", JSONB, server_default='{}', nullable=False)  # metadata is reserved in Base? using metadata_ mapping or careful naming
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # clock_timestamp(): messages written in one transaction keep their order
+    created_at = Column(DateTime(timezone=True), server_default=func.clock_timestamp(), nullable=False)
 
     conversation = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        Index("idx_messages_conversation_created", "conversation_id", created_at.desc(), id.desc()),
+    )
+    # INSERT ... RETURNING id, created_at, so new rows can be cached without a re-select
+    __mapper_args__ = {"eager_defaults": True}
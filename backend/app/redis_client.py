@@ -0,0 +1,34 @@
+"""Shared Redis client (None when Redis is unreachable → callers fall back)."""
+
+import logging
+from typing import Optional
+
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+_checked = False
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Return a process-wide Redis client, or None if REDIS_URL is unset or
+    the server did not answer the first ping.  The check runs once.
+    """
+    global _client, _checked
+    if _checked:
+        return _client
+    _checked = True
+    if not settings.REDIS_URL:
+        return None
+    try:
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        client.ping()
+        _client = client
+    except redis.RedisError as e:
+        logger.warning("Redis unavailable (%s); features fall back to local state.", e)
+        _client = None
+    return _client
@@ -1,16 +1,22 @@
+import csv
+import io
+import json
 from datetime import datetime, timezone
-from hashlib import sha256
-from typing import Any, Optional
-from uuid import uuid4
+from enum import Enum
+from typing import Any, Iterator, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import text
+from sqlalchemy.exc import DataError, ProgrammingError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.api.deps import get_current_user
 from app.models.auth import User
+from app.tools.audit_chain_tool import append_audit_entries
 
 router = APIRouter(prefix="/api/v1/audit", tags=["audit"])
 
@@ -19,7 +25,7 @@ router = APIRouter(prefix="/api/v1/audit", tags=["audit"])
 class AuditEntry(BaseModel):
     action: str
     entity_type: str
-    entity_id: Optional[str] = None
+    entity_id: Optional[UUID] = None
     payload: dict[str, Any] = Field(default_factory=dict)
     # tenant_slug: str = "default"  <-- REMOVED
     # user_id: Optional[str] = None <-- REMOVED (will be current_user.id)
@@ -37,16 +43,181 @@ class AuditRecord(BaseModel):
 
 class AuditSearchParams(BaseModel):
     # tenant_slug: str = "default" <-- REMOVED
+    action: Optional[str] = None
     entity_type: Optional[str] = None
-    entity_id: Optional[str] = None
+    entity_id: Optional[UUID] = None
+    # Bounding created_at lets Postgres prune monthly partitions
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    # Payload filters, served by generated columns / the payload GIN index
+    invoice_number: Optional[str] = None
+    status: Optional[str] = None
+    payload_contains: Optional[dict[str, Any]] = None   # e.g. {"overall": "NAO_CONFORME"}
+    payload_path: Optional[str] = None                  # jsonpath, e.g. '$.cbs_match ? (@ == false)'
     limit: int = Field(default=50, le=200)
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_BATCH_SIZE = 10_000
+EXPORT_COLUMNS = [
+    "id", "tenant_id", "user_id", "action", "entity_type",
+    "entity_id", "created_at", "checksum", "payload",
+]
+
+
 # ── Helpers ───────────────────────────────────────────────────
-def _compute_checksum(payload: dict) -> str:
-    """SHA-256 checksum of the serialised payload for tamper-evidence."""
-    raw = str(sorted(payload.items())).encode("utf-8")
-    return sha256(raw).hexdigest()
+def _audit_filters(
+    tenant_id: str,
+    *,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    invoice_number: Optional[str] = None,
+    status: Optional[str] = None,
+    payload_contains: Optional[dict[str, Any]] = None,
+    payload_path: Optional[str] = None,
+) -> tuple[list[str], dict[str, Any]]:
+    """WHERE fragments + bind params shared by search and export."""
+    filters = ["al.tenant_id = CAST(:tid AS uuid)"]
+    bind: dict[str, Any] = {"tid": tenant_id}
+
+    if action:
+        filters.append("al.action = :action")
+        bind["action"] = action
+    if entity_type:
+        filters.append("al.entity_type = :entity_type")
+        bind["entity_type"] = entity_type
+    if entity_id:
+        filters.append("al.entity_id = :entity_id")
+        bind["entity_id"] = str(entity_id)
+    if created_from:
+        filters.append("al.created_at >= :created_from")
+        bind["created_from"] = created_from
+    if created_to:
+        filters.append("al.created_at < :created_to")
+        bind["created_to"] = created_to
+    if invoice_number:
+        filters.append("al.payload_invoice_number = :invoice_number")
+        bind["invoice_number"] = invoice_number
+    if status:
+        filters.append("al.payload_status = :status")
+        bind["status"] = status
+    if payload_contains:
+        filters.append("al.payload @> CAST(:payload_contains AS jsonb)")
+        bind["payload_contains"] = json.dumps(payload_contains, default=str)
+    if payload_path:
+        filters.append("al.payload @? CAST(:payload_path AS jsonpath)")
+        bind["payload_path"] = payload_path
+    return filters, bind
+
+
+def _check_jsonpath(path: str, db: Optional[Session] = None) -> None:
+    """
+    Reject a malformed jsonpath before the real query runs, so only the cast
+    itself can produce "Invalid payload_path" (and streamed responses can
+    still answer 400).  A given session is protected by a savepoint.
+    """
+    own = db is None
+    session = SessionLocal() if own else db
+    try:
+        with session.begin_nested():
+            session.execute(text("SELECT CAST(:p AS jsonpath)"), {"p": path})
+    except (DataError, ProgrammingError):
+        raise HTTPException(status_code=400, detail="Invalid payload_path")
+    finally:
+        if own:
+            session.close()
+
+
+def _export_record(r) -> dict[str, Any]:
+    payload = r.payload if isinstance(r.payload, dict) else {}
+    return {
+        "id": str(r.id),
+        "tenant_id": str(r.tenant_id),
+        "user_id": str(r.user_id) if r.user_id else None,
+        "action": r.action,
+        "entity_type": r.entity_type,
+        "entity_id": str(r.entity_id) if r.entity_id else None,
+        "created_at": r.created_at.isoformat() if r.created_at else "",
+        "checksum": payload.get("_checksum", ""),
+        "payload": payload,
+    }
+
+
+def _iter_export_rows(
+    filters: list[str],
+    bind: dict[str, Any],
+    after: Optional[tuple[datetime, str]],
+) -> Iterator[list[Any]]:
+    """
+    Yield batches of audit rows in (created_at, id) order.
+
+    Each batch is a keyset query read through a server-side (named) cursor
+    in its own short transaction, so memory stays constant and no snapshot
+    is held open for the whole export.
+    """
+    db = SessionLocal()
+    try:
+        while True:
+            batch_filters = list(filters)
+            params = dict(bind, batch=EXPORT_BATCH_SIZE)
+            if after is not None:
+                batch_filters.append("(al.created_at, al.id) > (:after_at, CAST(:after_id AS uuid))")
+                params["after_at"], params["after_id"] = after
+            where = " AND ".join(batch_filters)
+
+            result = db.execute(
+                text(f"""
+                    SELECT al.id, al.tenant_id, al.user_id, al.action, al.entity_type,
+                           al.entity_id, al.payload, al.created_at
+                    FROM audit_log al
+                    WHERE {where}
+                    ORDER BY al.created_at, al.id
+                    LIMIT :batch
+                """).execution_options(stream_results=True, yield_per=1000),
+                params,
+            )
+            count = 0
+            last = None
+            for rows in result.partitions():
+                count += len(rows)
+                last = rows[-1]
+                yield rows
+            db.commit()
+
+            if count < EXPORT_BATCH_SIZE or last is None:
+                return
+            after = (last.created_at, str(last.id))
+    finally:
+        db.close()
+
+
+def _ndjson_stream(batches: Iterator[list[Any]]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(_export_record(r), default=str) + "\n" for r in rows
+        ).encode("utf-8")
+
+
+def _csv_stream(batches: Iterator[list[Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for rows in batches:
+        buf.seek(0)
+        buf.truncate()
+        for r in rows:
+            rec = _export_record(r)
+            rec["payload"] = json.dumps(rec["payload"], default=str)
+            writer.writerow([rec[c] for c in EXPORT_COLUMNS])
+        yield buf.getvalue().encode("utf-8")
 
 
 # ── Endpoints ─────────────────────────────────────────────────
@@ -58,40 +229,29 @@ def create_audit_log(
 ):
     """
     Record an auditable event.
-    Generates a checksum from the payload so that downstream
-    consumers can verify the record was not tampered with.
+    Generates a checksum from the payload and appends the row to the
+    tenant's hash chain so the record can be verified later.
     """
-    checksum = _compute_checksum(entry.payload)
-    audit_id = str(uuid4())
     tenant_id = str(current_user.tenant_id)
+    entity_id = str(entry.entity_id) if entry.entity_id else None
 
-    db.execute(
-        text("""
-            INSERT INTO audit_log (id, tenant_id, user_id, action,
-                                   entity_type, entity_id, payload)
-            VALUES (CAST(:id AS uuid), CAST(:tenant_id AS uuid), CAST(:user_id AS uuid), :action,
-                    :entity_type, :entity_id, CAST(:payload AS jsonb))
-        """),
-        {
-            "id": audit_id,
-            "tenant_id": tenant_id,
-            "user_id": str(current_user.id),
-            "action": entry.action,
-            "entity_type": entry.entity_type,
-            "entity_id": entry.entity_id,
-            "payload": __import__("json").dumps({**entry.payload, "_checksum": checksum}),
-        },
-    )
+    written = append_audit_entries(db, tenant_id, [{
+        "action": entry.action,
+        "entity_type": entry.entity_type,
+        "entity_id": entity_id,
+        "user_id": str(current_user.id),
+        "payload": entry.payload,
+    }])[0]
     db.commit()
 
     return AuditRecord(
-        id=audit_id,
+        id=written["id"],
         tenant_id=tenant_id,
         action=entry.action,
         entity_type=entry.entity_type,
-        entity_id=entry.entity_id,
-        checksum=checksum,
-        created_at=datetime.now(timezone.utc).isoformat(),
+        entity_id=entity_id,
+        checksum=written["checksum"],
+        created_at=written["created_at"].isoformat(),
     )
 
 
@@ -101,18 +261,29 @@ def search_audit_log(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Search audit log entries with optional filters."""
+    """
+    Search audit log entries with optional filters.
+    Payload filters: `invoice_number` / `status` hit btree-indexed generated
+    columns; `payload_contains` (@>) and `payload_path` (jsonpath, @?) use
+    the jsonb_path_ops GIN index on payload.
+    """
     tenant_id = str(current_user.tenant_id)
+    if params.payload_path:
+        _check_jsonpath(params.payload_path, db)
 
-    filters = ["al.tenant_id = CAST(:tid AS uuid)"]
-    bind: dict[str, Any] = {"tid": tenant_id, "limit": params.limit}
-
-    if params.entity_type:
-        filters.append("al.entity_type = :entity_type")
-        bind["entity_type"] = params.entity_type
-    if params.entity_id:
-        filters.append("al.entity_id = :entity_id")
-        bind["entity_id"] = params.entity_id
+    filters, bind = _audit_filters(
+        tenant_id,
+        action=params.action,
+        entity_type=params.entity_type,
+        entity_id=params.entity_id,
+        created_from=params.created_from,
+        created_to=params.created_to,
+        invoice_number=params.invoice_number,
+        status=params.status,
+        payload_contains=params.payload_contains,
+        payload_path=params.payload_path,
+    )
+    bind["limit"] = params.limit
 
     where = " AND ".join(filters)
     rows = db.execute(
@@ -141,3 +312,78 @@ def search_audit_log(
         ))
     return results
 
+
+@router.get("/export")
+def export_audit_log(
+    format: ExportFormat = ExportFormat.NDJSON,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[UUID] = None,
+    invoice_number: Optional[str] = None,
+    status: Optional[str] = None,
+    payload_contains: Optional[str] = None,
+    payload_path: Optional[str] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[UUID] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream every matching audit entry as NDJSON or CSV, oldest first.
+    An interrupted export can be resumed from the last received row with
+    `after_created_at` + `after_id`.  `payload_contains` is a JSON object.
+    """
+    tenant_id = str(current_user.tenant_id)
+    contains = None
+    if payload_contains:
+        try:
+            contains = json.loads(payload_contains)
+        except ValueError:
+            contains = None
+        if not isinstance(contains, dict):
+            raise HTTPException(status_code=400, detail="payload_contains must be a JSON object")
+    if payload_path:
+        _check_jsonpath(payload_path)
+
+    filters, bind = _audit_filters(
+        tenant_id,
+        action=action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        created_from=created_from,
+        created_to=created_to,
+        invoice_number=invoice_number,
+        status=status,
+        payload_contains=contains,
+        payload_path=payload_path,
+    )
+    after = (after_created_at, str(after_id)) if after_created_at and after_id else None
+    batches = _iter_export_rows(filters, bind, after)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if format == ExportFormat.CSV:
+        return StreamingResponse(
+            _csv_stream(batches),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="audit_{stamp}.csv"'},
+        )
+    return StreamingResponse(
+        _ndjson_stream(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="audit_{stamp}.ndjson"'},
+    )
+
+
+@router.post("/verify")
+def verify_audit_chain(current_user: User = Depends(get_current_user)):
+    """
+    Queue verification of the tenant's audit hash chain since the last
+    checkpoint.  The task result reports the first broken link, if any.
+    """
+    from app.celery_app import celery
+
+    task = celery.send_task(
+        "verify_audit_chain", kwargs={"tenant_id": str(current_user.tenant_id)},
+    )
+    return {"task_id": task.id, "status": "PENDING"}
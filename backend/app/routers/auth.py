@@ -1,69 +1,85 @@
-from typing import cast
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, cast
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.database import get_db
-from app.models.auth import Tenant, User
+from app.models.auth import User
 from app.schemas.auth import Token, UserLogin
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_and_update_password, create_access_token
+from app.services.login_throttle import client_ip, login_throttle
+from app.tools.tenant_directory_tool import get_tenant_by_slug
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
-@router.post("/login", response_model=Token)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    # 1. Resolve Tenant
-    stmt_tenant = select(Tenant).where(Tenant.slug == login_data.tenant_slug)
-    tenant = db.execute(stmt_tenant).scalar_one_or_none()
-    
-    # Cast is_active to bool for Pyright
-    if not tenant or not cast(bool, tenant.is_active):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+def _unauthorized(detail: str = "Incorrect email or password") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _resolve_account(db: Session, tenant_slug: str, email: str) -> tuple[Optional[dict], Optional[User]]:
+    # 1. Resolve Tenant (tenant directory cache; DB only on a miss)
+    tenant = get_tenant_by_slug(tenant_slug, db)
+    if not tenant or not tenant["is_active"]:
+        return None, None
 
     # 2. Resolve User within Tenant
-    # Use Tenant.id (class attr) for query, which is correct
     stmt_user = select(User).where(
-        User.email == login_data.email,
-        User.tenant_id == tenant.id
+        User.email == email,
+        User.tenant_id == tenant["id"]
     )
-    user = db.execute(stmt_user).scalar_one_or_none()
+    return tenant, db.execute(stmt_user).scalar_one_or_none()
+
+
+def _store_rehash(db: Session, user_id, new_hash: str) -> None:
+    db.execute(update(User).where(User.id == user_id).values(password_hash=new_hash))
+    db.commit()
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+
+@router.post("/login", response_model=Token)
+async def login(login_data: UserLogin, request: Request, db: Session = Depends(get_db)):
+    # Blocking work (DB, Redis) runs in the threadpool and bcrypt in its
+    # own bounded pool, so a login storm does not stall the event loop.
+    slug, email = login_data.tenant_slug, login_data.email
+    ip = client_ip(request)
+
+    # 0. Throttle before spending any hashing time
+    await run_in_threadpool(login_throttle.check_or_raise, slug, email, ip)
+
+    tenant, user = await run_in_threadpool(_resolve_account, db, slug, email)
+    if not tenant or not user:
+        await run_in_threadpool(login_throttle.record_failure, slug, email, ip)
+        raise _unauthorized()
 
     # Cast password_hash to str
-    if not verify_password(login_data.password, cast(str, user.password_hash)):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    ok, new_hash = await verify_and_update_password(login_data.password, cast(str, user.password_hash))
+    if not ok:
+        await run_in_threadpool(login_throttle.record_failure, slug, email, ip)
+        raise _unauthorized()
 
     # Cast is_active to bool
     if not cast(bool, user.is_active):
-         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Inactive user",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Inactive user")
 
     # 3. Create Token
     # Cast IDs and Role
     access_token = create_access_token(
         subject=str(user.id),
         extra_claims={
-            "tenant_id": str(tenant.id),
+            "tenant_id": tenant["id"],
             "role": cast(str, user.role)
         }
     )
-    
+
+    # Hash parameters changed (e.g. BCRYPT_ROUNDS raised): upgrade in place.
+    # After the token is built: the commit expires the loaded ORM objects.
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user.id, new_hash)
+    await run_in_threadpool(login_throttle.reset, slug, email)
+
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, UUID4
-from typing import Optional, List, cast
+from typing import Any, Optional, List, cast
 from uuid import UUID
 
 from app.api.deps import get_current_user
 from app.database import get_db
 from app.models.auth import User
+from app.services import chat_history
 from app.services.chat_service import ChatService
+from app.services.chat_stream import stream_chat
 from app.schemas.chat import JobEvidence
 from sqlalchemy.orm import Session
 
@@ -23,6 +28,19 @@ class ChatMessageResponse(BaseModel):
     response_markdown: str
     evidence: List[JobEvidence] = Field(default_factory=list)
 
+class ConversationSummary(BaseModel):
+    id: UUID4
+    title: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class HistoryMessage(BaseModel):
+    id: UUID4
+    role: str
+    content: str
+    metadata: dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime
+
 @router.post("/message", response_model=ChatMessageResponse)
 async def post_chat_message(
     payload: ChatMessageRequest,
@@ -56,3 +74,83 @@ async def post_chat_message(
         response_markdown=result.response_markdown,
         evidence=result.evidence
     )
+
+
+@router.post("/message/stream")
+async def post_chat_message_stream(
+    payload: ChatMessageRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Same contract as POST /message, delivered as Server-Sent Events: an
+    immediate `ack`, the response Markdown section by section, the
+    `message` envelope (conversation_id + evidence), then `job` updates for
+    the evidence job until it finishes.  See services/chat_stream for the
+    event list.
+    """
+    tenant_id = cast(UUID, current_user.tenant_id)
+    if tenant_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication context (missing tenant).",
+        )
+
+    return StreamingResponse(
+        stream_chat(
+            request,
+            tenant_id=tenant_id,
+            user_id=cast(UUID, current_user.id),
+            message=payload.message,
+            conversation_id=payload.conversation_id,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/conversations", response_model=List[ConversationSummary])
+def list_conversations(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The caller's conversations, most recently active first.  Keyset-paginated:
+    pass the `X-Next-Cursor` response header back as `cursor`.
+    """
+    rows, next_cursor = chat_history.list_conversations(
+        db, cast(UUID, current_user.tenant_id), cast(UUID, current_user.id), limit, cursor,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        ConversationSummary(id=r.id, title=r.title, created_at=r.created_at, updated_at=r.updated_at)
+        for r in rows
+    ]
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=List[HistoryMessage])
+def list_conversation_messages(
+    conversation_id: UUID4,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Messages of one of the caller's conversations, newest first.  Follow
+    `X-Next-Cursor` for older pages.  Other users' conversations are 404.
+    """
+    if not chat_history.owns_conversation(
+        db, conversation_id, cast(UUID, current_user.tenant_id), cast(UUID, current_user.id),
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+
+    entries, next_cursor = chat_history.list_messages(db, conversation_id, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
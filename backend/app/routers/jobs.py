@@ -1,17 +1,23 @@
 ﻿"""Orchestration / Job Control Agent â€“ manages async job lifecycle."""
 
+import json
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.database import SessionLocal, get_db
 from app.api.deps import get_current_user
 from app.models.auth import User
+from app.tools.job_progress_tool import get_live_progress
+from app.tools.job_result_tool import is_offloaded, offload_if_large, result_key, stream_offloaded_result
 
 router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
 
@@ -47,33 +53,24 @@ class JobResponse(BaseModel):
     payload: dict[str, Any]
     result: Optional[dict[str, Any]]
     error_message: Optional[str]
+    progress: Optional[dict[str, Any]] = None
     created_at: str
     updated_at: str
 
 
-# â”€â”€ Bootstrap (ensure jobs table exists) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-_JOBS_DDL = """
-CREATE TABLE IF NOT EXISTS jobs (
-    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    tenant_id       UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
-    job_type        VARCHAR(100) NOT NULL,
-    status          VARCHAR(30)  NOT NULL DEFAULT 'QUEUED',
-    idempotency_key VARCHAR(200),
-    payload         JSONB NOT NULL DEFAULT '{}',
-    result          JSONB,
-    error_message   TEXT,
-    created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
-    updated_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
-    UNIQUE (tenant_id, idempotency_key)
-);
-CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs(tenant_id);
-CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(tenant_id, status);
-"""
-
-
-def _ensure_table(db: Session):
-    db.execute(text(_JOBS_DDL))
-    db.commit()
+class JobSummary(BaseModel):
+    """List projection: payload/result are only loaded when requested."""
+    id: str
+    tenant_id: str
+    job_type: str
+    status: str
+    idempotency_key: Optional[str]
+    error_message: Optional[str]
+    progress: Optional[dict[str, Any]] = None
+    created_at: str
+    updated_at: str
+    payload: Optional[dict[str, Any]] = None
+    result: Optional[dict[str, Any]] = None
 
 
 def _row_to_response(r) -> JobResponse:
@@ -86,8 +83,31 @@ def _row_to_response(r) -> JobResponse:
         payload=r.payload if isinstance(r.payload, dict) else {},
         result=r.result if isinstance(r.result, dict) else None,
         error_message=r.error_message,
+        progress=getattr(r, "progress", None),
+        created_at=r.created_at.isoformat() if r.created_at else "",
+        updated_at=r.updated_at.isoformat() if r.updated_at else "",
+    )
+
+
+_SUMMARY_COLUMNS = (
+    "j.id, j.tenant_id, j.job_type, j.status, j.idempotency_key, "
+    "j.error_message, j.progress, j.created_at, j.updated_at"
+)
+
+
+def _row_to_summary(r, include_payload: bool) -> JobSummary:
+    return JobSummary(
+        id=str(r.id),
+        tenant_id=str(r.tenant_id),
+        job_type=r.job_type,
+        status=r.status,
+        idempotency_key=r.idempotency_key,
+        error_message=r.error_message,
+        progress=getattr(r, "progress", None),
         created_at=r.created_at.isoformat() if r.created_at else "",
         updated_at=r.updated_at.isoformat() if r.updated_at else "",
+        payload=(r.payload if isinstance(r.payload, dict) else {}) if include_payload else None,
+        result=(r.result if isinstance(r.result, dict) else None) if include_payload else None,
     )
 
 
@@ -102,7 +122,6 @@ def create_job(
     Enqueue a new job.  If an idempotency_key is provided and already
     exists for this tenant, the existing job is returned (safe retry).
     """
-    _ensure_table(db)
     tenant_id = str(current_user.tenant_id)
 
     # Idempotent check
@@ -117,7 +136,6 @@ def create_job(
         if existing:
             return _row_to_response(existing)
 
-    import json
     job_id = str(uuid4())
     db.execute(
         text("""
@@ -148,8 +166,10 @@ def get_job(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get job status by ID."""
-    _ensure_table(db)
+    """
+    Get job status by ID.  While the job runs, `progress` comes from the
+    live Redis snapshot, which is fresher than the persisted column.
+    """
     tenant_id = str(current_user.tenant_id)
     row = db.execute(
         text("SELECT * FROM jobs WHERE id = :id AND tenant_id = :tid"),
@@ -157,7 +177,43 @@ def get_job(
     ).fetchone()
     if not row:
         raise HTTPException(404, "Job not found")
-    return _row_to_response(row)
+    job = _row_to_response(row)
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        job.progress = get_live_progress(job_id) or job.progress
+    return job
+
+
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Return the full task result.  Results offloaded to object storage are
+    streamed back decompressed; the checksum of the JSON body is sent in
+    `X-Result-Checksum`.
+    """
+    tenant_id = str(current_user.tenant_id)
+    row = db.execute(
+        text("SELECT result FROM jobs WHERE id = :id AND tenant_id = :tid"),
+        {"id": job_id, "tid": tenant_id},
+    ).fetchone()
+    if not row:
+        raise HTTPException(404, "Job not found")
+    if not isinstance(row.result, dict):
+        raise HTTPException(404, "Job has no result")
+
+    if is_offloaded(row.result):
+        # Only ever read this job's own object, whatever the stored pointer says.
+        if row.result.get("storage_key") != result_key(tenant_id, job_id):
+            raise HTTPException(404, "Job has no result")
+        return StreamingResponse(
+            stream_offloaded_result(row.result),
+            media_type="application/json",
+            headers={"X-Result-Checksum": row.result.get("checksum_sha256", "")},
+        )
+    return JSONResponse(row.result)
 
 
 @router.patch("/{job_id}", response_model=JobResponse)
@@ -171,23 +227,34 @@ def update_job(
     Transition a job to a new status.
     Used by the worker or human-in-the-loop to mark progress.
     """
-    _ensure_table(db)
-    import json
 
     updates = ["status = :status", "updated_at = now()"]
     tenant_id = str(current_user.tenant_id)
     params: dict[str, Any] = {"id": job_id, "tid": tenant_id, "status": req.status.value}
 
+    # Check ownership before anything is written to S3, without a lock: the
+    # upload runs outside any transaction and the row is only locked by the
+    # UPDATE that writes the pointer.
+    owned = db.execute(
+        text("SELECT 1 FROM jobs WHERE id = :id AND tenant_id = :tid"),
+        {"id": job_id, "tid": tenant_id},
+    ).fetchone()
+    if not owned:
+        raise HTTPException(404, "Job not found")
+    db.rollback()
+
     if req.result is not None:
         updates.append("result = CAST(:result AS jsonb)")
-        params["result"] = json.dumps(req.result)
+        params["result"] = json.dumps(offload_if_large(job_id, tenant_id, req.result), default=str)
     if req.error_message is not None:
         updates.append("error_message = :err")
         params["err"] = req.error_message
 
     set_clause = ", ".join(updates)
-    db.execute(text(f"UPDATE jobs SET {set_clause} WHERE id = :id AND tenant_id = :tid"), params)
+    updated = db.execute(text(f"UPDATE jobs SET {set_clause} WHERE id = :id AND tenant_id = :tid"), params)
     db.commit()
+    if not updated.rowcount:
+        raise HTTPException(404, "Job not found")
 
     row = db.execute(
         text("SELECT * FROM jobs WHERE id = :id AND tenant_id = :tid"),
@@ -198,15 +265,25 @@ def update_job(
     return _row_to_response(row)
 
 
-@router.get("", response_model=list[JobResponse])
+@router.get("", response_model=list[JobSummary])
 def list_jobs(
+    response: Response,
     status: Optional[JobStatus] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    include_payload: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List jobs for the authenticated user's tenant, optionally filtered by status."""
-    _ensure_table(db)
+    """
+    List jobs for the authenticated user's tenant, newest first, optionally
+    filtered by status.
+
+    Keyset-paginated on (created_at, id): pass the `X-Next-Cursor` response
+    header back as `cursor` to fetch the next page.  payload/result are
+    omitted unless `include_payload=true`.  Pages larger than
+    JOBS_STREAM_THRESHOLD are streamed as a JSON array.
+    """
     tenant_id = str(current_user.tenant_id)
 
     filters = ["j.tenant_id = :tid"]
@@ -215,19 +292,71 @@ def list_jobs(
     if status:
         filters.append("j.status = :status")
         params["status"] = status.value
+    if cursor:
+        params["c_at"], params["c_id"] = decode_cursor(cursor)
+        filters.append("(j.created_at, j.id) < (:c_at, CAST(:c_id AS uuid))")
 
     where = " AND ".join(filters)
+    columns = _SUMMARY_COLUMNS + (", j.payload, j.result" if include_payload else "")
+    order = "ORDER BY j.created_at DESC, j.id DESC"
+
+    if limit > settings.JOBS_STREAM_THRESHOLD:
+        # Probe the page boundary on the index only, so the cursor header can
+        # be sent before the body is streamed.
+        boundary = db.execute(
+            text(f"""
+                SELECT j.created_at, j.id FROM jobs j
+                WHERE {where}
+                {order}
+                OFFSET :limit - 1 LIMIT 2
+            """),
+            params,
+        ).fetchall()
+        headers = {}
+        if len(boundary) == 2:
+            headers["X-Next-Cursor"] = encode_cursor(boundary[0].created_at, boundary[0].id)
+        sql = f"SELECT {columns} FROM jobs j WHERE {where} {order} LIMIT :limit"
+        return StreamingResponse(
+            _stream_jobs(sql, params, include_payload),
+            media_type="application/json",
+            headers=headers,
+        )
+
     rows = db.execute(
         text(f"""
-            SELECT * FROM jobs j
+            SELECT {columns} FROM jobs j
             WHERE {where}
-            ORDER BY j.created_at DESC
-            LIMIT :limit
+            {order}
+            LIMIT :limit + 1
         """),
         params,
     ).fetchall()
 
-    return [_row_to_response(r) for r in rows]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return [_row_to_summary(r, include_payload) for r in rows]
+
+
+def _stream_jobs(sql: str, params: dict[str, Any], include_payload: bool) -> Iterator[bytes]:
+    """Yield a JSON array of job summaries from a server-side cursor."""
+    # Own session: the request-scoped one is closed before the body streams.
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(sql).execution_options(stream_results=True, yield_per=500),
+            params,
+        )
+        yield b"["
+        first = True
+        for r in result:
+            item = _row_to_summary(r, include_payload).model_dump()
+            yield (b"" if first else b",") + json.dumps(item, default=str).encode("utf-8")
+            first = False
+        yield b"]"
+    finally:
+        db.close()
 
 
 @router.post("/{job_id}/reprocess", response_model=JobResponse)
@@ -239,7 +368,6 @@ def reprocess_job(
     """
     Reset a FAILED or NEEDS_HUMAN job back to QUEUED for idempotent retry.
     """
-    _ensure_table(db)
     tenant_id = str(current_user.tenant_id)
     row = db.execute(
         text("SELECT * FROM jobs WHERE id = :id AND tenant_id = :tid"),
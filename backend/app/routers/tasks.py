@@ -1,34 +1,48 @@
 """Tasks API router – HTTP triggers for all Celery tasks."""
 
-from typing import Optional, cast
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional, cast
+from uuid import UUID, uuid4
 
-from celery import Task
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy import text
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.api.deps import get_current_user
 from app.models.auth import User
-from app.tasks.task_a_validate import task_a_validate_cbs_ibs
-from app.tasks.task_b_report import task_b_compliance_report
-from app.tasks.task_c_simulation import task_c_whatif_simulation
-from app.tasks.task_d_reconciliation import task_d_reconciliation
-from app.tasks.task_e_hubspot import task_e_hubspot_sync
+from app.tools.postgres_tool import get_tax_rules, job_create
+from app.tools.simulation_cache_tool import get_cached_simulation, simulation_fingerprint
+from app.tools.tenant_directory_tool import get_tenant_by_id
+
+if TYPE_CHECKING:
+    from celery import Task
+
+# Task modules (and through them celery, boto3, httpx) are imported inside
+# each endpoint, so API processes only load them on the first trigger.
 
 router = APIRouter(prefix="/api/v1/tasks", tags=["tasks"])
 
 
 # ── Helpers ───────────────────────────────────────────────────
 def _get_tenant_slug(db: Session, tenant_id: str) -> str:
-    row = db.execute(
-        text("SELECT slug FROM tenants WHERE id = CAST(:id AS uuid)"),
-        {"id": tenant_id}
-    ).fetchone()
-    if not row:
+    tenant = get_tenant_by_id(tenant_id, db)
+    if not tenant:
         raise HTTPException(404, f"Tenant {tenant_id} not found")
-    return str(row.slug)
+    return tenant["slug"]
+
+
+def _create_job(tenant_id: str, current_user: User, job_type: str, payload: dict) -> str:
+    """Create the jobs row an async task reports into; its id is the task_id."""
+    job_id = str(uuid4())
+    job_create(
+        job_id=job_id,
+        tenant_id=tenant_id,
+        job_type=job_type,
+        payload={"user_id": str(current_user.id), **payload},
+    )
+    return job_id
 
 
 # ══════════════════════════════════════════════════════════════
@@ -57,21 +71,30 @@ def trigger_task_a(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.tasks.task_a_validate import task_a_validate_cbs_ibs
+
     tenant_id = str(current_user.tenant_id)
     tenant_slug = _get_tenant_slug(db, tenant_id)
 
     items: list[dict[str, object]] = [it.model_dump() for it in req.items]
     if req.async_mode:
-        r = cast(Task, task_a_validate_cbs_ibs).delay(
-            tenant_id=tenant_id,
-            tenant_slug=tenant_slug,
-            invoice_number=req.invoice_number,
-            issue_date=req.issue_date,
-            declared_cbs=req.declared_cbs,
-            declared_ibs=req.declared_ibs,
-            items=items,
+        job_id = _create_job(tenant_id, current_user, "task_a_validate_cbs_ibs", {
+            "invoice_number": req.invoice_number,
+            "items_count": len(items),
+        })
+        cast("Task", task_a_validate_cbs_ibs).apply_async(
+            kwargs={
+                "tenant_id": tenant_id,
+                "tenant_slug": tenant_slug,
+                "invoice_number": req.invoice_number,
+                "issue_date": req.issue_date,
+                "declared_cbs": req.declared_cbs,
+                "declared_ibs": req.declared_ibs,
+                "items": items,
+            },
+            task_id=job_id,
         )
-        return {"task_id": r.id, "status": "QUEUED"}
+        return {"task_id": job_id, "job_id": job_id, "status": "QUEUED"}
     return task_a_validate_cbs_ibs(  # type: ignore[reportCallIssue]  # Celery bind=True injects self
         tenant_id=tenant_id,
         tenant_slug=tenant_slug,
@@ -83,6 +106,38 @@ def trigger_task_a(
     )
 
 
+class TaskABatchRequest(BaseModel):
+    reference_period: Optional[str] = None      # YYYY-MM
+    company_id: Optional[str] = None
+    invoice_numbers: Optional[list[str]] = None
+    chunk_size: int = Field(default=200, ge=1, le=5000)
+
+
+@router.post("/validate/batch")
+def trigger_task_a_batch(
+    req: TaskABatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Validate stored invoices of a period and/or by number in chunks.
+    Always async: one parent job tracks aggregated progress counters.
+    """
+    from app.tasks.task_a_validate import task_a_validate_batch
+
+    if not req.reference_period and not req.invoice_numbers:
+        raise HTTPException(422, "reference_period or invoice_numbers is required")
+
+    tenant_id = str(current_user.tenant_id)
+    tenant_slug = _get_tenant_slug(db, tenant_id)
+    job_id = _create_job(tenant_id, current_user, "task_a_validate_batch", req.model_dump())
+    cast("Task", task_a_validate_batch).apply_async(
+        kwargs={"tenant_id": tenant_id, "tenant_slug": tenant_slug, **req.model_dump()},
+        task_id=job_id,
+    )
+    return {"task_id": job_id, "job_id": job_id, "status": "QUEUED"}
+
+
 # ══════════════════════════════════════════════════════════════
 # Task B – Compliance Report
 # ══════════════════════════════════════════════════════════════
@@ -111,20 +166,30 @@ def trigger_task_b(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.tasks.task_b_report import task_b_compliance_report
+
     tenant_id = str(current_user.tenant_id)
     tenant_slug = _get_tenant_slug(db, tenant_id)
 
     invoices: list[dict[str, object]] = [inv.model_dump() for inv in req.invoices]
     if req.async_mode:
-        r = cast(Task, task_b_compliance_report).delay(
-            tenant_id=tenant_id,
-            tenant_slug=tenant_slug,
-            company_name=req.company_name,
-            cnpj=req.cnpj,
-            reference_period=req.reference_period,
-            invoices=invoices,
+        job_id = _create_job(tenant_id, current_user, "task_b_compliance_report", {
+            "company_name": req.company_name,
+            "reference_period": req.reference_period,
+            "invoices_count": len(invoices),
+        })
+        cast("Task", task_b_compliance_report).apply_async(
+            kwargs={
+                "tenant_id": tenant_id,
+                "tenant_slug": tenant_slug,
+                "company_name": req.company_name,
+                "cnpj": req.cnpj,
+                "reference_period": req.reference_period,
+                "invoices": invoices,
+            },
+            task_id=job_id,
         )
-        return {"task_id": r.id, "status": "QUEUED"}
+        return {"task_id": job_id, "job_id": job_id, "status": "QUEUED"}
     return task_b_compliance_report(  # type: ignore[reportCallIssue]  # Celery bind=True injects self
         tenant_id=tenant_id,
         tenant_slug=tenant_slug,
@@ -146,9 +211,9 @@ class TaskCScenario(BaseModel):
 
 class TaskCRequest(BaseModel):
     simulation_name: str
-    base_amount: str
+    base_amount: Decimal
     scenarios: list[TaskCScenario]
-    ref_date: Optional[str] = None
+    ref_date: Optional[date] = None
     async_mode: bool = False
 
 
@@ -158,27 +223,88 @@ def trigger_task_c(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.tasks.task_c_simulation import task_c_whatif_simulation
+
     tenant_id = str(current_user.tenant_id)
     tenant_slug = _get_tenant_slug(db, tenant_id)
 
     scenarios: list[dict[str, object]] = [sc.model_dump() for sc in req.scenarios]
+    base_amount = str(req.base_amount)
+    ref_date = req.ref_date.isoformat() if req.ref_date else None
     if req.async_mode:
-        r = cast(Task, task_c_whatif_simulation).delay(
+        # Identical re-runs are answered from the cache without taking a worker slot
+        ref = req.ref_date or date.today()
+        fingerprint = simulation_fingerprint(
+            base_inputs={"base_amount": format(req.base_amount.normalize(), "f")},
+            scenarios=scenarios,
+            rules=get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref),
+            ref_date=ref,
+        )
+        cached = get_cached_simulation(tenant_id, fingerprint)
+        if cached is not None:
+            return {"task_id": None, "status": "SUCCESS", "result": cached}
+
+        r = cast("Task", task_c_whatif_simulation).delay(
             tenant_id=tenant_id,
             tenant_slug=tenant_slug,
             simulation_name=req.simulation_name,
-            base_amount=req.base_amount,
+            base_amount=base_amount,
             scenarios=scenarios,
-            ref_date=req.ref_date,
+            ref_date=ref_date,
         )
         return {"task_id": r.id, "status": "QUEUED"}
     return task_c_whatif_simulation(  # type: ignore[reportCallIssue]  # Celery bind=True injects self
         tenant_id=tenant_id,
         tenant_slug=tenant_slug,
         simulation_name=req.simulation_name,
-        base_amount=req.base_amount,
+        base_amount=base_amount,
         scenarios=scenarios,
-        ref_date=req.ref_date,
+        ref_date=ref_date,
+    )
+
+
+class TaskCPortfolioRequest(BaseModel):
+    simulation_name: str
+    company_id: UUID
+    reference_period: str = Field(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$")   # YYYY-MM
+    scenarios: list[TaskCScenario]
+    ref_date: Optional[date] = None
+    async_mode: bool = False
+
+
+@router.post("/simulate/portfolio")
+def trigger_task_c_portfolio(
+    req: TaskCPortfolioRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    from app.tasks.task_c_simulation import task_c_portfolio_simulation
+
+    tenant_id = str(current_user.tenant_id)
+    tenant_slug = _get_tenant_slug(db, tenant_id)
+
+    scenarios: list[dict[str, object]] = [sc.model_dump() for sc in req.scenarios]
+    company_id = str(req.company_id)
+    ref_date = req.ref_date.isoformat() if req.ref_date else None
+    if req.async_mode:
+        r = cast("Task", task_c_portfolio_simulation).delay(
+            tenant_id=tenant_id,
+            tenant_slug=tenant_slug,
+            simulation_name=req.simulation_name,
+            company_id=company_id,
+            reference_period=req.reference_period,
+            scenarios=scenarios,
+            ref_date=ref_date,
+        )
+        return {"task_id": r.id, "status": "QUEUED"}
+    return task_c_portfolio_simulation(  # type: ignore[reportCallIssue]  # Celery bind=True injects self
+        tenant_id=tenant_id,
+        tenant_slug=tenant_slug,
+        simulation_name=req.simulation_name,
+        company_id=company_id,
+        reference_period=req.reference_period,
+        scenarios=scenarios,
+        ref_date=ref_date,
     )
 
 
@@ -203,19 +329,28 @@ def trigger_task_d(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.tasks.task_d_reconciliation import task_d_reconciliation
+
     tenant_id = str(current_user.tenant_id)
     tenant_slug = _get_tenant_slug(db, tenant_id)
 
     invoices: list[dict[str, object]] = [inv.model_dump() for inv in req.invoices]
     if req.async_mode:
-        r = cast(Task, task_d_reconciliation).delay(
-            tenant_id=tenant_id,
-            tenant_slug=tenant_slug,
-            csv_receivables_b64=req.csv_receivables_b64,
-            invoices=invoices,
-            tolerance=req.tolerance,
+        job_id = _create_job(tenant_id, current_user, "task_d_reconciliation", {
+            "invoices_count": len(invoices),
+            "tolerance": req.tolerance,
+        })
+        cast("Task", task_d_reconciliation).apply_async(
+            kwargs={
+                "tenant_id": tenant_id,
+                "tenant_slug": tenant_slug,
+                "csv_receivables_b64": req.csv_receivables_b64,
+                "invoices": invoices,
+                "tolerance": req.tolerance,
+            },
+            task_id=job_id,
         )
-        return {"task_id": r.id, "status": "QUEUED"}
+        return {"task_id": job_id, "job_id": job_id, "status": "QUEUED"}
     return task_d_reconciliation(  # type: ignore[reportCallIssue]  # Celery bind=True injects self
         tenant_id=tenant_id,
         tenant_slug=tenant_slug,
@@ -244,11 +379,13 @@ def trigger_task_e(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.tasks.task_e_hubspot import task_e_hubspot_sync
+
     tenant_id = str(current_user.tenant_id)
     tenant_slug = _get_tenant_slug(db, tenant_id)
 
     if req.async_mode:
-        r = cast(Task, task_e_hubspot_sync).delay(
+        r = cast("Task", task_e_hubspot_sync).delay(
             tenant_id=tenant_id,
             tenant_slug=tenant_slug,
             company_name=req.company_name,
@@ -0,0 +1,229 @@
+"""
+Chat history reads.
+
+Conversations and messages are listed newest first with keyset pagination
+on (updated_at|created_at, id), straight from SQL rather than through the
+ORM relationship.  The latest messages of active conversations are kept
+in a Redis list (CHAT_RECENT_CACHE_SIZE + 1 entries, so a cached first page
+still knows whether an older page exists).  Writers bump a generation
+counter before and after committing, then push onto the list only if it
+already exists; readers fill it on a miss unless the generation moved
+since they started reading.  A reader that filled between a writer's
+commit and its push leaves duplicates behind; those are detected on read
+and the list is dropped.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+import redis
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.core.pagination import decode_cursor, encode_cursor
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_RECENT_KEY = "chat_recent:{}"
+_GEN_KEY = "chat_recent_gen:{}"
+
+
+def message_entry(m: Any) -> dict[str, Any]:
+    """JSON-ready dict for a messages row or Message object."""
+    metadata = getattr(m, "metadata_", None)
+    if metadata is None:
+        metadata = getattr(m, "metadata", None)
+    return {
+        "id": str(m.id),
+        "role": m.role,
+        "content": m.content,
+        "metadata": metadata if isinstance(metadata, dict) else {},
+        "created_at": m.created_at.isoformat(),
+    }
+
+
+def _entry_cursor(entry: dict[str, Any]) -> str:
+    return encode_cursor(datetime.fromisoformat(entry["created_at"]), entry["id"])
+
+
+# ── 1. Recent-messages cache ─────────────────────────────────
+def _recent_get(conversation_id: str, limit: int) -> Optional[list[dict[str, Any]]]:
+    r = get_redis()
+    if r is None or settings.CHAT_RECENT_CACHE_SIZE <= 0:
+        return None
+    key = _RECENT_KEY.format(conversation_id)
+    try:
+        pipe = r.pipeline()
+        pipe.lrange(key, 0, limit)          # limit + 1 entries: tells if more exist
+        pipe.expire(key, settings.CHAT_RECENT_CACHE_TTL_SECONDS)
+        raw, _ = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Chat recent cache read failed: %s", e)
+        return None
+    entries = [json.loads(item) for item in raw]
+    if entries and len({e["id"] for e in entries}) != len(entries):
+        _recent_drop(r, key)                # filled and pushed by a racing reader/writer pair
+        entries = []
+    if not entries:
+        CACHE_REQUESTS.labels("chat_recent", "miss").inc()
+        return None
+    CACHE_REQUESTS.labels("chat_recent", "hit").inc()
+    return entries
+
+
+def _recent_drop(r: redis.Redis, key: str) -> None:
+    try:
+        r.delete(key)
+    except redis.RedisError:
+        pass
+
+
+def _recent_generation(conversation_id: str) -> Optional[str]:
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return r.get(_GEN_KEY.format(conversation_id))
+    except redis.RedisError:
+        return None
+
+
+def _recent_fill(conversation_id: str, newest_first: list[dict[str, Any]], generation: Optional[str]) -> None:
+    r = get_redis()
+    if r is None or not newest_first:
+        return
+    key, gen_key = _RECENT_KEY.format(conversation_id), _GEN_KEY.format(conversation_id)
+    try:
+        with r.pipeline() as pipe:
+            pipe.watch(gen_key)
+            if pipe.get(gen_key) != generation:
+                return                      # written meanwhile: our rows may be stale
+            pipe.multi()
+            pipe.delete(key)
+            pipe.rpush(key, *(json.dumps(e) for e in newest_first))
+            pipe.expire(key, settings.CHAT_RECENT_CACHE_TTL_SECONDS)
+            pipe.execute()
+    except redis.WatchError:
+        pass
+    except redis.RedisError as e:
+        logger.warning("Chat recent cache fill failed: %s", e)
+
+
+def bump_recent_generation(conversation_id: UUID | str) -> None:
+    """Call before committing new messages: readers already past their generation read won't fill."""
+    r = get_redis()
+    if r is None or settings.CHAT_RECENT_CACHE_SIZE <= 0:
+        return
+    gen_key = _GEN_KEY.format(conversation_id)
+    try:
+        pipe = r.pipeline()
+        pipe.incr(gen_key)
+        pipe.expire(gen_key, settings.CHAT_RECENT_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Chat recent cache generation bump failed: %s", e)
+        _recent_drop(r, _RECENT_KEY.format(conversation_id))
+
+
+def push_recent(conversation_id: UUID | str, entries: list[dict[str, Any]]) -> None:
+    """Prepend newly committed messages (oldest first) to a cached conversation."""
+    r = get_redis()
+    if r is None or not entries or settings.CHAT_RECENT_CACHE_SIZE <= 0:
+        return
+    key, gen_key = _RECENT_KEY.format(conversation_id), _GEN_KEY.format(conversation_id)
+    try:
+        pipe = r.pipeline()
+        pipe.incr(gen_key)
+        pipe.expire(gen_key, settings.CHAT_RECENT_CACHE_TTL_SECONDS)
+        for e in entries:
+            pipe.lpushx(key, json.dumps(e))
+        pipe.ltrim(key, 0, settings.CHAT_RECENT_CACHE_SIZE)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Chat recent cache push failed: %s", e)
+        _recent_drop(r, key)            # never leave a list with a gap behind
+
+
+# ── 2. Queries ───────────────────────────────────────────────
+def owns_conversation(db: Session, conversation_id: UUID, tenant_id: UUID, user_id: UUID) -> bool:
+    row = db.execute(
+        text("""
+            SELECT 1 FROM conversations
+            WHERE id = :cid AND tenant_id = :tid AND user_id = :uid
+        """),
+        {"cid": conversation_id, "tid": tenant_id, "uid": user_id},
+    ).fetchone()
+    return row is not None
+
+
+def list_conversations(
+    db: Session, tenant_id: UUID, user_id: UUID, limit: int, cursor: Optional[str] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """A page of the user's conversations by last activity; returns (rows, next cursor)."""
+    filters = ["tenant_id = :tid", "user_id = :uid"]
+    params: dict[str, Any] = {"tid": tenant_id, "uid": user_id, "limit": limit}
+    if cursor:
+        params["c_at"], params["c_id"] = decode_cursor(cursor)
+        filters.append("(updated_at, id) < (:c_at, CAST(:c_id AS uuid))")
+
+    rows = db.execute(
+        text(f"""
+            SELECT id, title, created_at, updated_at FROM conversations
+            WHERE {" AND ".join(filters)}
+            ORDER BY updated_at DESC, id DESC
+            LIMIT :limit + 1
+        """),
+        params,
+    ).fetchall()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].updated_at, rows[-1].id)
+    return rows, None
+
+
+def list_messages(
+    db: Session, conversation_id: UUID, limit: int, cursor: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    A page of messages, newest first; returns (entries, cursor of the next
+    older page).  First pages within CHAT_RECENT_CACHE_SIZE come from the
+    recent-messages cache.
+    """
+    cid = str(conversation_id)
+    cacheable = cursor is None and limit <= settings.CHAT_RECENT_CACHE_SIZE
+    entries = _recent_get(cid, limit) if cacheable else None
+
+    if entries is None:
+        generation = _recent_generation(cid) if cacheable else None
+        filters = ["conversation_id = :cid"]
+        fetch = max(limit, settings.CHAT_RECENT_CACHE_SIZE) if cacheable else limit
+        params: dict[str, Any] = {"cid": conversation_id, "limit": fetch}
+        if cursor:
+            params["c_at"], params["c_id"] = decode_cursor(cursor)
+            filters.append("(created_at, id) < (:c_at, CAST(:c_id AS uuid))")
+        rows = db.execute(
+            text(f"""
+                SELECT id, role, content, metadata, created_at FROM messages
+                WHERE {" AND ".join(filters)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit + 1
+            """),
+            params,
+        ).fetchall()
+        entries = [message_entry(r) for r in rows]
+        if cacheable:
+            _recent_fill(cid, entries, generation)
+
+    if len(entries) > limit:
+        entries = entries[:limit]
+        return entries, _entry_cursor(entries[-1])
+    return entries, None
@@ -8,12 +8,13 @@ from typing import Any, Literal, Optional, cast
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.crews.executor import TribultzChatOpsExecutor
 from app.models.chat import Conversation, Message
 from app.schemas.chat import ChatResult, JobEvidence
+from app.services.chat_history import bump_recent_generation, message_entry, push_recent
 from app.services.rate_limit import RateLimiter
 
 logger = logging.getLogger(__name__)
@@ -145,19 +146,19 @@ class ChatService:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Conversation not found",
                 )
+            conv.updated_at = func.now()    # conversation lists sort by last activity
         else:
             conv = Conversation(tenant_id=tenant_id, user_id=user_id, title=message[:50])
             self.db.add(conv)
             self.db.flush()
             conversation_id = cast(UUID, conv.id)
 
-        self.db.add(
-            Message(
-                conversation_id=conversation_id,
-                role="user",
-                content=message,
-            )
+        user_message = Message(
+            conversation_id=conversation_id,
+            role="user",
+            content=message,
         )
+        self.db.add(user_message)
 
         intent = classify_intent(message)
         response_markdown = ""
@@ -214,15 +215,21 @@ class ChatService:
                 return str(obj)
             return obj
 
-        self.db.add(
-            Message(
-                conversation_id=conversation_id,
-                role="assistant",
-                content=response_markdown,
-                metadata_=json.loads(json.dumps({"evidence": evidence_dicts}, default=uuid_serializer)),
-            )
+        assistant_message = Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=response_markdown,
+            metadata_=json.loads(json.dumps({"evidence": evidence_dicts}, default=uuid_serializer)),
         )
+        self.db.add(assistant_message)
+        # Flush first: ids/created_at come back via RETURNING and the objects
+        # expire on commit.
+        self.db.flush()
+        new_messages = (user_message, assistant_message)
+        recent = [message_entry(m) for m in new_messages] if all(m.created_at for m in new_messages) else []
+        bump_recent_generation(cast(UUID, conversation_id))
         self.db.commit()
+        push_recent(cast(UUID, conversation_id), recent)
 
         return ChatResult(
             conversation_id=conversation_id,
@@ -0,0 +1,151 @@
+"""
+Server-Sent Events for chat.
+
+One connection carries the whole exchange:
+
+  ack      sent before any work, so the client can render "thinking"
+  section  the rendered Markdown, one `## ` section per event
+  message  conversation_id + typed evidence (same as the JSON endpoint)
+  job      status/progress of each evidence job, whenever it changes
+  error    {status, detail} if the message was rejected (429, 404, ...)
+  end      {reason}: "done", "timeout" or "no_jobs"
+
+Job status is polled from the jobs row (plus the live Redis progress while
+running) every CHAT_STREAM_POLL_SECONDS, for at most CHAT_STREAM_MAX_SECONDS;
+each poll uses its own short-lived session, so an open stream does not pin
+a database connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.chat_service import ChatService
+from app.tools.job_progress_tool import get_live_progress
+
+_ACTIVE = {"QUEUED", "RUNNING"}
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+def split_sections(markdown: str) -> list[str]:
+    """Split rendered Markdown before each `## ` heading; a preamble (title) is its own section."""
+    sections: list[list[str]] = [[]]
+    for line in markdown.splitlines():
+        if line.startswith("## ") and any(s.strip() for s in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(s).strip("\n") + "\n" for s in sections if any(x.strip() for x in s)]
+
+
+# ── 1. Job status ────────────────────────────────────────────
+def job_snapshot(job_id: str, tenant_id: str) -> Optional[dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            text("""
+                SELECT status, progress, error_message, updated_at FROM jobs
+                WHERE id = :id AND tenant_id = :tid
+            """),
+            {"id": job_id, "tid": tenant_id},
+        ).fetchone()
+    finally:
+        db.close()
+    if not row:
+        return None
+    progress = row.progress
+    if row.status in _ACTIVE:
+        progress = get_live_progress(job_id) or progress
+    return {
+        "job_id": job_id,
+        "status": row.status,
+        "progress": progress,
+        "error_message": row.error_message,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+async def _watch_jobs(request: Request, job_ids: list[str], tenant_id: str) -> AsyncIterator[bytes]:
+    pending = set(job_ids)
+    last: dict[str, dict[str, Any]] = {}
+    deadline = time.monotonic() + settings.CHAT_STREAM_MAX_SECONDS
+    quiet = 0.0
+    while pending:
+        if await request.is_disconnected():
+            return
+        for job_id in sorted(pending):
+            snap = await run_in_threadpool(job_snapshot, job_id, tenant_id)
+            if snap is None or snap["status"] not in _ACTIVE:
+                pending.discard(job_id)
+            if snap is not None and snap != last.get(job_id):
+                last[job_id] = snap
+                quiet = 0.0
+                yield sse_event("job", snap)
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            yield sse_event("end", {"reason": "timeout"})
+            return
+        await asyncio.sleep(settings.CHAT_STREAM_POLL_SECONDS)
+        quiet += settings.CHAT_STREAM_POLL_SECONDS
+        if quiet >= settings.CHAT_STREAM_KEEPALIVE_SECONDS:
+            quiet = 0.0
+            yield b": keepalive\n\n"     # comment line: keeps proxies from timing out
+    yield sse_event("end", {"reason": "done"})
+
+
+# ── 2. Chat exchange ─────────────────────────────────────────
+async def stream_chat(
+    request: Request,
+    *,
+    tenant_id: UUID,
+    user_id: UUID,
+    message: str,
+    conversation_id: Optional[UUID],
+) -> AsyncIterator[bytes]:
+    yield sse_event("ack", {
+        "conversation_id": str(conversation_id) if conversation_id else None,
+        "received_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+    # Own session: the request-scoped one is closed before the body streams.
+    db = SessionLocal()
+    try:
+        result = await ChatService(db=db).handle_message(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            message=message,
+            conversation_id=conversation_id,
+        )
+    except HTTPException as exc:
+        yield sse_event("error", {"status": exc.status_code, "detail": exc.detail})
+        return
+    finally:
+        db.close()
+
+    for index, section in enumerate(split_sections(result.response_markdown)):
+        yield sse_event("section", {"index": index, "markdown": section})
+    yield sse_event("message", {
+        "conversation_id": str(result.conversation_id),
+        "evidence": [e.model_dump(mode="json") for e in result.evidence],
+    })
+
+    job_ids = [str(e.job_id) for e in result.evidence if e.type == "job" and e.job_id]
+    if not job_ids:
+        yield sse_event("end", {"reason": "no_jobs"})
+        return
+    async for chunk in _watch_jobs(request, job_ids, str(tenant_id)):
+        yield chunk
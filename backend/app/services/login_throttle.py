@@ -0,0 +1,140 @@
+"""
+Failed-login throttle (Redis with in-memory fallback).
+
+Failures are counted per account (tenant slug + email) and per client IP
+over LOGIN_FAILURE_WINDOW_SECONDS.  `check_or_raise` runs before any
+password hashing, so brute-force traffic is rejected with 429 without
+spending bcrypt time on it.  A successful login clears the account counter
+(the IP counter only expires, so one valid account cannot launder a spray).
+
+Behind a load balancer the peer address is the balancer's: `client_ip`
+takes the address from X-Forwarded-For, but only when the peer is one of
+LOGIN_TRUSTED_PROXIES (otherwise the header is client-controlled).
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import logging
+import time
+from typing import Optional
+
+import redis
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "login_fail:"
+
+
+def account_key(tenant_slug: str, email: str) -> str:
+    return f"{KEY_PREFIX}acct:{tenant_slug}:{email.strip().lower()}"
+
+
+def ip_key(ip: str) -> str:
+    return f"{KEY_PREFIX}ip:{ip}"
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in ipaddress.ip_network(net, strict=False) for net in settings.LOGIN_TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    The caller's address: the peer, or, when the peer is a trusted proxy,
+    the right-most X-Forwarded-For entry that is not itself a trusted proxy.
+    """
+    peer = request.client.host if request.client else None
+    if not peer or not _trusted(peer):
+        return peer
+    forwarded = [a.strip() for a in request.headers.get("x-forwarded-for", "").split(",") if a.strip()]
+    for address in reversed(forwarded):
+        if not _trusted(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+class LoginThrottle:
+    def __init__(self) -> None:
+        self._memory_store: dict[str, list[float]] = {}
+
+    def _limits(self, tenant_slug: str, email: str, ip: Optional[str]) -> list[tuple[str, int]]:
+        limits = [(account_key(tenant_slug, email), settings.LOGIN_MAX_FAILURES_ACCOUNT)]
+        if ip:
+            limits.append((ip_key(ip), settings.LOGIN_MAX_FAILURES_IP))
+        return limits
+
+    def check_or_raise(self, tenant_slug: str, email: str, ip: Optional[str]) -> None:
+        """Raise 429 (with Retry-After) if the account or IP is locked out."""
+        for key, limit in self._limits(tenant_slug, email, ip):
+            failures, retry_after = self._read(key)
+            if limit and failures >= limit:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many failed login attempts. Try again later.",
+                    headers={"Retry-After": str(max(1, retry_after))},
+                )
+
+    def record_failure(self, tenant_slug: str, email: str, ip: Optional[str]) -> None:
+        for key, _ in self._limits(tenant_slug, email, ip):
+            self._incr(key)
+
+    def reset(self, tenant_slug: str, email: str) -> None:
+        key = account_key(tenant_slug, email)
+        self._memory_store.pop(key, None)
+        r = get_redis()
+        if r is not None:
+            try:
+                r.delete(key)
+            except redis.RedisError as e:
+                logger.error("Redis error in LoginThrottle: %s", e)
+
+    # ── Storage ──────────────────────────────────────────────
+    def _read(self, key: str) -> tuple[int, int]:
+        """(failures in window, seconds until the window resets)."""
+        r = get_redis()
+        if r is not None:
+            try:
+                pipe = r.pipeline()
+                pipe.get(key)
+                pipe.ttl(key)
+                count, ttl = pipe.execute()
+                return int(count or 0), max(int(ttl), 0)
+            except redis.RedisError as e:
+                logger.error("Redis error in LoginThrottle: %s", e)
+        history = self._window(key)
+        if not history:
+            return 0, 0
+        return len(history), int(history[0] + settings.LOGIN_FAILURE_WINDOW_SECONDS - time.time())
+
+    def _incr(self, key: str) -> None:
+        r = get_redis()
+        if r is not None:
+            try:
+                pipe = r.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, settings.LOGIN_FAILURE_WINDOW_SECONDS, nx=True)
+                pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.error("Redis error in LoginThrottle: %s", e)
+        self._memory_store[key] = self._window(key) + [time.time()]
+
+    def _window(self, key: str) -> list[float]:
+        window_start = time.time() - settings.LOGIN_FAILURE_WINDOW_SECONDS
+        history = [ts for ts in self._memory_store.get(key, []) if ts > window_start]
+        if history:
+            self._memory_store[key] = history
+        else:
+            self._memory_store.pop(key, None)
+        return history
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,169 @@
+"""
+Per-tenant fair scheduling for Celery tasks.
+
+Queues split interactive work (chat/API validations, single what-ifs) from
+batch work (reports, portfolio simulations, reconciliation, HubSpot sync).
+Within a queue every tenant holds at most N concurrent slots (a Redis
+semaphore, N scaled by the tenant's weight); a task that finds its tenant
+at the cap is re-published with a short backoff instead of occupying a
+worker, so other tenants' tasks behind it get dequeued first.  After
+TENANT_REQUEUE_MAX_ATTEMPTS requeues it runs over the cap rather than wait
+indefinitely.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from typing import Any, Optional
+from uuid import uuid4
+
+import redis
+from celery.exceptions import Ignore
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.tasks.base import JobBackedTask
+
+logger = logging.getLogger(__name__)
+
+QUEUE_INTERACTIVE = "interactive"
+QUEUE_BATCH = "batch"
+QUEUE_MAINTENANCE = "maintenance"
+
+# Redis transport: 0 is the highest priority
+PRIORITY_CHAT = 0
+PRIORITY_DEFAULT = 5
+
+TASK_QUEUES: dict[str, str] = {
+    "task_a_validate_cbs_ibs": QUEUE_INTERACTIVE,
+    "task_c_whatif_simulation": QUEUE_INTERACTIVE,
+    "task_a_validate_batch": QUEUE_BATCH,
+    "task_a_validate_chunk": QUEUE_BATCH,
+    "task_a_validate_batch_finalize": QUEUE_BATCH,
+    "task_a_validate_batch_failed": QUEUE_BATCH,
+    "task_b_compliance_report": QUEUE_BATCH,
+    "task_c_portfolio_simulation": QUEUE_BATCH,
+    "task_d_reconciliation": QUEUE_BATCH,
+    "task_e_hubspot_sync": QUEUE_BATCH,
+    "task_c_evict_simulation_cache": QUEUE_MAINTENANCE,
+    "maintain_audit_log_partitions": QUEUE_MAINTENANCE,
+    "verify_audit_chain": QUEUE_MAINTENANCE,
+    "prune_celery_results": QUEUE_MAINTENANCE,
+}
+
+
+# ── 1. Semaphore ──────────────────────────────────────────────
+# Slots are a sorted set of tokens scored by lease expiry, so a worker
+# that dies mid-task releases its slot when the lease runs out.
+_ACQUIRE_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    return 1
+end
+return 0
+"""
+
+
+def tenant_limit(tenant_id: str, queue: str) -> int:
+    base = (
+        settings.TENANT_MAX_CONCURRENCY_INTERACTIVE if queue == QUEUE_INTERACTIVE
+        else settings.TENANT_MAX_CONCURRENCY_BATCH
+    )
+    weight = settings.TENANT_WEIGHTS.get(tenant_id, 1.0)
+    return max(1, round(base * weight))
+
+
+def acquire_slot(tenant_id: str, queue: str) -> Optional[str]:
+    """
+    Take a concurrency slot.  Returns the slot token, "" when Redis is
+    unavailable (no cap enforced), or None when the tenant is at its cap.
+    """
+    r = get_redis()
+    if r is None:
+        return ""
+    token = str(uuid4())
+    lease = settings.TENANT_SLOT_LEASE_SECONDS
+    now = time.time()
+    try:
+        ok = r.eval(
+            _ACQUIRE_LUA, 1, f"tenant_slots:{queue}:{tenant_id}",
+            now, now + lease, tenant_limit(tenant_id, queue), token, lease,
+        )
+    except redis.RedisError as e:
+        logger.error("Redis error acquiring tenant slot: %s", e)
+        return ""
+    return token if ok else None
+
+
+def release_slot(tenant_id: str, queue: str, token: str) -> None:
+    r = get_redis()
+    if r is None or not token:
+        return
+    try:
+        r.zrem(f"tenant_slots:{queue}:{tenant_id}", token)
+    except redis.RedisError as e:
+        logger.error("Redis error releasing tenant slot: %s", e)
+
+
+def requeue_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, capped."""
+    cap = settings.TENANT_REQUEUE_MAX_DELAY_SECONDS
+    return random.uniform(0, min(cap, 2 ** attempt))
+
+
+# ── 2. Task base class ───────────────────────────────────────
+class TenantFairTask(JobBackedTask):
+    """
+    Celery base task enforcing the per-tenant cap of its queue.
+    Direct (synchronous) calls from the API bypass the cap.
+    """
+
+    abstract = True
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        tenant_id = kwargs.get("tenant_id") or (args[0] if args else None)
+        queue = TASK_QUEUES.get(self.name)
+        if self.request.called_directly or not tenant_id or queue not in (QUEUE_INTERACTIVE, QUEUE_BATCH):
+            return super().__call__(*args, **kwargs)
+
+        token = acquire_slot(str(tenant_id), queue)
+        if token is None:
+            attempt = int(
+                self.request.get("tenant_requeues")
+                or (self.request.headers or {}).get("tenant_requeues")
+                or 0
+            )
+            if attempt < settings.TENANT_REQUEUE_MAX_ATTEMPTS:
+                return self._requeue(args, kwargs, str(tenant_id), queue, attempt)
+            logger.warning(
+                "Tenant %s still at %s cap after %d requeues; running %s over the cap",
+                tenant_id, queue, attempt, self.request.id,
+            )
+
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            release_slot(str(tenant_id), queue, token)
+
+    def _requeue(self, args: tuple, kwargs: dict, tenant_id: str, queue: str, attempt: int) -> Any:
+        delay = requeue_delay(attempt)
+        logger.info(
+            "Tenant %s at %s cap; requeue %s in %.1fs (attempt %d)",
+            tenant_id, queue, self.request.id, delay, attempt + 1,
+        )
+        # Rebuilt from the request, like Task.retry: the same task_id plus the
+        # chord/group/link options, so a requeued chord member still counts
+        # towards its chord.
+        sig = self.signature_from_request(
+            self.request, args, kwargs,
+            countdown=delay,
+            headers={"tenant_requeues": attempt + 1},
+        )
+        if self.request.is_eager:
+            return sig.apply().get()
+        sig.apply_async()
+        raise Ignore()
@@ -0,0 +1,53 @@
+"""Shared Celery task base classes."""
+
+from typing import Any
+
+from celery import Task
+
+from app.config import settings
+from app.core.tracing import annotate_span
+
+
+class JobBackedTask(Task):
+    """
+    Base for tasks that may persist their full result outside Celery
+    (jobs row, simulations table, S3); such tasks set
+    `result_persisted=True`.  With CELERY_RESULT_MODE="ack" only a small
+    ack record of those goes to the Redis result backend.  Direct
+    (synchronous) calls and tasks whose result feeds a chord keep the
+    full result.
+    """
+
+    abstract = True
+    result_persisted = False
+
+    def _invoke(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run the task body.  Task.__call__ pushes a fresh request context,
+        which in a worker would hide the tracer's (task id, headers,
+        delivery info); so it is only used for direct calls.
+        """
+        if self.request.called_directly:
+            return super().__call__(*args, **kwargs)
+        return self.run(*args, **kwargs)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        # Job-backed tasks are enqueued with task_id == job_id
+        annotate_span(job_id=self.request.id, tenant_id=kwargs.get("tenant_id"))
+        result = self._invoke(*args, **kwargs)
+        if (
+            not self.result_persisted
+            or settings.CELERY_RESULT_MODE != "ack"
+            or self.request.called_directly
+        ):
+            return result
+        return ack_record(self.request.id, result)
+
+
+def ack_record(task_id: str, result: Any) -> dict:
+    ack: dict[str, Any] = {"ack": True, "job_id": task_id}
+    if isinstance(result, dict):
+        for key in ("status", "simulation_id", "run_id", "audit_id"):
+            if key in result:
+                ack[key] = result[key]
+    return ack
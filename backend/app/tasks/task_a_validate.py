@@ -1,18 +1,145 @@
 """Task A – Validate CBS/IBS for a batch of items and write audit_log."""
 
+import json
 import logging
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
+from hashlib import sha256
+from typing import Optional
+
+from celery import chord
 
 from app.celery_app import celery
-from app.tools.postgres_tool import get_tax_rules, insert_audit_log, job_status_update
+from app.core.serialization import BATCH_TASK_SERIALIZER
+from app.database import SessionLocal
+from app.services.tenant_scheduling import TenantFairTask
+from app.tasks.base import JobBackedTask
+from app.tools.audit_chain_tool import append_audit_entries
+from app.tools.postgres_tool import (
+    get_tax_rules,
+    get_tax_rules_window,
+    insert_audit_log,
+    job_increment_counters,
+    job_status_update,
+    list_invoice_refs,
+    load_invoices_with_items,
+)
 
 logger = logging.getLogger(__name__)
 
 TWO_PLACES = Decimal("0.01")
+DEFAULT_CHUNK_SIZE = 200
+MAX_LISTED_FAILURES = 1000
+
+
+# ── Validation engine ────────────────────────────────────────
+def _rule_codes(items: list[dict]) -> set[str]:
+    codes = set()
+    for it in items:
+        codes.add(it.get("cbs_rule_code", "STD_CBS"))
+        codes.add(it.get("ibs_rule_code", "STD_IBS"))
+    return codes
+
+
+def _rate_map(rules: list[dict], ref_date: date) -> dict[tuple[str, str], Decimal]:
+    """(rule_code, tax_type) → rate of the most recent rule valid on ref_date."""
+    ref = ref_date.isoformat()
+    picked: dict[tuple[str, str], dict] = {}
+    for r in rules:
+        if r["valid_from"] > ref or (r.get("valid_to") and r["valid_to"] < ref):
+            continue
+        key = (r["rule_code"], r["tax_type"])
+        if key not in picked or r["valid_from"] > picked[key]["valid_from"]:
+            picked[key] = r
+    return {key: Decimal(str(r["rate"])) for key, r in picked.items()}
+
+
+def _validate_invoice(
+    *,
+    invoice_number: str,
+    issue_date: str,
+    declared_cbs: str,
+    declared_ibs: str,
+    items: list[dict],
+    rate_map: dict[tuple[str, str], Decimal],
+) -> dict:
+    """Calculate expected taxes per item and compare with the declared totals."""
+    total_cbs = Decimal("0")
+    total_ibs = Decimal("0")
+    item_results: list[dict] = []
+
+    for it in items:
+        base = Decimal(str(it["base_amount"]))
+        cbs_code = it.get("cbs_rule_code", "STD_CBS")
+        ibs_code = it.get("ibs_rule_code", "STD_IBS")
+
+        cbs_rate = rate_map.get((cbs_code, "CBS"), Decimal("0"))
+        ibs_rate = rate_map.get((ibs_code, "IBS"), Decimal("0"))
+
+        cbs_amt = (base * cbs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
+        ibs_amt = (base * ibs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
+
+        total_cbs += cbs_amt
+        total_ibs += ibs_amt
+
+        item_results.append({
+            "sku": it.get("sku", ""),
+            "base_amount": str(base),
+            "cbs_rate": str(cbs_rate),
+            "cbs_amount": str(cbs_amt),
+            "ibs_rate": str(ibs_rate),
+            "ibs_amount": str(ibs_amt),
+        })
 
+    total_cbs = total_cbs.quantize(TWO_PLACES, ROUND_HALF_UP)
+    total_ibs = total_ibs.quantize(TWO_PLACES, ROUND_HALF_UP)
+    decl_cbs = Decimal(declared_cbs).quantize(TWO_PLACES, ROUND_HALF_UP)
+    decl_ibs = Decimal(declared_ibs).quantize(TWO_PLACES, ROUND_HALF_UP)
 
-@celery.task(name="task_a_validate_cbs_ibs", bind=True, max_retries=3)
+    cbs_match = total_cbs == decl_cbs
+    ibs_match = total_ibs == decl_ibs
+    status = "PASS" if (cbs_match and ibs_match) else "FAIL"
+
+    return {
+        "status": status,
+        "invoice_number": invoice_number,
+        "issue_date": issue_date,
+        "declared_cbs": str(decl_cbs),
+        "declared_ibs": str(decl_ibs),
+        "calculated_cbs": str(total_cbs),
+        "calculated_ibs": str(total_ibs),
+        "cbs_match": cbs_match,
+        "ibs_match": ibs_match,
+        "items": item_results,
+    }
+
+
+def _audit_entry(result: dict, invoice_id: Optional[str] = None) -> dict:
+    """
+    Audit trail – item details live in the job result; the audit row
+    keeps the totals plus a checksum that binds it to those items.
+    entity_id is the stored invoice's id; ad-hoc invoices (single task)
+    have none and are found through payload.invoice_number.
+    """
+    item_results = result["items"]
+    payload = {k: v for k, v in result.items() if k != "items"}
+    payload["items_count"] = len(item_results)
+    payload["items_checksum"] = sha256(
+        json.dumps(item_results, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return {
+        "action": f"validation_{result['status'].lower()}",
+        "entity_type": "invoice",
+        "entity_id": invoice_id,
+        "payload": payload,
+    }
+
+
+# ── Single invoice ───────────────────────────────────────────
+@celery.task(
+    name="task_a_validate_cbs_ibs", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=TenantFairTask, result_persisted=True,
+)
 def task_a_validate_cbs_ibs(
     self,
     tenant_id: str,
@@ -37,86 +164,228 @@ def task_a_validate_cbs_ibs(
     try:
         ref_date = date.fromisoformat(issue_date)
 
-        # Collect unique rule codes
-        all_codes = set()
-        for it in items:
-            all_codes.add(it.get("cbs_rule_code", "STD_CBS"))
-            all_codes.add(it.get("ibs_rule_code", "STD_IBS"))
-
         # Fetch rules once
-        rules = get_tax_rules(tenant_id, list(all_codes), ref_date)
-        rate_map: dict[tuple[str, str], Decimal] = {
-            (r["rule_code"], r["tax_type"]): Decimal(str(r["rate"]))
-            for r in rules
-        }
-
-        # Calculate per item
-        total_cbs = Decimal("0")
-        total_ibs = Decimal("0")
-        item_results: list[dict] = []
-
-        for it in items:
-            base = Decimal(str(it["base_amount"]))
-            cbs_code = it.get("cbs_rule_code", "STD_CBS")
-            ibs_code = it.get("ibs_rule_code", "STD_IBS")
-
-            cbs_rate = rate_map.get((cbs_code, "CBS"), Decimal("0"))
-            ibs_rate = rate_map.get((ibs_code, "IBS"), Decimal("0"))
-
-            cbs_amt = (base * cbs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
-            ibs_amt = (base * ibs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
-
-            total_cbs += cbs_amt
-            total_ibs += ibs_amt
-
-            item_results.append({
-                "sku": it.get("sku", ""),
-                "base_amount": str(base),
-                "cbs_rate": str(cbs_rate),
-                "cbs_amount": str(cbs_amt),
-                "ibs_rate": str(ibs_rate),
-                "ibs_amount": str(ibs_amt),
-            })
-
-        total_cbs = total_cbs.quantize(TWO_PLACES, ROUND_HALF_UP)
-        total_ibs = total_ibs.quantize(TWO_PLACES, ROUND_HALF_UP)
-        decl_cbs = Decimal(declared_cbs).quantize(TWO_PLACES, ROUND_HALF_UP)
-        decl_ibs = Decimal(declared_ibs).quantize(TWO_PLACES, ROUND_HALF_UP)
-
-        cbs_match = total_cbs == decl_cbs
-        ibs_match = total_ibs == decl_ibs
-        status = "PASS" if (cbs_match and ibs_match) else "FAIL"
-
-        result = {
-            "status": status,
-            "invoice_number": invoice_number,
-            "issue_date": issue_date,
-            "declared_cbs": str(decl_cbs),
-            "declared_ibs": str(decl_ibs),
-            "calculated_cbs": str(total_cbs),
-            "calculated_ibs": str(total_ibs),
-            "cbs_match": cbs_match,
-            "ibs_match": ibs_match,
-            "items": item_results,
-        }
-
-        # Audit trail
-        audit = insert_audit_log(
-            tenant_id=tenant_id,
-            action=f"validation_{status.lower()}",
-            entity_type="invoice",
-            entity_id=invoice_number,
-            payload=result,
+        rules = get_tax_rules(tenant_id, list(_rule_codes(items)), ref_date)
+
+        result = _validate_invoice(
+            invoice_number=invoice_number,
+            issue_date=issue_date,
+            declared_cbs=declared_cbs,
+            declared_ibs=declared_ibs,
+            items=items,
+            rate_map=_rate_map(rules, ref_date),
         )
+
+        audit = insert_audit_log(tenant_id=tenant_id, **_audit_entry(result))
         result["audit_id"] = audit["id"]
         result["audit_checksum"] = audit["checksum"]
 
         if task_id:
             job_status_update(job_id=task_id, status="SUCCESS", result=result)
 
-        logger.info("Task A [%s] invoice=%s status=%s", tenant_slug, invoice_number, status)
+        logger.info("Task A [%s] invoice=%s status=%s", tenant_slug, invoice_number, result["status"])
         return result
     except Exception as exc:
         if task_id:
             job_status_update(job_id=task_id, status="FAILED", error_message=str(exc))
         raise
+
+
+# ── Batch (chunked fan-out / fan-in) ─────────────────────────
+@celery.task(
+    name="task_a_validate_batch", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=JobBackedTask, result_persisted=True,
+)
+def task_a_validate_batch(
+    self,
+    tenant_id: str,
+    tenant_slug: str,
+    reference_period: Optional[str] = None,     # "YYYY-MM"
+    company_id: Optional[str] = None,
+    invoice_numbers: Optional[list[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    """
+    Validate every invoice of a period (optionally one company) and/or a
+    list of invoice numbers, stored in Postgres.
+
+    1. Resolve invoice ids and fetch the rules valid across their dates once
+    2. Fan out a chord of chunk tasks (invoice ids + shared rules)
+    3. Each chunk validates its invoices, writes their audit rows in one
+       transaction and bumps the parent job's counters
+    4. The chord callback marks the parent job SUCCESS with the totals
+
+    The parent job id is this task's id; one jobs row covers the batch.
+    """
+    job_id = str(self.request.id) if self.request and self.request.id else ""
+    if job_id:
+        job_status_update(job_id=job_id, status="RUNNING")
+
+    try:
+        period_start = period_end = None
+        if reference_period:
+            period_start = date.fromisoformat(f"{reference_period}-01")
+            period_end = (
+                date(period_start.year + 1, 1, 1) if period_start.month == 12
+                else date(period_start.year, period_start.month + 1, 1)
+            )
+        refs = list_invoice_refs(
+            tenant_id,
+            company_id=company_id,
+            period_start=period_start,
+            period_end=period_end,
+            invoice_numbers=invoice_numbers,
+        )
+        if not refs:
+            result = {"total": 0, "processed": 0, "passed": 0, "failed": 0, "errors": 0, "chunks": 0}
+            if job_id:
+                job_status_update(job_id=job_id, status="SUCCESS", result=result)
+            return result
+
+        # Invoices in the DB carry no per-item rule codes → standard rules
+        rules = get_tax_rules_window(
+            tenant_id,
+            ["STD_CBS", "STD_IBS"],
+            date.fromisoformat(refs[0]["issue_date"]),
+            date.fromisoformat(refs[-1]["issue_date"]),
+        )
+
+        ids = [r["id"] for r in refs]
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        if job_id:
+            job_status_update(
+                job_id=job_id,
+                status="RUNNING",
+                result={"total": len(ids), "chunks": len(chunks),
+                        "processed": 0, "passed": 0, "failed": 0, "errors": 0},
+            )
+
+        chord([
+            task_a_validate_chunk.s(
+                tenant_id=tenant_id, parent_job_id=job_id, invoice_ids=chunk, rules=rules,
+                chunk_index=i,
+            )
+            for i, chunk in enumerate(chunks)
+        ])(
+            task_a_validate_batch_finalize.s(
+                tenant_id=tenant_id, tenant_slug=tenant_slug, parent_job_id=job_id, total=len(ids),
+            ).on_error(task_a_validate_batch_failed.s(parent_job_id=job_id))
+        )
+
+        logger.info("Task A batch [%s] job=%s invoices=%d chunks=%d",
+                    tenant_slug, job_id, len(ids), len(chunks))
+        return {"job_id": job_id, "total": len(ids), "chunks": len(chunks)}
+    except Exception as exc:
+        if job_id:
+            job_status_update(job_id=job_id, status="FAILED", error_message=str(exc))
+        raise
+
+
+@celery.task(
+    name="task_a_validate_chunk", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=TenantFairTask,
+)
+def task_a_validate_chunk(
+    self,
+    tenant_id: str,
+    parent_job_id: str,
+    invoice_ids: list[str],
+    rules: list[dict],
+    chunk_index: int = 0,
+) -> dict:
+    """
+    Validate one chunk: one invoice load, and one transaction holding the
+    chunk's audit rows and its counter update.  The counters are keyed by
+    chunk_index, so a retried or redelivered chunk that already committed
+    rolls back instead of writing its audit rows and counts twice.  An
+    invoice that cannot be validated is counted as an error instead of
+    failing the chord.
+    """
+    invoices = load_invoices_with_items(tenant_id, invoice_ids)
+    rate_maps: dict[str, dict[tuple[str, str], Decimal]] = {}
+
+    results: list[dict] = []
+    entries: list[dict] = []
+    errors: list[dict] = []
+    for inv in invoices:
+        fields = {k: v for k, v in inv.items() if k != "id"}
+        try:
+            if inv["issue_date"] not in rate_maps:
+                rate_maps[inv["issue_date"]] = _rate_map(rules, date.fromisoformat(inv["issue_date"]))
+            result = _validate_invoice(**fields, rate_map=rate_maps[inv["issue_date"]])
+        except Exception as exc:
+            errors.append({"invoice_number": inv["invoice_number"], "error": str(exc)})
+            continue
+        results.append(result)
+        entries.append(_audit_entry(result, inv["id"]))
+
+    summary = {
+        "processed": len(results) + len(errors),
+        "passed": sum(1 for r in results if r["status"] == "PASS"),
+        "failed": sum(1 for r in results if r["status"] == "FAIL"),
+        "errors": len(errors),
+    }
+
+    db = SessionLocal()
+    try:
+        append_audit_entries(db, tenant_id, entries)
+        if parent_job_id and not job_increment_counters(
+            parent_job_id, summary, once_key=f"chunk-{chunk_index}", db=db,
+        ):
+            logger.info("Task A chunk %d of job %s already counted; skipping", chunk_index, parent_job_id)
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    return {
+        **summary,
+        "failures": [r["invoice_number"] for r in results if r["status"] == "FAIL"],
+        "error_details": errors,
+    }
+
+
+@celery.task(
+    name="task_a_validate_batch_finalize",
+    base=JobBackedTask, result_persisted=True,
+)
+def task_a_validate_batch_finalize(
+    chunk_results: list[dict],
+    tenant_id: str,
+    tenant_slug: str,
+    parent_job_id: str,
+    total: int,
+) -> dict:
+    """Chord callback: aggregate chunk summaries and close the parent job."""
+    result: dict = {"total": total, "chunks": len(chunk_results)}
+    for key in ("processed", "passed", "failed", "errors"):
+        result[key] = sum(int(c[key]) for c in chunk_results)
+    failures = [n for c in chunk_results for n in c["failures"]]
+    result["failures"] = failures[:MAX_LISTED_FAILURES]
+    result["failures_truncated"] = len(failures) > MAX_LISTED_FAILURES
+    result["error_details"] = [e for c in chunk_results for e in c["error_details"]][:MAX_LISTED_FAILURES]
+    result["status"] = "PASS" if result["failed"] == 0 and result["errors"] == 0 else "FAIL"
+
+    audit = insert_audit_log(
+        tenant_id=tenant_id,
+        action="batch_validation_completed",
+        entity_type="job",
+        entity_id=parent_job_id or None,
+        payload={k: result[k] for k in ("status", "total", "processed", "passed", "failed", "errors")},
+    )
+    result["audit_id"] = audit["id"]
+
+    if parent_job_id:
+        job_status_update(job_id=parent_job_id, status="SUCCESS", result=result)
+
+    logger.info("Task A batch [%s] job=%s passed=%d failed=%d errors=%d",
+                tenant_slug, parent_job_id, result["passed"], result["failed"], result["errors"])
+    return result
+
+
+@celery.task(name="task_a_validate_batch_failed")
+def task_a_validate_batch_failed(request, exc, traceback, parent_job_id: str) -> None:
+    """Chord errback: a chunk failed for good, so the batch job fails."""
+    if parent_job_id:
+        job_status_update(job_id=parent_job_id, status="FAILED", error_message=f"chunk failed: {exc}")
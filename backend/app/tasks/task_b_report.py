@@ -3,9 +3,18 @@
 import logging
 from datetime import date, datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Optional
 
 from app.celery_app import celery
-from app.tools.postgres_tool import get_tax_rules, insert_audit_log, persist_artifact_metadata
+from app.core.serialization import BATCH_TASK_SERIALIZER
+from app.services.tenant_scheduling import TenantFairTask
+from app.tools.job_progress_tool import ProgressReporter
+from app.tools.postgres_tool import (
+    get_tax_rules,
+    insert_audit_log,
+    job_status_update,
+    persist_artifact_metadata,
+)
 from app.tools.s3_tool import put_object, get_object_url
 
 logger = logging.getLogger(__name__)
@@ -13,33 +22,18 @@ logger = logging.getLogger(__name__)
 TWO_PLACES = Decimal("0.01")
 
 
-@celery.task(name="task_b_compliance_report", bind=True, max_retries=3)
-def task_b_compliance_report(
-    self,
-    tenant_id: str,
-    tenant_slug: str,
+# ── Report ───────────────────────────────────────────────────
+def _build_report(
     company_name: str,
     cnpj: str,
-    reference_period: str,          # "YYYY-MM"
-    invoices: list[dict],           # [{invoice_number, items: [{base, cbs, ibs}]}]
-) -> dict:
-    """
-    1. Iterate invoices and validate each against active rules
-    2. Build a Markdown compliance report
-    3. Upload to MinIO via S3Tool
-    4. Persist artifact metadata + audit_log
-    5. Return {report_url, checksum, summary}
-    """
-    ref_date = date.fromisoformat(f"{reference_period}-01")
-    now_str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-
-    # Fetch all active rules once
-    rules = get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref_date)
-    rate_map = {r["tax_type"]: Decimal(str(r["rate"])) for r in rules}
-    cbs_rate = rate_map.get("CBS", Decimal("0"))
-    ibs_rate = rate_map.get("IBS", Decimal("0"))
-
-    # ── Build report ──────────────────────────────────────────
+    reference_period: str,
+    now_str: str,
+    cbs_rate: Decimal,
+    ibs_rate: Decimal,
+    invoices: list[dict],
+    progress: Optional[ProgressReporter] = None,
+) -> tuple[str, dict[str, Any], list[dict]]:
+    """Render the Markdown report; returns (markdown, totals, per-invoice details)."""
     lines: list[str] = []
     lines.append("# Relatório de Conformidade Tributária")
     lines.append("")
@@ -99,6 +93,8 @@ def task_b_compliance_report(
             "ibs_calculated": str(inv_ibs_calc),
             "status": "PASS" if (cbs_ok and ibs_ok) else "FAIL",
         })
+        if progress is not None:
+            progress.update(advance=1)
 
     lines.append("")
     lines.append("## Totais")
@@ -109,51 +105,104 @@ def task_b_compliance_report(
     lines.append(f"- **Resultado geral:** {'✅ CONFORME' if all_pass else '❌ NÃO CONFORME'}")
     lines.append("")
 
-    report_md = "\n".join(lines)
-    report_bytes = report_md.encode("utf-8")
-
-    # ── Upload to MinIO ──────────────────────────────────────
-    s3_key = f"reports/{tenant_slug}/{reference_period}/compliance_{now_str}.md"
-    upload = put_object(
-        key=s3_key,
-        data=report_bytes,
-        content_type="text/markdown; charset=utf-8",
-        metadata={"tenant": tenant_slug, "period": reference_period},
-    )
-
-    report_url = get_object_url(s3_key, expires_in=86400)
-
-    # ── Artifact metadata + audit ────────────────────────────
-    persist_artifact_metadata(
-        tenant_id=tenant_id,
-        entity_type="compliance_report",
-        entity_id=f"{tenant_slug}/{reference_period}",
-        artifact_type="markdown_report",
-        storage_key=s3_key,
-        checksum=upload["checksum_sha256"],
-        metadata={"invoices_checked": len(invoices), "overall": "CONFORME" if all_pass else "NAO_CONFORME"},
-    )
-
-    audit = insert_audit_log(
-        tenant_id=tenant_id,
-        action="compliance_report_generated",
-        entity_type="compliance_report",
-        entity_id=f"{tenant_slug}/{reference_period}",
-        payload={"s3_key": s3_key, "overall": "CONFORME" if all_pass else "NAO_CONFORME"},
-    )
-
-    result = {
-        "status": "CONFORME" if all_pass else "NAO_CONFORME",
-        "report_url": report_url,
-        "s3_key": s3_key,
-        "checksum": upload["checksum_sha256"],
-        "invoices_checked": len(invoices),
-        "total_base": str(total_base),
-        "total_cbs": str(total_cbs),
-        "total_ibs": str(total_ibs),
-        "audit_id": audit["id"],
-        "details": invoice_details,
-    }
-
-    logger.info("Task B [%s] report=%s status=%s", tenant_slug, s3_key, result["status"])
-    return result
+    totals = {"base": total_base, "cbs": total_cbs, "ibs": total_ibs, "all_pass": all_pass}
+    return "\n".join(lines), totals, invoice_details
+
+
+@celery.task(
+    name="task_b_compliance_report", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=TenantFairTask, result_persisted=True,
+)
+def task_b_compliance_report(
+    self,
+    tenant_id: str,
+    tenant_slug: str,
+    company_name: str,
+    cnpj: str,
+    reference_period: str,          # "YYYY-MM"
+    invoices: list[dict],           # [{invoice_number, items: [{base, cbs, ibs}]}]
+) -> dict:
+    """
+    1. Iterate invoices and validate each against active rules
+    2. Build a Markdown compliance report
+    3. Upload to MinIO via S3Tool
+    4. Persist artifact metadata + audit_log
+    5. Return {report_url, checksum, summary}
+    """
+    job_id = str(self.request.id) if self.request and self.request.id else ""
+    progress = ProgressReporter(job_id, total=len(invoices), phase="validating")
+    if job_id:
+        job_status_update(job_id=job_id, status="RUNNING")
+
+    try:
+        ref_date = date.fromisoformat(f"{reference_period}-01")
+        now_str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+        # Fetch all active rules once
+        rules = get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref_date)
+        rate_map = {r["tax_type"]: Decimal(str(r["rate"])) for r in rules}
+        cbs_rate = rate_map.get("CBS", Decimal("0"))
+        ibs_rate = rate_map.get("IBS", Decimal("0"))
+
+        report_md, totals, invoice_details = _build_report(
+            company_name, cnpj, reference_period, now_str, cbs_rate, ibs_rate, invoices, progress,
+        )
+        all_pass = totals["all_pass"]
+        report_bytes = report_md.encode("utf-8")
+
+        # ── Upload to MinIO ──────────────────────────────────────
+        progress.update(phase="uploading")
+        s3_key = f"reports/{tenant_slug}/{reference_period}/compliance_{now_str}.md"
+        upload = put_object(
+            key=s3_key,
+            data=report_bytes,
+            content_type="text/markdown; charset=utf-8",
+            metadata={"tenant": tenant_slug, "period": reference_period},
+        )
+
+        report_url = get_object_url(s3_key, expires_in=86400)
+
+        # ── Artifact metadata + audit ────────────────────────────
+        progress.update(phase="auditing")
+        persist_artifact_metadata(
+            tenant_id=tenant_id,
+            entity_type="compliance_report",
+            entity_id=f"{tenant_slug}/{reference_period}",
+            artifact_type="markdown_report",
+            storage_key=s3_key,
+            checksum=upload["checksum_sha256"],
+            metadata={"invoices_checked": len(invoices), "overall": "CONFORME" if all_pass else "NAO_CONFORME"},
+        )
+
+        audit = insert_audit_log(
+            tenant_id=tenant_id,
+            action="compliance_report_generated",
+            entity_type="compliance_report",
+            entity_id=f"{tenant_slug}/{reference_period}",
+            payload={"s3_key": s3_key, "overall": "CONFORME" if all_pass else "NAO_CONFORME"},
+        )
+
+        result = {
+            "status": "CONFORME" if all_pass else "NAO_CONFORME",
+            "report_url": report_url,
+            "s3_key": s3_key,
+            "checksum": upload["checksum_sha256"],
+            "invoices_checked": len(invoices),
+            "total_base": str(totals["base"]),
+            "total_cbs": str(totals["cbs"]),
+            "total_ibs": str(totals["ibs"]),
+            "audit_id": audit["id"],
+            "details": invoice_details,
+        }
+
+        progress.finish()
+        if job_id:
+            job_status_update(job_id=job_id, status="SUCCESS", result=result)
+
+        logger.info("Task B [%s] report=%s status=%s", tenant_slug, s3_key, result["status"])
+        return result
+    except Exception as exc:
+        progress.finish("failed")
+        if job_id:
+            job_status_update(job_id=job_id, status="FAILED", error_message=str(exc))
+        raise
@@ -4,79 +4,77 @@ import json
 import logging
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Optional
 
 from app.celery_app import celery
-from app.tools.postgres_tool import get_tax_rules, insert_audit_log
+from app.core.serialization import BATCH_TASK_SERIALIZER
+from app.services.tenant_scheduling import TenantFairTask
+from app.config import settings
+from app.tools.postgres_tool import aggregate_invoice_bases, get_tax_rules, insert_audit_log
+from app.tools.simulation_cache_tool import (
+    ensure_simulations_table,
+    evict_expired_simulations,
+    get_cached_simulation,
+    simulation_fingerprint,
+)
 
 logger = logging.getLogger(__name__)
 
 TWO_PLACES = Decimal("0.01")
 
 
-# ── Simulation table bootstrap ───────────────────────────────
-_SIMULATIONS_DDL = """
-CREATE TABLE IF NOT EXISTS simulations (
-    id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    tenant_id     UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
-    name          VARCHAR(200)  NOT NULL,
-    base_scenario JSONB         NOT NULL DEFAULT '{}',
-    scenarios     JSONB         NOT NULL DEFAULT '[]',
-    result        JSONB,
-    created_at    TIMESTAMPTZ   NOT NULL DEFAULT now()
-);
-CREATE INDEX IF NOT EXISTS idx_simulations_tenant ON simulations(tenant_id);
-"""
+# ── Scenario engine ──────────────────────────────────────────
+def _pct(part: Decimal, whole: Decimal) -> str:
+    return str((part / whole * 100).quantize(TWO_PLACES)) + "%" if whole else "N/A"
 
 
-def _ensure_table():
-    from sqlalchemy import text
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        db.execute(text(_SIMULATIONS_DDL))
-        db.commit()
-    finally:
-        db.close()
+def _group_rates(
+    group: dict,
+    std_cbs: Decimal,
+    std_ibs: Decimal,
+) -> tuple[Decimal, Decimal]:
+    """Rates for one base group: exempt → 0, NCM-specific rate, else standard."""
+    if group.get("is_exempt"):
+        return Decimal("0"), Decimal("0")
+    ncm_cbs = group.get("ncm_cbs_rate")
+    ncm_ibs = group.get("ncm_ibs_rate")
+    return (
+        Decimal(str(ncm_cbs)) if ncm_cbs is not None else std_cbs,
+        Decimal(str(ncm_ibs)) if ncm_ibs is not None else std_ibs,
+    )
 
 
-@celery.task(name="task_c_whatif_simulation", bind=True, max_retries=3)
-def task_c_whatif_simulation(
-    self,
-    tenant_id: str,
-    tenant_slug: str,
-    simulation_name: str,
-    base_amount: str,
-    scenarios: list[dict],
-    ref_date: str | None = None,
-) -> dict:
-    """
-    Run multiple what-if scenarios against a base amount.
+def _evaluate(
+    groups: list[dict],
+    std_cbs: Decimal,
+    std_ibs: Decimal,
+) -> tuple[Decimal, Decimal, Decimal]:
+    """Return (total_base, cbs_amount, ibs_amount) over all base groups."""
+    total_base = Decimal("0")
+    cbs_amt = Decimal("0")
+    ibs_amt = Decimal("0")
+    for g in groups:
+        base = Decimal(str(g["base"]))
+        cbs_rate, ibs_rate = _group_rates(g, std_cbs, std_ibs)
+        total_base += base
+        cbs_amt += (base * cbs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
+        ibs_amt += (base * ibs_rate).quantize(TWO_PLACES, ROUND_HALF_UP)
+    return total_base, cbs_amt, ibs_amt
 
-    Each scenario: {
-        "name": "CBS + 2pp",
-        "cbs_rate_override": "0.1125",   # optional – if omitted uses DB rate
-        "ibs_rate_override": "0.1200",   # optional
-    }
 
-    1. Fetch current CBS/IBS rates from Postgres
-    2. For each scenario, apply override rates and calculate
-    3. Persist the simulation result in a `simulations` table
-    4. Audit-log the run
+def _run_scenarios(
+    groups: list[dict],
+    current_cbs: Decimal,
+    current_ibs: Decimal,
+    scenarios: list[dict],
+) -> tuple[dict, list[dict]]:
     """
-    _ensure_table()
-
-    ref = date.fromisoformat(ref_date) if ref_date else date.today()
-    base = Decimal(base_amount)
-
-    # Current rates
-    rules = get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref)
-    current_rates = {r["tax_type"]: Decimal(str(r["rate"])) for r in rules}
-    current_cbs = current_rates.get("CBS", Decimal("0"))
-    current_ibs = current_rates.get("IBS", Decimal("0"))
+    Apply the current rates and every scenario to the base groups.
 
-    # Base scenario (current rules)
-    base_cbs_amt = (base * current_cbs).quantize(TWO_PLACES, ROUND_HALF_UP)
-    base_ibs_amt = (base * current_ibs).quantize(TWO_PLACES, ROUND_HALF_UP)
+    Scenario overrides replace the standard CBS/IBS rates; groups with an
+    NCM-specific rate or an exemption keep their own treatment.
+    """
+    base, base_cbs_amt, base_ibs_amt = _evaluate(groups, current_cbs, current_ibs)
     base_total_tax = base_cbs_amt + base_ibs_amt
 
     base_scenario = {
@@ -86,10 +84,9 @@ def task_c_whatif_simulation(
         "cbs_amount": str(base_cbs_amt),
         "ibs_amount": str(base_ibs_amt),
         "total_tax": str(base_total_tax),
-        "effective_rate": str((base_total_tax / base * 100).quantize(TWO_PLACES)) + "%",
+        "effective_rate": _pct(base_total_tax, base),
     }
 
-    # What-if scenarios
     scenario_results: list[dict] = []
     for sc in scenarios:
         cbs_override = sc.get("cbs_rate_override")
@@ -97,8 +94,7 @@ def task_c_whatif_simulation(
         sc_cbs = Decimal(str(cbs_override)) if cbs_override is not None else current_cbs
         sc_ibs = Decimal(str(ibs_override)) if ibs_override is not None else current_ibs
 
-        sc_cbs_amt = (base * sc_cbs).quantize(TWO_PLACES, ROUND_HALF_UP)
-        sc_ibs_amt = (base * sc_ibs).quantize(TWO_PLACES, ROUND_HALF_UP)
+        _, sc_cbs_amt, sc_ibs_amt = _evaluate(groups, sc_cbs, sc_ibs)
         sc_total = sc_cbs_amt + sc_ibs_amt
         delta = sc_total - base_total_tax
 
@@ -109,31 +105,54 @@ def task_c_whatif_simulation(
             "cbs_amount": str(sc_cbs_amt),
             "ibs_amount": str(sc_ibs_amt),
             "total_tax": str(sc_total),
-            "effective_rate": str((sc_total / base * 100).quantize(TWO_PLACES)) + "%",
+            "effective_rate": _pct(sc_total, base),
             "delta_vs_current": str(delta),
-            "delta_pct": str(((delta / base_total_tax) * 100).quantize(TWO_PLACES)) + "%" if base_total_tax else "N/A",
+            "delta_pct": _pct(delta, base_total_tax),
         })
 
-    # Persist to simulations table
+    return base_scenario, scenario_results
+
+
+def _current_rates(rules: list[dict]) -> tuple[Decimal, Decimal]:
+    current_rates = {r["tax_type"]: Decimal(str(r["rate"])) for r in rules}
+    return current_rates.get("CBS", Decimal("0")), current_rates.get("IBS", Decimal("0"))
+
+
+def _persist_simulation(
+    *,
+    tenant_id: str,
+    simulation_name: str,
+    base_scenario: dict,
+    scenario_results: list[dict],
+    full_result: dict[str, Any],
+    fingerprint: str,
+    audit_payload: dict,
+) -> dict:
+    """Audit-log the run, store it in `simulations` and return the final result."""
     from sqlalchemy import text as sa_text
     from app.database import SessionLocal
     import uuid
 
     sim_id = str(uuid.uuid4())
-    full_result = {
-        "base_amount": base_amount,
-        "reference_date": ref.isoformat(),
-        "base_scenario": base_scenario,
-        "scenarios": scenario_results,
-    }
+
+    audit = insert_audit_log(
+        tenant_id=tenant_id,
+        action="whatif_simulation",
+        entity_type="simulation",
+        entity_id=sim_id,
+        payload=audit_payload,
+    )
+    full_result["audit_id"] = audit["id"]
 
     db = SessionLocal()
     try:
         db.execute(
             sa_text("""
-                INSERT INTO simulations (id, tenant_id, name, base_scenario, scenarios, result)
+                INSERT INTO simulations (id, tenant_id, name, base_scenario, scenarios, result,
+                                         fingerprint, expires_at)
                 VALUES (CAST(:id AS uuid), CAST(:tid AS uuid), :name,
-                        CAST(:base AS jsonb), CAST(:scenarios AS jsonb), CAST(:result AS jsonb))
+                        CAST(:base AS jsonb), CAST(:scenarios AS jsonb), CAST(:result AS jsonb),
+                        :fp, now() + make_interval(secs => :ttl))
             """),
             {
                 "id": sim_id,
@@ -142,23 +161,191 @@ def task_c_whatif_simulation(
                 "base": json.dumps(base_scenario, default=str),
                 "scenarios": json.dumps(scenario_results, default=str),
                 "result": json.dumps(full_result, default=str),
+                "fp": fingerprint,
+                "ttl": settings.SIMULATION_CACHE_TTL_SECONDS,
             },
         )
         db.commit()
     finally:
         db.close()
 
-    # Audit
-    audit = insert_audit_log(
+    full_result["simulation_id"] = sim_id
+    full_result["cache_hit"] = False
+    return full_result
+
+
+@celery.task(
+    name="task_c_whatif_simulation", bind=True, max_retries=3,
+    base=TenantFairTask, result_persisted=True,
+)
+def task_c_whatif_simulation(
+    self,
+    tenant_id: str,
+    tenant_slug: str,
+    simulation_name: str,
+    base_amount: str,
+    scenarios: list[dict],
+    ref_date: str | None = None,
+) -> dict:
+    """
+    Run multiple what-if scenarios against a base amount.
+
+    Each scenario: {
+        "name": "CBS + 2pp",
+        "cbs_rate_override": "0.1125",   # optional – if omitted uses DB rate
+        "ibs_rate_override": "0.1200",   # optional
+    }
+
+    1. Fetch current CBS/IBS rates from Postgres
+    2. Return the stored result if an identical run is cached
+    3. For each scenario, apply override rates and calculate
+    4. Persist the simulation result in a `simulations` table
+    5. Audit-log the run
+    """
+    ensure_simulations_table()
+
+    ref = date.fromisoformat(ref_date) if ref_date else date.today()
+    base = Decimal(base_amount)
+
+    # Current rates
+    rules = get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref)
+
+    # Content-addressed cache
+    fingerprint = simulation_fingerprint(
+        base_inputs={"base_amount": format(base.normalize(), "f")},
+        scenarios=scenarios,
+        rules=rules,
+        ref_date=ref,
+    )
+    cached = get_cached_simulation(tenant_id, fingerprint)
+    if cached is not None:
+        logger.info("Task C [%s] cache hit simulation=%s", tenant_slug, cached["simulation_id"])
+        return cached
+
+    current_cbs, current_ibs = _current_rates(rules)
+    base_scenario, scenario_results = _run_scenarios(
+        [{"base": base}], current_cbs, current_ibs, scenarios,
+    )
+
+    full_result = _persist_simulation(
         tenant_id=tenant_id,
-        action="whatif_simulation",
-        entity_type="simulation",
-        entity_id=sim_id,
-        payload={"name": simulation_name, "scenarios_count": len(scenarios)},
+        simulation_name=simulation_name,
+        base_scenario=base_scenario,
+        scenario_results=scenario_results,
+        full_result={
+            "base_amount": base_amount,
+            "reference_date": ref.isoformat(),
+            "base_scenario": base_scenario,
+            "scenarios": scenario_results,
+        },
+        fingerprint=fingerprint,
+        audit_payload={"name": simulation_name, "scenarios_count": len(scenarios)},
     )
 
-    full_result["simulation_id"] = sim_id
-    full_result["audit_id"] = audit["id"]
+    logger.info(
+        "Task C [%s] simulation=%s scenarios=%d",
+        tenant_slug, full_result["simulation_id"], len(scenarios),
+    )
+    return full_result
+
+
+@celery.task(
+    name="task_c_portfolio_simulation", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=TenantFairTask, result_persisted=True,
+)
+def task_c_portfolio_simulation(
+    self,
+    tenant_id: str,
+    tenant_slug: str,
+    simulation_name: str,
+    company_id: str,
+    reference_period: str,          # "YYYY-MM"
+    scenarios: list[dict],
+    ref_date: Optional[str] = None,
+) -> dict:
+    """
+    Run what-if scenarios over a company's stored invoices for a period.
+
+    Invoice item bases are summed per NCM inside Postgres, so the task only
+    receives one row per distinct NCM/rate treatment, never the items.
+    Taxes are rounded per group rather than per item.
+
+    1. Aggregate invoice_items bases by NCM (GROUP BY in Postgres)
+    2. Fetch current CBS/IBS rates and check the simulation cache
+    3. Apply the current rates and every scenario to the aggregates
+    4. Persist the simulation result + audit-log the run
+    """
+    ensure_simulations_table()
 
-    logger.info("Task C [%s] simulation=%s scenarios=%d", tenant_slug, sim_id, len(scenarios))
+    period_start = date.fromisoformat(f"{reference_period}-01")
+    period_end = (
+        date(period_start.year + 1, 1, 1) if period_start.month == 12
+        else date(period_start.year, period_start.month + 1, 1)
+    )
+    ref = date.fromisoformat(ref_date) if ref_date else period_start
+
+    groups = aggregate_invoice_bases(tenant_id, company_id, period_start, period_end)
+    rules = get_tax_rules(tenant_id, ["STD_CBS", "STD_IBS"], ref)
+
+    fingerprint = simulation_fingerprint(
+        base_inputs={
+            "mode": "portfolio",
+            "company_id": company_id,
+            "reference_period": reference_period,
+            "groups": groups,
+        },
+        scenarios=scenarios,
+        rules=rules,
+        ref_date=ref,
+    )
+    cached = get_cached_simulation(tenant_id, fingerprint)
+    if cached is not None:
+        logger.info("Task C [%s] cache hit simulation=%s", tenant_slug, cached["simulation_id"])
+        return cached
+
+    current_cbs, current_ibs = _current_rates(rules)
+    base_scenario, scenario_results = _run_scenarios(groups, current_cbs, current_ibs, scenarios)
+
+    total_base = sum((Decimal(str(g["base"])) for g in groups), Decimal("0"))
+    items_count = sum(int(g["items_count"]) for g in groups)
+
+    full_result = _persist_simulation(
+        tenant_id=tenant_id,
+        simulation_name=simulation_name,
+        base_scenario=base_scenario,
+        scenario_results=scenario_results,
+        full_result={
+            "mode": "portfolio",
+            "company_id": company_id,
+            "reference_period": reference_period,
+            "reference_date": ref.isoformat(),
+            "base_amount": str(total_base),
+            "items_count": items_count,
+            "groups": groups,
+            "base_scenario": base_scenario,
+            "scenarios": scenario_results,
+        },
+        fingerprint=fingerprint,
+        audit_payload={
+            "name": simulation_name,
+            "mode": "portfolio",
+            "company_id": company_id,
+            "reference_period": reference_period,
+            "groups_count": len(groups),
+            "scenarios_count": len(scenarios),
+        },
+    )
+
+    logger.info(
+        "Task C [%s] portfolio simulation=%s period=%s groups=%d items=%d",
+        tenant_slug, full_result["simulation_id"], reference_period, len(groups), items_count,
+    )
     return full_result
+
+
+@celery.task(name="task_c_evict_simulation_cache")
+def task_c_evict_simulation_cache() -> dict:
+    """Periodic eviction of expired simulation cache entries (Celery beat)."""
+    evicted = evict_expired_simulations()
+    logger.info("Task C cache eviction: %d entries", evicted)
+    return {"evicted": evicted}
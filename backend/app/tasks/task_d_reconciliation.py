@@ -1,15 +1,20 @@
 """Task D – Reconciliation: compare CSV receivables against invoices → exceptions."""
 
+import base64
 import csv
 import io
 import json
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Optional
 from uuid import uuid4
 
 from app.celery_app import celery
-from app.tools.postgres_tool import insert_audit_log
+from app.core.serialization import BATCH_TASK_SERIALIZER
+from app.services.tenant_scheduling import TenantFairTask
+from app.tools.job_progress_tool import ProgressReporter
+from app.tools.postgres_tool import insert_audit_log, job_status_update
 from app.tools.s3_tool import put_object
 
 logger = logging.getLogger(__name__)
@@ -45,41 +50,10 @@ def _ensure_table():
         db.close()
 
 
-@celery.task(name="task_d_reconciliation", bind=True, max_retries=3)
-def task_d_reconciliation(
-    self,
-    tenant_id: str,
-    tenant_slug: str,
-    csv_receivables_b64: str,
-    invoices: list[dict],
-    tolerance: str = "0.01",
-) -> dict:
-    """
-    Reconcile CSV receivables (from ERP/bank) against known invoices.
-
-    CSV columns: invoice_number;expected_amount;received_amount;received_date
-    invoices: [{invoice_number, total_amount}] — from internal data
-
-    1. Parse CSV receivables
-    2. Match by invoice_number
-    3. Flag exceptions:
-        - MISSING_RECEIVABLE (invoice has no receivable)
-        - MISSING_INVOICE (receivable has no invoice)
-        - AMOUNT_MISMATCH (|expected - received| > tolerance)
-        - UNDERPAYMENT / OVERPAYMENT
-    4. Persist run + upload exception report to MinIO
-    5. Audit-log
-    """
-    import base64
-
-    _ensure_table()
-    tol = Decimal(tolerance)
-    now_str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-
-    # Parse CSV
-    csv_bytes = base64.b64decode(csv_receivables_b64)
-    text_io = io.StringIO(csv_bytes.decode("utf-8"))
-    reader = csv.DictReader(text_io, delimiter=";")
+# ── Matching ─────────────────────────────────────────────────
+def _parse_receivables(csv_bytes: bytes) -> dict[str, dict]:
+    """CSV (invoice_number;expected_amount;received_amount;received_date) → by invoice."""
+    reader = csv.DictReader(io.StringIO(csv_bytes.decode("utf-8")), delimiter=";")
     receivables: dict[str, dict] = {}
     for row in reader:
         inv_num = row.get("invoice_number", "").strip()
@@ -89,19 +63,25 @@ def task_d_reconciliation(
                 "received_amount": Decimal(row.get("received_amount", "0") or "0"),
                 "received_date": row.get("received_date", ""),
             }
+    return receivables
 
-    # Build invoice lookup
-    invoice_map: dict[str, Decimal] = {
-        inv["invoice_number"]: Decimal(str(inv.get("total_amount", "0")))
-        for inv in invoices
-    }
 
-    # Reconcile
+def _reconcile(
+    receivables: dict[str, dict],
+    invoice_map: dict[str, Decimal],
+    tol: Decimal,
+    progress: Optional[ProgressReporter] = None,
+) -> tuple[int, int, list[dict]]:
+    """Match receivables to invoices; returns (total_records, matched, exceptions)."""
     all_keys = set(list(receivables.keys()) + list(invoice_map.keys()))
     matched = 0
     exceptions: list[dict] = []
 
+    if progress is not None:
+        progress.update(total=len(all_keys))
     for inv_num in sorted(all_keys):
+        if progress is not None:
+            progress.update(advance=1)
         has_recv = inv_num in receivables
         has_inv = inv_num in invoice_map
 
@@ -150,63 +130,123 @@ def task_d_reconciliation(
                 "diff": str(diff),
             })
 
-    # Persist run
-    from sqlalchemy import text as sa_text
-    from app.database import SessionLocal
+    return len(all_keys), matched, exceptions
 
-    run_id = str(uuid4())
-    details = {
-        "matched": matched,
-        "exceptions": exceptions,
-        "tolerance": tolerance,
-    }
 
-    db = SessionLocal()
+@celery.task(
+    name="task_d_reconciliation", bind=True, max_retries=3,
+    serializer=BATCH_TASK_SERIALIZER, base=TenantFairTask, result_persisted=True,
+)
+def task_d_reconciliation(
+    self,
+    tenant_id: str,
+    tenant_slug: str,
+    csv_receivables_b64: str,
+    invoices: list[dict],
+    tolerance: str = "0.01",
+) -> dict:
+    """
+    Reconcile CSV receivables (from ERP/bank) against known invoices.
+
+    CSV columns: invoice_number;expected_amount;received_amount;received_date
+    invoices: [{invoice_number, total_amount}] — from internal data
+
+    1. Parse CSV receivables
+    2. Match by invoice_number
+    3. Flag exceptions:
+        - MISSING_RECEIVABLE (invoice has no receivable)
+        - MISSING_INVOICE (receivable has no invoice)
+        - AMOUNT_MISMATCH (|expected - received| > tolerance)
+        - UNDERPAYMENT / OVERPAYMENT
+    4. Persist run + upload exception report to MinIO
+    5. Audit-log
+    """
+    job_id = str(self.request.id) if self.request and self.request.id else ""
+    progress = ProgressReporter(job_id, total=None, phase="parsing")
+    if job_id:
+        job_status_update(job_id=job_id, status="RUNNING")
+
     try:
-        db.execute(
-            sa_text("""
-                INSERT INTO reconciliation_runs
-                    (id, tenant_id, total_records, matched, exceptions, details)
-                VALUES (CAST(:id AS uuid), CAST(:tid AS uuid), :total, :matched, :exc_count,
-                        CAST(:details AS jsonb))
-            """),
-            {
-                "id": run_id,
-                "tid": tenant_id,
-                "total": len(all_keys),
-                "matched": matched,
-                "exc_count": len(exceptions),
-                "details": json.dumps(details, default=str),
-            },
+        _ensure_table()
+        tol = Decimal(tolerance)
+        now_str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+        receivables = _parse_receivables(base64.b64decode(csv_receivables_b64))
+        invoice_map: dict[str, Decimal] = {
+            inv["invoice_number"]: Decimal(str(inv.get("total_amount", "0")))
+            for inv in invoices
+        }
+        progress.update(0, phase="reconciling")
+        total_records, matched, exceptions = _reconcile(receivables, invoice_map, tol, progress)
+
+        # Persist run
+        progress.update(phase="persisting")
+        from sqlalchemy import text as sa_text
+        from app.database import SessionLocal
+
+        run_id = str(uuid4())
+        details = {
+            "matched": matched,
+            "exceptions": exceptions,
+            "tolerance": tolerance,
+        }
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                sa_text("""
+                    INSERT INTO reconciliation_runs
+                        (id, tenant_id, total_records, matched, exceptions, details)
+                    VALUES (CAST(:id AS uuid), CAST(:tid AS uuid), :total, :matched, :exc_count,
+                            CAST(:details AS jsonb))
+                """),
+                {
+                    "id": run_id,
+                    "tid": tenant_id,
+                    "total": total_records,
+                    "matched": matched,
+                    "exc_count": len(exceptions),
+                    "details": json.dumps(details, default=str),
+                },
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        # Upload exception report to MinIO
+        progress.update(phase="uploading")
+        report_json = json.dumps({"run_id": run_id, **details}, indent=2, default=str).encode()
+        s3_key = f"reconciliation/{tenant_slug}/{now_str}_exceptions.json"
+        upload = put_object(key=s3_key, data=report_json, content_type="application/json")
+
+        # Audit
+        audit = insert_audit_log(
+            tenant_id=tenant_id,
+            action="reconciliation_completed",
+            entity_type="reconciliation_run",
+            entity_id=run_id,
+            payload={"matched": matched, "exceptions": len(exceptions), "s3_key": s3_key},
         )
-        db.commit()
-    finally:
-        db.close()
 
-    # Upload exception report to MinIO
-    report_json = json.dumps({"run_id": run_id, **details}, indent=2, default=str).encode()
-    s3_key = f"reconciliation/{tenant_slug}/{now_str}_exceptions.json"
-    upload = put_object(key=s3_key, data=report_json, content_type="application/json")
-
-    # Audit
-    audit = insert_audit_log(
-        tenant_id=tenant_id,
-        action="reconciliation_completed",
-        entity_type="reconciliation_run",
-        entity_id=run_id,
-        payload={"matched": matched, "exceptions": len(exceptions), "s3_key": s3_key},
-    )
-
-    result = {
-        "run_id": run_id,
-        "total_records": len(all_keys),
-        "matched": matched,
-        "exceptions_count": len(exceptions),
-        "exceptions": exceptions,
-        "report_s3_key": s3_key,
-        "report_checksum": upload["checksum_sha256"],
-        "audit_id": audit["id"],
-    }
-
-    logger.info("Task D [%s] run=%s matched=%d exceptions=%d", tenant_slug, run_id, matched, len(exceptions))
-    return result
+        result = {
+            "run_id": run_id,
+            "total_records": total_records,
+            "matched": matched,
+            "exceptions_count": len(exceptions),
+            "exceptions": exceptions,
+            "report_s3_key": s3_key,
+            "report_checksum": upload["checksum_sha256"],
+            "audit_id": audit["id"],
+        }
+
+        progress.finish()
+        if job_id:
+            job_status_update(job_id=job_id, status="SUCCESS", result=result)
+
+        logger.info("Task D [%s] run=%s matched=%d exceptions=%d", tenant_slug, run_id, matched, len(exceptions))
+        return result
+    except Exception as exc:
+        progress.finish("failed")
+        if job_id:
+            job_status_update(job_id=job_id, status="FAILED", error_message=str(exc))
+        raise
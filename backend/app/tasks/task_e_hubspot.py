@@ -5,6 +5,7 @@ from datetime import date
 from decimal import Decimal
 
 from app.celery_app import celery
+from app.services.tenant_scheduling import TenantFairTask
 from app.config import settings
 from app.tools.postgres_tool import get_tax_rules, insert_audit_log
 from app.tools.hubspot_tool import upsert_company, upsert_deal, log_note
@@ -37,7 +38,7 @@ def _compute_readiness_score(
     return max(0, min(100, score))
 
 
-@celery.task(name="task_e_hubspot_sync", bind=True, max_retries=3)
+@celery.task(name="task_e_hubspot_sync", bind=True, max_retries=3, base=TenantFairTask)
 def task_e_hubspot_sync(
     self,
     tenant_id: str,
@@ -0,0 +1,87 @@
+"""Maintenance – periodic housekeeping run by Celery beat."""
+
+import logging
+
+from app.celery_app import celery
+from app.config import settings
+from app.redis_client import get_redis
+from app.tools.audit_chain_tool import list_chained_tenants, verify_tenant_chain
+from app.tools.postgres_tool import count_audit_log_default, ensure_audit_log_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name="maintain_audit_log_partitions")
+def maintain_audit_log_partitions(months_ahead: int = 3) -> dict:
+    """
+    Keep monthly audit_log partitions created ahead of time, and report
+    rows still in audit_log_default: they belong to months outside the
+    maintained window and need a partition created by hand.
+    """
+    partitions = ensure_audit_log_partitions(months_ahead)
+    logger.info("Maintenance: audit_log partitions ready up to %s", partitions[-1])
+    stray = count_audit_log_default()
+    if stray:
+        logger.error("Maintenance: audit_log_default holds %d rows outside any monthly partition", stray)
+    return {"partitions": partitions, "default_rows": stray}
+
+
+@celery.task(name="verify_audit_chain")
+def verify_audit_chain(tenant_id: str | None = None) -> dict:
+    """
+    Verify audit hash chains incrementally (since each tenant's last
+    checkpoint).  Without `tenant_id`, every tenant with a chain is checked.
+    """
+    tenants = [tenant_id] if tenant_id else list_chained_tenants()
+    results = {tid: verify_tenant_chain(tid) for tid in tenants}
+    broken = {tid: r["broken"] for tid, r in results.items() if r["broken"]}
+    logger.info(
+        "Maintenance: audit chains verified tenants=%d rows=%d broken=%d",
+        len(results), sum(r["verified"] for r in results.values()), len(broken),
+    )
+    return {"tenants": results, "broken": broken}
+
+
+_RESULT_KEY_PATTERNS = ("celery-task-meta-*", "celery-taskset-meta-*")
+
+
+@celery.task(name="prune_celery_results")
+def prune_celery_results(batch_size: int = 500) -> dict:
+    """
+    Give every Celery result key in Redis a TTL.  Keys written before
+    result_expires was configured, or by clients with expiry disabled,
+    never expire on their own and pile up until maxmemory.
+    """
+    r = get_redis()
+    if r is None:
+        return {"scanned": 0, "expired": 0}
+
+    ttl = settings.CELERY_RESULT_EXPIRES_SECONDS
+    scanned = fixed = 0
+    for pattern in _RESULT_KEY_PATTERNS:
+        keys: list[str] = []
+        for key in r.scan_iter(match=pattern, count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                fixed += _expire_persistent(r, keys, ttl)
+                scanned += len(keys)
+                keys = []
+        if keys:
+            fixed += _expire_persistent(r, keys, ttl)
+            scanned += len(keys)
+
+    logger.info("Maintenance: celery results scanned=%d ttl_set=%d", scanned, fixed)
+    return {"scanned": scanned, "expired": fixed}
+
+
+def _expire_persistent(r, keys: list[str], ttl: int) -> int:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.ttl(key)
+    persistent = [k for k, t in zip(keys, pipe.execute()) if t == -1]
+    if persistent:
+        pipe = r.pipeline(transaction=False)
+        for key in persistent:
+            pipe.expire(key, ttl)
+        pipe.execute()
+    return len(persistent)
@@ -0,0 +1,309 @@
+"""AuditChainTool – per-tenant hash chain over audit_log with Merkle checkpoints."""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from hashlib import sha256
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+
+
+# ── 1. Hashing ────────────────────────────────────────────────
+def audit_checksum(payload: dict) -> str:
+    """
+    SHA-256 of the payload in canonical JSON (sorted keys).
+    The single serialisation used by every audit writer and the verifier.
+    """
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+def row_hash(
+    prev_hash: str,
+    chain_seq: int,
+    tenant_id: str,
+    action: str,
+    entity_type: Optional[str],
+    entity_id: Optional[str],
+    checksum: str,
+    *,
+    user_id: Optional[str],
+    created_at: datetime,
+) -> str:
+    """
+    Link hash: binds the previous link, the position and the row's content,
+    including who wrote it and when.  UUIDs are hashed in canonical form and
+    created_at as UTC ISO-8601 with microseconds, i.e. as Postgres returns
+    them, so any spelling the writer accepted verifies; non-UUID input or a
+    naive timestamp raises ValueError.
+    """
+    if created_at.tzinfo is None:
+        raise ValueError("created_at must be timezone-aware")
+    raw = "|".join([
+        prev_hash,
+        str(chain_seq),
+        str(UUID(str(tenant_id))),
+        str(UUID(str(user_id))) if user_id else "",
+        action,
+        entity_type or "",
+        str(UUID(str(entity_id))) if entity_id else "",
+        created_at.astimezone(timezone.utc).isoformat(timespec="microseconds"),
+        checksum,
+    ])
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+def merkle_root(hashes: list[str]) -> str:
+    """Binary Merkle root over hex digests (odd node is paired with itself)."""
+    if not hashes:
+        return GENESIS_HASH
+    level = list(hashes)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            sha256((level[i] + level[i + 1]).encode("utf-8")).hexdigest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0]
+
+
+# ── 2. Append ────────────────────────────────────────────────
+def append_audit_entries(db: Session, tenant_id: str, entries: list[dict]) -> list[dict]:
+    """
+    Insert audit rows for one tenant, extending its hash chain.
+
+    Each entry: {action, entity_type, entity_id?, user_id?, payload?}.
+    The tenant's chain head is locked (FOR UPDATE) until the caller commits,
+    so concurrent writers of the same tenant are serialised and the chain
+    stays gap-free.  created_at is set here (not by the column default)
+    because it is part of the row hash.  Does not commit.  Returns
+    [{id, checksum, chain_seq, row_hash, created_at}] in input order.
+    """
+    db.execute(
+        text("""
+            INSERT INTO audit_chain_heads (tenant_id, last_seq, last_hash)
+            VALUES (CAST(:tid AS uuid), 0, :genesis)
+            ON CONFLICT (tenant_id) DO NOTHING
+        """),
+        {"tid": tenant_id, "genesis": GENESIS_HASH},
+    )
+    head = db.execute(
+        text("""
+            SELECT last_seq, last_hash FROM audit_chain_heads
+            WHERE tenant_id = CAST(:tid AS uuid)
+            FOR UPDATE
+        """),
+        {"tid": tenant_id},
+    ).fetchone()
+
+    seq, prev = int(head.last_seq), head.last_hash
+    created_at = datetime.now(timezone.utc)
+    rows: list[dict[str, Any]] = []
+    written: list[dict] = []
+    for entry in entries:
+        payload = dict(entry.get("payload") or {})
+        payload.pop("_checksum", None)
+        checksum = audit_checksum(payload)
+        payload["_checksum"] = checksum
+
+        seq += 1
+        link = row_hash(
+            prev, seq, tenant_id,
+            entry["action"], entry.get("entity_type"), entry.get("entity_id"), checksum,
+            user_id=entry.get("user_id"), created_at=created_at,
+        )
+        audit_id = str(uuid4())
+        rows.append({
+            "id": audit_id,
+            "tid": tenant_id,
+            "uid": entry.get("user_id"),
+            "action": entry["action"],
+            "etype": entry.get("entity_type"),
+            "eid": entry.get("entity_id"),
+            "payload": json.dumps(payload, default=str),
+            "seq": seq,
+            "prev": prev,
+            "hash": link,
+            "created_at": created_at,
+        })
+        written.append({
+            "id": audit_id, "checksum": checksum, "chain_seq": seq, "row_hash": link,
+            "created_at": created_at,
+        })
+        prev = link
+
+    if rows:
+        db.execute(
+            text("""
+                INSERT INTO audit_log
+                    (id, tenant_id, user_id, action, entity_type, entity_id, payload,
+                     created_at, chain_seq, prev_hash, row_hash)
+                VALUES
+                    (CAST(:id AS uuid), CAST(:tid AS uuid),
+                     CAST(:uid AS uuid), :action, :etype, :eid,
+                     CAST(:payload AS jsonb), :created_at, :seq, :prev, :hash)
+            """),
+            rows,
+        )
+        db.execute(
+            text("""
+                UPDATE audit_chain_heads
+                SET last_seq = :seq, last_hash = :hash, updated_at = now()
+                WHERE tenant_id = CAST(:tid AS uuid)
+            """),
+            {"tid": tenant_id, "seq": seq, "hash": prev},
+        )
+    return written
+
+
+# ── 3. Verification ──────────────────────────────────────────
+def _verify_rows(tenant_id: str, anchor_hash: str, expected_seq: int, rows: list) -> Optional[dict]:
+    """
+    Check a contiguous run of chain rows starting at `expected_seq`.
+    Returns the first broken link or None.
+    """
+    prev = anchor_hash
+    for r in rows:
+        if r.chain_seq != expected_seq:
+            return {"chain_seq": expected_seq, "reason": "missing_row"}
+        payload = dict(r.payload) if isinstance(r.payload, dict) else {}
+        stored_checksum = payload.pop("_checksum", None)
+        if stored_checksum != audit_checksum(payload):
+            return {"chain_seq": r.chain_seq, "id": str(r.id), "reason": "payload_checksum"}
+        if r.prev_hash != prev:
+            return {"chain_seq": r.chain_seq, "id": str(r.id), "reason": "prev_hash"}
+        link = row_hash(
+            prev, r.chain_seq, tenant_id, r.action, r.entity_type, r.entity_id, stored_checksum,
+            user_id=r.user_id, created_at=r.created_at,
+        )
+        if r.row_hash != link:
+            return {"chain_seq": r.chain_seq, "id": str(r.id), "reason": "row_hash"}
+        prev = link
+        expected_seq += 1
+    return None
+
+
+def _verify_batch(tenant_id: str, seq_from: int, seq_to: int, anchor_hash: Optional[str]) -> dict:
+    """
+    Verify chain rows (seq_from, seq_to].  The row at seq_from is read too
+    and its stored row_hash is the anchor, unless `anchor_hash` is given
+    (the checkpoint head for the first batch).  Batches are independent,
+    and adjacent ones overlap on that row, so every link is checked once.
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT id, chain_seq, prev_hash, row_hash, user_id, action, entity_type,
+                       entity_id, created_at, payload
+                FROM audit_log
+                WHERE tenant_id = CAST(:tid AS uuid)
+                  AND chain_seq >= :lo AND chain_seq <= :hi
+                ORDER BY chain_seq
+            """),
+            {"tid": tenant_id, "lo": max(seq_from, 1), "hi": seq_to},
+        ).fetchall()
+    finally:
+        db.close()
+
+    if anchor_hash is None:
+        if not rows or rows[0].chain_seq != seq_from:
+            return {"broken": {"chain_seq": seq_from, "reason": "missing_row"}, "root": None}
+        anchor_hash, rows = rows[0].row_hash, rows[1:]
+    elif rows and rows[0].chain_seq == seq_from:
+        rows = rows[1:]
+
+    broken = _verify_rows(tenant_id, anchor_hash, seq_from + 1, rows)
+    if broken is None and len(rows) != seq_to - seq_from:
+        broken = {"chain_seq": seq_from + len(rows) + 1, "reason": "missing_row"}
+    return {"broken": broken, "root": merkle_root([r.row_hash for r in rows])}
+
+
+def verify_tenant_chain(tenant_id: str, batch_size: int = 5000, workers: int = 4) -> dict:
+    """
+    Re-hash the rows appended since the tenant's last checkpoint in
+    parallel batches.  If the whole range is intact a new checkpoint
+    (Merkle root of the batch roots + head hash) is recorded, so the next
+    run starts from there.  Returns {verified, seq_from, seq_to, broken}.
+    """
+    db = SessionLocal()
+    try:
+        checkpoint = db.execute(
+            text("""
+                SELECT seq_to, head_hash FROM audit_checkpoints
+                WHERE tenant_id = CAST(:tid AS uuid)
+                ORDER BY seq_to DESC
+                LIMIT 1
+            """),
+            {"tid": tenant_id},
+        ).fetchone()
+        head = db.execute(
+            text("SELECT last_seq, last_hash FROM audit_chain_heads WHERE tenant_id = CAST(:tid AS uuid)"),
+            {"tid": tenant_id},
+        ).fetchone()
+    finally:
+        db.close()
+
+    seq_from = int(checkpoint.seq_to) if checkpoint else 0
+    anchor = checkpoint.head_hash if checkpoint else GENESIS_HASH
+    seq_to = int(head.last_seq) if head else 0
+    if seq_to <= seq_from:
+        return {"verified": 0, "seq_from": seq_from, "seq_to": seq_to, "broken": None}
+
+    bounds = [
+        (lo, min(lo + batch_size, seq_to))
+        for lo in range(seq_from, seq_to, batch_size)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda b: _verify_batch(tenant_id, b[0], b[1], anchor if b[0] == seq_from else None),
+            bounds,
+        ))
+
+    broken = [r["broken"] for r in results if r["broken"]]
+    if broken:
+        first = min(broken, key=lambda b: b["chain_seq"])
+        logger.error("Audit chain broken for tenant %s at seq %s (%s)",
+                     tenant_id, first["chain_seq"], first["reason"])
+        return {"verified": 0, "seq_from": seq_from, "seq_to": seq_to, "broken": first}
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("""
+                INSERT INTO audit_checkpoints (tenant_id, seq_from, seq_to, merkle_root, head_hash)
+                VALUES (CAST(:tid AS uuid), :seq_from, :seq_to, :root, :head)
+            """),
+            {
+                "tid": tenant_id,
+                "seq_from": seq_from + 1,
+                "seq_to": seq_to,
+                "root": merkle_root([r["root"] for r in results]),
+                "head": head.last_hash,
+            },
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    return {"verified": seq_to - seq_from, "seq_from": seq_from, "seq_to": seq_to, "broken": None}
+
+
+def list_chained_tenants() -> list[str]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(text("SELECT tenant_id FROM audit_chain_heads WHERE last_seq > 0")).fetchall()
+        return [str(r.tenant_id) for r in rows]
+    finally:
+        db.close()
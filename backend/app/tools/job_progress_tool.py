@@ -0,0 +1,136 @@
+"""JobProgressTool – throttled progress reporting for long-running jobs."""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import redis
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_KEY = "job_progress:{}"
+_TTL_SECONDS = 86400
+
+
+# ── 1. Storage ───────────────────────────────────────────────
+def _persist(job_id: str, progress: dict) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("""
+                UPDATE jobs
+                SET progress = CAST(:progress AS jsonb), updated_at = now()
+                WHERE id = CAST(:id AS uuid)
+            """),
+            {"id": job_id, "progress": json.dumps(progress, default=str)},
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def get_live_progress(job_id: str) -> Optional[dict]:
+    """Latest progress published to Redis (fresher than jobs.progress), or None."""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(_KEY.format(job_id))
+    except redis.RedisError as e:
+        logger.error("Redis error reading job progress: %s", e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+# ── 2. Reporter ──────────────────────────────────────────────
+class ProgressReporter:
+    """
+    Coalesces progress updates from a task loop.
+
+    `update()` is cheap to call per item: the snapshot is published to
+    Redis at most once per JOB_PROGRESS_REDIS_INTERVAL_SECONDS and written
+    to jobs.progress at most once per JOB_PROGRESS_PERSIST_SECONDS.
+    `finish()` flushes the final state to both.  A reporter without a
+    job_id (direct, synchronous task calls) does nothing.
+    """
+
+    def __init__(self, job_id: Optional[str], total: Optional[int] = None, phase: str = "starting"):
+        self.job_id = job_id or ""
+        self.total = total
+        self.phase = phase
+        self.processed = 0
+        self._started = time.monotonic()
+        self._last_publish = 0.0
+        self._last_persist = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        progress: dict[str, Any] = {
+            "phase": self.phase,
+            "processed": self.processed,
+            "total": self.total,
+            "percent": None,
+            "eta": None,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.total:
+            progress["percent"] = round(min(self.processed / self.total, 1.0) * 100, 1)
+            elapsed = time.monotonic() - self._started
+            if self.processed and self.processed < self.total:
+                remaining = elapsed / self.processed * (self.total - self.processed)
+                progress["eta"] = (datetime.now(timezone.utc) + timedelta(seconds=remaining)).isoformat()
+        return progress
+
+    def update(
+        self,
+        processed: Optional[int] = None,
+        *,
+        advance: int = 0,
+        phase: Optional[str] = None,
+        total: Optional[int] = None,
+    ) -> None:
+        if processed is not None:
+            self.processed = processed
+        self.processed += advance
+        if total is not None:
+            self.total = total
+        phase_changed = phase is not None and phase != self.phase
+        if phase is not None:
+            self.phase = phase
+        self._flush(force=phase_changed)
+
+    def finish(self, phase: str = "done") -> None:
+        self.phase = phase
+        if self.total is not None and phase == "done":
+            self.processed = self.total
+        self._flush(force=True, persist=True)
+
+    def _flush(self, force: bool = False, persist: bool = False) -> None:
+        if not self.job_id:
+            return
+        now = time.monotonic()
+        publish_due = force or now - self._last_publish >= settings.JOB_PROGRESS_REDIS_INTERVAL_SECONDS
+        persist_due = persist or now - self._last_persist >= settings.JOB_PROGRESS_PERSIST_SECONDS
+        if not (publish_due or persist_due):
+            return
+
+        progress = self.snapshot()
+        r = get_redis()
+        if publish_due and r is not None:
+            try:
+                r.set(_KEY.format(self.job_id), json.dumps(progress), ex=_TTL_SECONDS)
+            except redis.RedisError as e:
+                logger.error("Redis error publishing job progress: %s", e)
+            self._last_publish = now
+        if persist_due:
+            try:
+                _persist(self.job_id, progress)
+            except Exception as e:   # progress must never fail the task
+                logger.warning("Could not persist progress for job %s: %s", self.job_id, e)
+            self._last_persist = now
@@ -0,0 +1,100 @@
+"""JobResultTool – keep large task results out of the jobs table."""
+
+import gzip
+import json
+import logging
+import zlib
+from hashlib import sha256
+from typing import Any, Iterator
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _summary(result: dict) -> dict[str, Any]:
+    """Top-level scalars of a result, with list/dict fields reduced to counts."""
+    summary: dict[str, Any] = {}
+    for key, value in result.items():
+        if isinstance(value, (list, dict)):
+            summary[f"{key}_count"] = len(value)
+        else:
+            summary[key] = value
+    return summary
+
+
+def is_offloaded(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("_offloaded") is True
+
+
+def result_key(tenant_id: str, job_id: str) -> str:
+    """Object key of an offloaded result; scoped by tenant so jobs cannot collide across tenants."""
+    return f"job-results/{tenant_id}/{job_id}.json.gz"
+
+
+# ── 1. Offload ───────────────────────────────────────────────
+def offload_if_large(job_id: str, tenant_id: str, result: dict) -> dict:
+    """
+    Return `result` unchanged when its JSON fits JOB_RESULT_INLINE_MAX_BYTES.
+    Otherwise store it gzip-compressed in S3/MinIO and return a pointer:
+    {_offloaded, storage_key, checksum_sha256, size_bytes, compressed_bytes, summary}.
+    The checksum covers the uncompressed JSON.  Callers must have checked
+    that the job belongs to `tenant_id` before calling.
+    """
+    raw = json.dumps(result, default=str).encode("utf-8")
+    if len(raw) <= settings.JOB_RESULT_INLINE_MAX_BYTES:
+        return result
+
+    from app.tools.s3_tool import put_object
+
+    key = result_key(tenant_id, job_id)
+    compressed = gzip.compress(raw, compresslevel=6)
+    put_object(
+        key=key,
+        data=compressed,
+        content_type="application/gzip",
+        metadata={"job_id": job_id, "tenant_id": tenant_id, "content": "application/json"},
+    )
+    return {
+        "_offloaded": True,
+        "storage_key": key,
+        "checksum_sha256": sha256(raw).hexdigest(),
+        "size_bytes": len(raw),
+        "compressed_bytes": len(compressed),
+        "summary": _summary(result),
+    }
+
+
+# ── 2. Stream back ───────────────────────────────────────────
+def stream_offloaded_result(pointer: dict) -> Iterator[bytes]:
+    """
+    Yield the decompressed JSON of an offloaded result chunk by chunk.
+    The body is hashed on the way out; if it does not match the pointer's
+    checksum the last chunk is withheld and ValueError is raised, so a
+    streaming client sees a truncated (invalid) body rather than a complete
+    wrong one.
+    """
+    from app.tools.s3_tool import get_object_stream
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    digest = sha256()
+    pending = b""
+    for chunk in get_object_stream(pointer["storage_key"]):
+        data = decoder.decompress(chunk)
+        if data:
+            if pending:
+                yield pending
+            digest.update(data)
+            pending = data
+    tail = decoder.flush()
+    if tail:
+        if pending:
+            yield pending
+        digest.update(tail)
+        pending = tail
+
+    if digest.hexdigest() != pointer.get("checksum_sha256"):
+        logger.error("Checksum mismatch for offloaded result %s", pointer["storage_key"])
+        raise ValueError(f"Checksum mismatch for {pointer['storage_key']}")
+    if pending:
+        yield pending
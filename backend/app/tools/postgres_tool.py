@@ -1,44 +1,21 @@
 """PostgresTool – reusable DB operations for agents and tasks."""
 
 import json
-from datetime import date
+from datetime import date, datetime, timezone
 from typing import Any, Optional
-from uuid import uuid4
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
+from app.tools.audit_chain_tool import append_audit_entries
+from app.tools.job_result_tool import offload_if_large
 
 
 def _session() -> Session:
     return SessionLocal()
 
 
-_JOBS_DDL = """
-CREATE TABLE IF NOT EXISTS jobs (
-    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    tenant_id       UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
-    job_type        VARCHAR(100) NOT NULL,
-    status          VARCHAR(30)  NOT NULL DEFAULT 'QUEUED',
-    idempotency_key VARCHAR(200),
-    payload         JSONB NOT NULL DEFAULT '{}',
-    result          JSONB,
-    error_message   TEXT,
-    created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
-    updated_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
-    UNIQUE (tenant_id, idempotency_key)
-);
-CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs(tenant_id);
-CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(tenant_id, status);
-"""
-
-
-def _ensure_jobs_table(db: Session) -> None:
-    db.execute(text(_JOBS_DDL))
-    db.commit()
-
-
 # ── 1. Audit Log ──────────────────────────────────────────────
 def insert_audit_log(
     tenant_id: str,
@@ -49,44 +26,108 @@ def insert_audit_log(
     payload: Optional[dict] = None,
 ) -> dict:
     """
-    Insert an audit-log row and return {id, checksum}.
-    The checksum is a SHA-256 of the payload for tamper-evidence.
+    Insert an audit-log row and return {id, checksum, chain_seq, row_hash}.
+    The checksum is a SHA-256 of the payload for tamper-evidence; the row
+    is appended to the tenant's hash chain (see audit_chain_tool).
     """
-    from hashlib import sha256
+    db = _session()
+    try:
+        written = append_audit_entries(db, tenant_id, [{
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user_id": user_id,
+            "payload": payload,
+        }])
+        db.commit()
+    finally:
+        db.close()
 
-    payload = payload or {}
-    checksum = sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
-    payload["_checksum"] = checksum
+    return written[0]
 
-    audit_id = str(uuid4())
-    payload_json = json.dumps(payload, default=str)
 
+def _add_months(month_start: date, months: int) -> date:
+    idx = month_start.year * 12 + (month_start.month - 1) + months
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def ensure_audit_log_partitions(months_ahead: int = 3) -> list[str]:
+    """
+    Create the monthly audit_log partitions (audit_log_pYYYYMM, UTC bounds)
+    for the current month and the next `months_ahead` months.
+    Returns the partition names that now exist for that window.
+
+    Rows written while a month had no partition landed in audit_log_default,
+    and Postgres refuses to create a partition the DEFAULT holds rows for:
+    those rows are moved into the new partition in the same transaction.
+    """
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    names: list[str] = []
     db = _session()
     try:
-        db.execute(
-            text("""
-                INSERT INTO audit_log
-                    (id, tenant_id, user_id, action, entity_type, entity_id, payload)
-                VALUES
-                    (CAST(:id AS uuid), CAST(:tid AS uuid),
-                     CAST(:uid AS uuid), :action, :etype, :eid,
-                     CAST(:payload AS jsonb))
-            """),
-            {
-                "id": audit_id,
-                "tid": tenant_id,
-                "uid": user_id,
-                "action": action,
-                "etype": entity_type,
-                "eid": entity_id,
-                "payload": payload_json,
-            },
-        )
+        for offset in range(months_ahead + 1):
+            start = _add_months(current, offset)
+            end = _add_months(start, 1)
+            name = f"audit_log_p{start:%Y%m}"
+            lo, hi = f"{start.isoformat()} 00:00:00+00", f"{end.isoformat()} 00:00:00+00"
+            exists = db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+            if not exists and _default_has_rows(db, lo, hi):
+                _partition_from_default(db, name, lo, hi)
+            else:
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_log "
+                    f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+                ))
+            names.append(name)
         db.commit()
     finally:
         db.close()
+    return names
+
+
+def _default_has_rows(db: Session, lo: str, hi: str) -> bool:
+    return bool(db.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM audit_log_default
+            WHERE created_at >= CAST(:lo AS timestamptz) AND created_at < CAST(:hi AS timestamptz)
+        )
+    """), {"lo": lo, "hi": hi}).scalar())
+
+
+def _partition_from_default(db: Session, name: str, lo: str, hi: str) -> None:
+    """
+    Build the month's partition as a plain table, move its rows out of the
+    DEFAULT, then attach it.  The DEFAULT stays locked until commit so no
+    row for the month can land there in between (ATTACH would fail).
+    """
+    db.execute(text("LOCK TABLE audit_log_default IN ACCESS EXCLUSIVE MODE"))
+    db.execute(text(
+        f"CREATE TABLE {name} (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+    ))
+    # Generated columns (payload_*) are recomputed, never copied
+    cols = db.execute(text("""
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        FROM pg_attribute
+        WHERE attrelid = 'audit_log'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+    """)).scalar()
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM audit_log_default
+            WHERE created_at >= CAST(:lo AS timestamptz) AND created_at < CAST(:hi AS timestamptz)
+            RETURNING {cols}
+        )
+        INSERT INTO {name} ({cols}) SELECT {cols} FROM moved
+    """), {"lo": lo, "hi": hi})
+    db.execute(text(f"ALTER TABLE audit_log ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
 
-    return {"id": audit_id, "checksum": checksum}
+
+def count_audit_log_default() -> int:
+    """Rows in audit_log_default: each belongs to a month without a partition."""
+    db = _session()
+    try:
+        return db.execute(text("SELECT count(*) FROM audit_log_default")).scalar() or 0
+    finally:
+        db.close()
 
 
 # ── 2. Tax Rules ──────────────────────────────────────────────
@@ -110,7 +151,7 @@ def get_tax_rules(
         rows = db.execute(
             text(f"""
                 SELECT rule_code, description, tax_type, rate,
-                       valid_from, valid_to
+                       valid_from, valid_to, updated_at
                 FROM tax_rules
                 WHERE tenant_id = CAST(:tid AS uuid)
                   AND rule_code IN ({placeholders})
@@ -129,6 +170,108 @@ def get_tax_rules(
                 "rate": float(r.rate),
                 "valid_from": r.valid_from.isoformat(),
                 "valid_to": r.valid_to.isoformat() if r.valid_to else None,
+                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+            }
+            for r in rows
+        ]
+    finally:
+        db.close()
+
+
+def get_tax_rules_window(
+    tenant_id: str,
+    codes: list[str],
+    start: date,
+    end: date,
+) -> list[dict]:
+    """
+    Return every tax rule for the given rule_codes that is valid at some
+    point in [start, end], so one lookup serves a whole batch of invoices.
+    Same row shape as get_tax_rules; pick per date with valid_from/valid_to.
+    """
+    db = _session()
+    try:
+        placeholders = ", ".join(f":code_{i}" for i in range(len(codes)))
+        params: dict[str, Any] = {"tid": tenant_id, "start": start, "end": end}
+        for i, c in enumerate(codes):
+            params[f"code_{i}"] = c
+
+        rows = db.execute(
+            text(f"""
+                SELECT rule_code, description, tax_type, rate,
+                       valid_from, valid_to, updated_at
+                FROM tax_rules
+                WHERE tenant_id = CAST(:tid AS uuid)
+                  AND rule_code IN ({placeholders})
+                  AND valid_from <= :end
+                  AND (valid_to IS NULL OR valid_to >= :start)
+                ORDER BY tax_type, valid_from DESC
+            """),
+            params,
+        ).fetchall()
+
+        return [
+            {
+                "rule_code": r.rule_code,
+                "description": r.description,
+                "tax_type": r.tax_type,
+                "rate": float(r.rate),
+                "valid_from": r.valid_from.isoformat(),
+                "valid_to": r.valid_to.isoformat() if r.valid_to else None,
+                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+            }
+            for r in rows
+        ]
+    finally:
+        db.close()
+
+
+def aggregate_invoice_bases(
+    tenant_id: str,
+    company_id: str,
+    period_start: date,
+    period_end: date,
+) -> list[dict]:
+    """
+    Sum invoice_items bases per NCM for a company's invoices issued in
+    [period_start, period_end), together with the NCM's own rate treatment.
+    The aggregation runs in Postgres: one row per distinct NCM comes back.
+    """
+    db = _session()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT ii.ncm_code,
+                       COUNT(*)            AS items_count,
+                       SUM(ii.total_price) AS base,
+                       nc.cbs_rate         AS ncm_cbs_rate,
+                       nc.ibs_rate         AS ncm_ibs_rate,
+                       COALESCE(nc.is_exempt, FALSE) AS is_exempt
+                FROM invoices i
+                JOIN invoice_items ii
+                  ON ii.invoice_id = i.id
+                 AND ii.tenant_id  = i.tenant_id
+                LEFT JOIN ncm_codes nc
+                  ON nc.tenant_id = i.tenant_id
+                 AND nc.code      = ii.ncm_code
+                WHERE i.tenant_id  = CAST(:tid AS uuid)
+                  AND i.company_id = CAST(:cid AS uuid)
+                  AND i.issue_date >= :start
+                  AND i.issue_date <  :end
+                GROUP BY ii.ncm_code, nc.cbs_rate, nc.ibs_rate, nc.is_exempt
+                ORDER BY ii.ncm_code NULLS FIRST
+            """),
+            {"tid": tenant_id, "cid": company_id, "start": period_start, "end": period_end},
+        ).fetchall()
+
+        return [
+            {
+                "ncm_code": r.ncm_code,
+                "items_count": int(r.items_count),
+                "base": str(r.base),
+                "ncm_cbs_rate": str(r.ncm_cbs_rate) if r.ncm_cbs_rate is not None else None,
+                "ncm_ibs_rate": str(r.ncm_ibs_rate) if r.ncm_ibs_rate is not None else None,
+                "is_exempt": bool(r.is_exempt),
             }
             for r in rows
         ]
@@ -136,6 +279,97 @@ def get_tax_rules(
         db.close()
 
 
+def list_invoice_refs(
+    tenant_id: str,
+    *,
+    company_id: Optional[str] = None,
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    invoice_numbers: Optional[list[str]] = None,
+) -> list[dict]:
+    """
+    Resolve invoices to validate: by issue period [period_start, period_end)
+    (optionally for one company) and/or by invoice_number.
+    Returns [{id, invoice_number, issue_date}] ordered by issue_date.
+    """
+    filters = ["tenant_id = CAST(:tid AS uuid)"]
+    params: dict[str, Any] = {"tid": tenant_id}
+    if company_id:
+        filters.append("company_id = CAST(:cid AS uuid)")
+        params["cid"] = company_id
+    if period_start:
+        filters.append("issue_date >= :start")
+        params["start"] = period_start
+    if period_end:
+        filters.append("issue_date < :end")
+        params["end"] = period_end
+    if invoice_numbers:
+        filters.append("invoice_number = ANY(:numbers)")
+        params["numbers"] = list(invoice_numbers)
+
+    db = _session()
+    try:
+        rows = db.execute(
+            text(f"""
+                SELECT id, invoice_number, issue_date
+                FROM invoices
+                WHERE {" AND ".join(filters)}
+                ORDER BY issue_date, id
+            """),
+            params,
+        ).fetchall()
+        return [
+            {"id": str(r.id), "invoice_number": r.invoice_number, "issue_date": r.issue_date.isoformat()}
+            for r in rows
+        ]
+    finally:
+        db.close()
+
+
+def load_invoices_with_items(tenant_id: str, invoice_ids: list[str]) -> list[dict]:
+    """
+    Load invoices and their items in one round trip, shaped like the
+    Task A input plus the invoice id: {id, invoice_number, issue_date,
+    declared_cbs, declared_ibs, items: [{sku, description, base_amount}]}.
+    """
+    db = _session()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT i.id, i.invoice_number, i.issue_date, i.total_cbs, i.total_ibs,
+                       ii.ncm_code, ii.description, ii.total_price
+                FROM invoices i
+                LEFT JOIN invoice_items ii
+                  ON ii.invoice_id = i.id
+                 AND ii.tenant_id  = i.tenant_id
+                WHERE i.tenant_id = CAST(:tid AS uuid)
+                  AND i.id = ANY(CAST(:ids AS uuid[]))
+                ORDER BY i.issue_date, i.id, ii.id
+            """),
+            {"tid": tenant_id, "ids": list(invoice_ids)},
+        ).fetchall()
+    finally:
+        db.close()
+
+    invoices: dict[str, dict] = {}
+    for r in rows:
+        inv = invoices.setdefault(str(r.id), {
+            "id": str(r.id),
+            "invoice_number": r.invoice_number,
+            "issue_date": r.issue_date.isoformat(),
+            "declared_cbs": str(r.total_cbs),
+            "declared_ibs": str(r.total_ibs),
+            "items": [],
+        })
+        if r.total_price is not None:
+            inv["items"].append({
+                "sku": r.ncm_code or "",
+                "description": r.description,
+                "base_amount": str(r.total_price),
+            })
+    return list(invoices.values())
+
+
 # ── 3. Artifact Metadata ─────────────────────────────────────
 def persist_artifact_metadata(
     tenant_id: str,
@@ -166,21 +400,6 @@ def persist_artifact_metadata(
 
 
 # ── 4. Job Status Update ─────────────────────────────────────
-def get_tenant_slug(tenant_id: str) -> str:
-    """Resolve tenant slug from tenant UUID string."""
-    db = _session()
-    try:
-        row = db.execute(
-            text("SELECT slug FROM tenants WHERE id = CAST(:id AS uuid)"),
-            {"id": tenant_id},
-        ).fetchone()
-        if not row:
-            raise ValueError(f"Tenant not found for id={tenant_id}")
-        return str(row.slug)
-    finally:
-        db.close()
-
-
 def job_create(
     *,
     job_id: str,
@@ -192,7 +411,6 @@ def job_create(
     """Create a QUEUED job row with a deterministic job_id."""
     db = _session()
     try:
-        _ensure_jobs_table(db)
         db.execute(
             text(
                 """
@@ -230,6 +448,8 @@ def job_status_update(
     """
     Transition a job to a new status.
     Valid statuses: QUEUED, RUNNING, SUCCESS, FAILED, NEEDS_HUMAN.
+    Results above JOB_RESULT_INLINE_MAX_BYTES are stored in S3 and only a
+    pointer + summary is written to the row.
     """
     valid = {"QUEUED", "RUNNING", "SUCCESS", "FAILED", "NEEDS_HUMAN"}
     if status not in valid:
@@ -237,17 +457,28 @@ def job_status_update(
 
     updates = ["status = :status", "updated_at = now()"]
     params: dict[str, Any] = {"id": job_id, "status": status}
-
-    if result is not None:
-        updates.append("result = CAST(:result AS jsonb)")
-        params["result"] = json.dumps(result, default=str)
     if error_message is not None:
         updates.append("error_message = :err")
         params["err"] = error_message
 
-    set_clause = ", ".join(updates)
     db = _session()
     try:
+        if result is not None:
+            # The offload key is tenant-scoped: read the owner, then upload
+            # outside any transaction; the UPDATE alone locks the row.
+            owner = db.execute(
+                text("SELECT tenant_id FROM jobs WHERE id = CAST(:id AS uuid)"),
+                {"id": job_id},
+            ).fetchone()
+            if not owner:
+                return {"error": "job not found"}
+            db.rollback()
+            updates.append("result = CAST(:result AS jsonb)")
+            params["result"] = json.dumps(
+                offload_if_large(job_id, str(owner.tenant_id), result), default=str,
+            )
+
+        set_clause = ", ".join(updates)
         db.execute(
             text(f"UPDATE jobs SET {set_clause} WHERE id = CAST(:id AS uuid)"),
             params,
@@ -266,3 +497,54 @@ def job_status_update(
         } if row else {"error": "job not found"}
     finally:
         db.close()
+
+
+def job_increment_counters(
+    job_id: str,
+    counters: dict[str, int],
+    once_key: Optional[str] = None,
+    db: Optional[Session] = None,
+) -> bool:
+    """
+    Atomically add `counters` to the integer fields of jobs.result.
+    Concurrent callers (e.g. chunk tasks of one batch) never lose updates:
+    the UPDATE re-reads the row under its lock.
+
+    With `once_key` the increment is applied at most once per key (keys are
+    kept in result.counted), so a retried or redelivered chunk does not
+    count twice.  With `db` the update joins the caller's transaction and
+    is not committed.  Returns False if nothing was applied.
+    """
+    if not counters:
+        return True
+    parts = ", ".join(
+        f"'{key}', COALESCE((result->>'{key}')::bigint, 0) + :c_{i}"
+        for i, key in enumerate(counters)
+    )
+    params: dict[str, Any] = {"id": job_id}
+    for i, value in enumerate(counters.values()):
+        params[f"c_{i}"] = int(value)
+    once_sql = ""
+    if once_key is not None:
+        parts += ", 'counted', COALESCE(result->'counted', '[]'::jsonb) || to_jsonb(CAST(:once AS text))"
+        once_sql = "AND NOT COALESCE(result->'counted', '[]'::jsonb) ? :once"
+        params["once"] = once_key
+
+    session = db or _session()
+    try:
+        applied = session.execute(
+            text(f"""
+                UPDATE jobs
+                SET result = COALESCE(result, '{{}}'::jsonb) || jsonb_build_object({parts}),
+                    updated_at = now()
+                WHERE id = CAST(:id AS uuid)
+                  {once_sql}
+            """),
+            params,
+        ).rowcount
+        if db is None:
+            session.commit()
+    finally:
+        if db is None:
+            session.close()
+    return applied > 0
@@ -1,14 +1,16 @@
 """S3Tool – MinIO (dev) / AWS S3 (prod) compatible storage operations."""
 
 import hashlib
+import time
 from io import BytesIO
-from typing import Optional
+from typing import Iterator, Optional
 
 import boto3
 from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 
 from app.config import settings
+from app.core.metrics import S3_OPERATION_SECONDS, S3_UPLOAD_BYTES
 
 
 def _client():
@@ -53,6 +55,7 @@ def put_object(
     if metadata:
         extra["Metadata"] = metadata
 
+    started = time.perf_counter()
     client.put_object(
         Bucket=bucket,
         Key=key,
@@ -60,6 +63,8 @@ def put_object(
         ContentLength=len(data),
         **extra,
     )
+    S3_OPERATION_SECONDS.labels("put_object").observe(time.perf_counter() - started)
+    S3_UPLOAD_BYTES.observe(len(data))
 
     return {
         "bucket": bucket,
@@ -104,3 +109,20 @@ def checksum(
         "checksum_sha256": sha,
         "size_bytes": len(body),
     }
+
+
+# ── 4. Stream Object ─────────────────────────────────────────
+def get_object_stream(
+    key: str,
+    bucket: Optional[str] = None,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """Yield the object body in chunks without buffering it in memory."""
+    bucket = bucket or settings.S3_BUCKET
+    client = _client()
+    resp = client.get_object(Bucket=bucket, Key=key)
+    body = resp["Body"]
+    try:
+        yield from body.iter_chunks(chunk_size=chunk_size)
+    finally:
+        body.close()
@@ -0,0 +1,160 @@
+"""SimulationCacheTool – content-addressed reuse of what-if simulation results."""
+
+import json
+from datetime import date
+from decimal import Decimal
+from hashlib import sha256
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.database import SessionLocal
+
+
+# ── Simulation table bootstrap ───────────────────────────────
+_SIMULATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS simulations (
+    id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id     UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    name          VARCHAR(200)  NOT NULL,
+    base_scenario JSONB         NOT NULL DEFAULT '{}',
+    scenarios     JSONB         NOT NULL DEFAULT '[]',
+    result        JSONB,
+    created_at    TIMESTAMPTZ   NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_simulations_tenant ON simulations(tenant_id);
+ALTER TABLE simulations ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64);
+ALTER TABLE simulations ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_simulations_fingerprint
+    ON simulations(tenant_id, fingerprint, created_at DESC)
+    WHERE fingerprint IS NOT NULL;
+"""
+
+_table_ready = False
+
+
+def ensure_simulations_table() -> None:
+    """Create the simulations table (once per process)."""
+    global _table_ready
+    if _table_ready:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(text(_SIMULATIONS_DDL))
+        db.commit()
+        _table_ready = True
+    finally:
+        db.close()
+
+
+# ── Helpers ───────────────────────────────────────────────────
+def _norm_decimal(value: Any) -> Optional[str]:
+    """Canonical string for a numeric input ("100", "100.00" → "100")."""
+    if value is None:
+        return None
+    return format(Decimal(str(value)).normalize(), "f")
+
+
+# ── 1. Fingerprint ───────────────────────────────────────────
+def simulation_fingerprint(
+    *,
+    base_inputs: dict[str, Any],
+    scenarios: list[dict],
+    rules: list[dict],
+    ref_date: date,
+) -> str:
+    """
+    SHA-256 over the canonical form of everything a simulation result
+    depends on: base inputs, scenarios (in order), the resolved tax_rules
+    rows and the reference date.
+
+    Rule rows contribute rate, validity window and updated_at, so any change
+    to tax_rules yields a new fingerprint and stale results are never reused.
+    """
+    canonical = {
+        "base_inputs": base_inputs,
+        "scenarios": [
+            {
+                "name": sc.get("name", "unnamed"),
+                "cbs_rate_override": _norm_decimal(sc.get("cbs_rate_override")),
+                "ibs_rate_override": _norm_decimal(sc.get("ibs_rate_override")),
+            }
+            for sc in scenarios
+        ],
+        "rules": sorted(
+            (
+                [
+                    r["rule_code"],
+                    r["tax_type"],
+                    _norm_decimal(r["rate"]),
+                    r["valid_from"],
+                    r.get("valid_to"),
+                    r.get("updated_at"),
+                ]
+                for r in rules
+            ),
+            key=lambda row: [str(v) for v in row],
+        ),
+        "reference_date": ref_date.isoformat(),
+    }
+    raw = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ── 2. Lookup ────────────────────────────────────────────────
+def get_cached_simulation(tenant_id: str, fingerprint: str) -> Optional[dict]:
+    """
+    Return the stored result for `fingerprint` if it has not expired,
+    tagged with its simulation_id and `cache_hit: True`; otherwise None.
+    """
+    if settings.SIMULATION_CACHE_TTL_SECONDS <= 0:
+        return None
+
+    ensure_simulations_table()
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            text("""
+                SELECT id, result
+                FROM simulations
+                WHERE tenant_id = CAST(:tid AS uuid)
+                  AND fingerprint = :fp
+                  AND expires_at > now()
+                ORDER BY created_at DESC
+                LIMIT 1
+            """),
+            {"tid": tenant_id, "fp": fingerprint},
+        ).fetchone()
+    finally:
+        db.close()
+
+    if not row or not isinstance(row.result, dict):
+        CACHE_REQUESTS.labels("simulation", "miss").inc()
+        return None
+    CACHE_REQUESTS.labels("simulation", "hit").inc()
+    return {**row.result, "simulation_id": str(row.id), "cache_hit": True}
+
+
+# ── 3. Eviction ──────────────────────────────────────────────
+def evict_expired_simulations() -> int:
+    """
+    Detach expired rows from the cache by clearing their fingerprint.
+    The simulation history itself is kept.  Returns the number of rows evicted.
+    """
+    ensure_simulations_table()
+    db = SessionLocal()
+    try:
+        res = db.execute(
+            text("""
+                UPDATE simulations
+                SET fingerprint = NULL
+                WHERE fingerprint IS NOT NULL
+                  AND expires_at <= now()
+            """)
+        )
+        db.commit()
+        return int(getattr(res, "rowcount", 0) or 0)
+    finally:
+        db.close()
@@ -0,0 +1,167 @@
+"""TenantDirectoryTool – cached tenant lookups (slug ↔ id, is_active)."""
+
+import json
+import logging
+import time
+from typing import Any, Optional
+
+import redis
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.database import SessionLocal
+from app.models.auth import Tenant
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_ID_KEY = "tenant_dir:id:{}"
+_SLUG_KEY = "tenant_dir:slug:{}"
+
+# Process-local layer in front of Redis: {cache key: (expires_at, entry)}.
+# It is only invalidated in the process that changed the tenant, so its TTL
+# bounds how long other processes may see a stale row.
+_local: dict[str, tuple[float, dict[str, Any]]] = {}
+
+
+# ── 1. Cache layers ──────────────────────────────────────────
+def _cache_get(key: str) -> Optional[dict[str, Any]]:
+    hit = _local.get(key)
+    if hit is not None:
+        if hit[0] > time.monotonic():
+            return hit[1]
+        _local.pop(key, None)
+
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(key)
+    except redis.RedisError as e:
+        logger.warning("Tenant directory Redis read failed: %s", e)
+        return None
+    if not raw:
+        return None
+    entry = json.loads(raw)
+    _local[key] = (time.monotonic() + settings.TENANT_CACHE_LOCAL_TTL_SECONDS, entry)
+    return entry
+
+
+def _cache_put(entry: dict[str, Any]) -> None:
+    keys = (_ID_KEY.format(entry["id"]), _SLUG_KEY.format(entry["slug"]))
+    expires = time.monotonic() + settings.TENANT_CACHE_LOCAL_TTL_SECONDS
+    for key in keys:
+        _local[key] = (expires, entry)
+
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline()
+        for key in keys:
+            pipe.set(key, json.dumps(entry), ex=settings.TENANT_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Tenant directory Redis write failed: %s", e)
+
+
+def _load(db: Optional[Session], where: str, value: str) -> Optional[dict[str, Any]]:
+    own = db is None
+    session = SessionLocal() if own else db
+    try:
+        row = session.execute(
+            text(f"SELECT id, slug, is_active FROM tenants WHERE {where}"),
+            {"v": value},
+        ).fetchone()
+    finally:
+        if own:
+            session.close()
+    if not row:
+        return None
+    return {"id": str(row.id), "slug": str(row.slug), "is_active": bool(row.is_active)}
+
+
+def _lookup(key: str, db: Optional[Session], where: str, value: str) -> Optional[dict[str, Any]]:
+    if settings.TENANT_CACHE_TTL_SECONDS <= 0:
+        return _load(db, where, value)
+    entry = _cache_get(key)
+    if entry is not None:
+        CACHE_REQUESTS.labels("tenant_directory", "hit").inc()
+        return entry
+    CACHE_REQUESTS.labels("tenant_directory", "miss").inc()
+    entry = _load(db, where, value)
+    if entry is not None:           # misses are not cached: new tenants show up at once
+        _cache_put(entry)
+    return entry
+
+
+# ── 2. Lookups ───────────────────────────────────────────────
+def get_tenant_by_id(tenant_id: str, db: Optional[Session] = None) -> Optional[dict[str, Any]]:
+    """{id, slug, is_active} for a tenant UUID string, or None.  Uses `db` on a miss if given."""
+    return _lookup(_ID_KEY.format(tenant_id), db, "id = CAST(:v AS uuid)", tenant_id)
+
+
+def get_tenant_by_slug(slug: str, db: Optional[Session] = None) -> Optional[dict[str, Any]]:
+    """{id, slug, is_active} for a tenant slug, or None.  Uses `db` on a miss if given."""
+    return _lookup(_SLUG_KEY.format(slug), db, "slug = :v", slug)
+
+
+def get_tenant_slug(tenant_id: str, db: Optional[Session] = None) -> str:
+    """Resolve tenant slug from tenant UUID string."""
+    entry = get_tenant_by_id(tenant_id, db)
+    if entry is None:
+        raise ValueError(f"Tenant not found for id={tenant_id}")
+    return entry["slug"]
+
+
+# ── 3. Invalidation ──────────────────────────────────────────
+def invalidate_tenant(tenant_id: Optional[str] = None, slug: Optional[str] = None) -> None:
+    """
+    Drop a tenant from this process and from Redis.  Call after changing a
+    tenant with raw SQL; ORM updates/deletes of `Tenant` do it on commit.
+    """
+    keys = []
+    if tenant_id:
+        keys.append(_ID_KEY.format(tenant_id))
+    if slug:
+        keys.append(_SLUG_KEY.format(slug))
+    for key in keys:
+        _local.pop(key, None)
+
+    r = get_redis()
+    if r is None or not keys:
+        return
+    try:
+        r.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning("Tenant directory Redis invalidation failed: %s", e)
+
+
+def _track_tenant_change(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        invalidate_tenant(str(target.id), target.slug)
+        return
+    pending = session.info.setdefault("tenant_directory_invalidate", set())
+    pending.add((str(target.id), target.slug))
+    for old_slug in inspect(target).attrs.slug.history.deleted:   # slug renamed
+        if old_slug:
+            pending.add((str(target.id), old_slug))
+
+
+def _flush_invalidations(session: Session) -> None:
+    for tenant_id, slug in session.info.pop("tenant_directory_invalidate", ()):
+        invalidate_tenant(tenant_id, slug)
+
+
+def _install_invalidation_hooks() -> None:
+    event.listen(Tenant, "after_update", _track_tenant_change)
+    event.listen(Tenant, "after_delete", _track_tenant_change)
+    # Pending entries survive a rollback on purpose: an extra invalidation
+    # on the next commit is harmless.
+    event.listen(Session, "after_commit", _flush_invalidations)
+
+
+_install_invalidation_hooks()
@@ -0,0 +1,12 @@
+#!/bin/sh
+set -e
+
+# prometheus_client writes per-process .db files into PROMETHEUS_MULTIPROC_DIR
+# as soon as app.core.metrics is imported, so the directory must exist (and be
+# emptied of the previous run's files) before the API or a worker starts.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError
+
+from app.routers.audit import (
+    EXPORT_COLUMNS,
+    AuditEntry,
+    _audit_filters,
+    _check_jsonpath,
+    _csv_stream,
+    _ndjson_stream,
+)
+
+
+def _row(action: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid4(),
+        tenant_id=uuid4(),
+        user_id=None,
+        action=action,
+        entity_type="invoice",
+        entity_id=None,
+        payload={"status": "FAIL", "_checksum": "abc"},
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_ndjson_stream_emits_one_record_per_line() -> None:
+    batches = iter([[_row("validation_fail")], [_row("validation_pass"), _row("validation_fail")]])
+
+    lines = b"".join(_ndjson_stream(batches)).decode().splitlines()
+
+    assert [json.loads(line)["action"] for line in lines] == [
+        "validation_fail", "validation_pass", "validation_fail",
+    ]
+    assert json.loads(lines[0])["checksum"] == "abc"
+
+
+def test_csv_stream_has_header_and_json_payload() -> None:
+    batches = iter([[_row("validation_fail")], [_row("validation_pass")]])
+
+    rows = list(csv.reader(io.StringIO(b"".join(_csv_stream(batches)).decode())))
+
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == 3
+    assert json.loads(rows[1][EXPORT_COLUMNS.index("payload")])["status"] == "FAIL"
+
+
+def test_payload_filters_use_indexed_predicates() -> None:
+    filters, bind = _audit_filters(
+        "tid",
+        status="FAIL",
+        invoice_number="NF-1",
+        payload_contains={"cbs_match": False},
+        payload_path="$.declared_cbs ? (@ != \"0\")",
+    )
+
+    assert "al.payload_status = :status" in filters
+    assert "al.payload_invoice_number = :invoice_number" in filters
+    assert "al.payload @> CAST(:payload_contains AS jsonb)" in filters
+    assert "al.payload @? CAST(:payload_path AS jsonpath)" in filters
+    assert json.loads(bind["payload_contains"]) == {"cbs_match": False}
+
+
+def test_bad_jsonpath_is_a_400_and_only_the_cast_is_checked() -> None:
+    class _Session:
+        statements: list[str] = []
+
+        def begin_nested(self):
+            return nullcontext()
+
+        def execute(self, stmt, params):
+            self.statements.append(str(stmt))
+            raise DataError(str(stmt), params, Exception("syntax error in jsonpath"))
+
+    session = _Session()
+    with pytest.raises(HTTPException) as exc:
+        _check_jsonpath("$.status ==", session)  # type: ignore[arg-type]
+    assert exc.value.status_code == 400
+    assert session.statements == ["SELECT CAST(:p AS jsonpath)"]
+
+
+def test_audit_entry_rejects_non_uuid_entity_id() -> None:
+    with pytest.raises(ValidationError):
+        AuditEntry(action="note", entity_type="invoice", entity_id="INV-1")
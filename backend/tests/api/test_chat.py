@@ -1,11 +1,15 @@
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from uuid import uuid4
 
 from app.main import app
 from app.api.deps import get_current_user
 from app.models.auth import User
+from app.services import chat_stream
 from app.services.chat_service import ChatResult, JobEvidence
 
 client = TestClient(app)
@@ -91,3 +95,67 @@ def test_chat_payload_validation_max_length():
 def test_chat_payload_validation_empty():
     response = client.post("/api/v1/chat/message", json={"message": ""})
     assert response.status_code == 422
+
+def test_history_messages_page_and_cursor():
+    cid = uuid4()
+    entry = {"id": str(uuid4()), "role": "user", "content": "oi", "metadata": {}, "created_at": "2026-03-01T12:00:00+00:00"}
+    with patch("app.routers.chat.chat_history") as history:
+        history.owns_conversation.return_value = True
+        history.list_messages.return_value = ([entry], "next-page")
+        response = client.get(f"/api/v1/chat/conversations/{cid}/messages", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == "next-page"
+    assert response.json()[0]["content"] == "oi"
+    owner_args = history.owns_conversation.call_args.args
+    assert owner_args[1:] == (cid, mock_user.tenant_id, mock_user.id)
+
+def test_history_of_foreign_conversation_is_404():
+    with patch("app.routers.chat.chat_history") as history:
+        history.owns_conversation.return_value = False
+        response = client.get(f"/api/v1/chat/conversations/{uuid4()}/messages")
+    assert response.status_code == 404
+    history.list_messages.assert_not_called()
+
+def _sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_chat_stream_acks_sections_and_job_updates(monkeypatch):
+    cid, job_id = uuid4(), uuid4()
+    snapshots = iter([
+        {"job_id": str(job_id), "status": "RUNNING", "progress": {"processed": 1}},
+        {"job_id": str(job_id), "status": "SUCCESS", "progress": None},
+    ])
+    monkeypatch.setattr(chat_stream, "job_snapshot", lambda jid, tid: next(snapshots))
+    monkeypatch.setattr(chat_stream.settings, "CHAT_STREAM_POLL_SECONDS", 0)
+    with patch("app.services.chat_stream.ChatService") as MockService:
+        MockService.return_value.handle_message = AsyncMock(return_value=ChatResult(
+            conversation_id=cid,
+            response_markdown="# Resultado\n\n## Resultado\n- ok\n\n## Evidências\n- job",
+            evidence=[JobEvidence(type="job", job_id=job_id, href=f"/jobs/{job_id}", label="Validation Job")],
+        ))
+        response = client.post("/api/v1/chat/message/stream", json={"message": "validar INV-1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == ["ack", "section", "section", "section", "message", "job", "job", "end"]
+    assert events[2][1]["markdown"] == "## Resultado\n- ok\n"
+    assert events[4][1]["conversation_id"] == str(cid)
+    assert events[6][1]["status"] == "SUCCESS"
+    assert events[7][1] == {"reason": "done"}
+
+def test_chat_stream_reports_rejection_as_event():
+    with patch("app.services.chat_stream.ChatService") as MockService:
+        MockService.return_value.handle_message = AsyncMock(
+            side_effect=HTTPException(status_code=404, detail="Conversation not found")
+        )
+        response = client.post("/api/v1/chat/message/stream", json={"message": "oi", "conversation_id": str(uuid4())})
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == ["ack", "error"]
+    assert events[1][1] == {"status": 404, "detail": "Conversation not found"}
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    job_id = uuid4()
+
+    cursor = encode_cursor(created_at, job_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, str(job_id))
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "Zm9vfGJhcg"])
+def test_invalid_cursor_is_rejected(cursor: str) -> None:
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+from app.core.metrics import QueueDepthCollector
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_metrics_exposes_route_template_latency() -> None:
+    client.get("/")
+
+    r = client.get("/metrics")
+
+    assert r.status_code == 200
+    assert 'tribultz_http_request_duration_seconds_count{method="GET",route="/",status="200"}' in r.text
+
+
+class _Pipeline:
+    def __init__(self, lengths: dict[str, int]):
+        self.lengths, self.keys = lengths, []
+
+    def llen(self, key: str) -> None:
+        self.keys.append(key)
+
+    def execute(self) -> list[int]:
+        return [self.lengths.get(k, 0) for k in self.keys]
+
+
+class _Redis:
+    def __init__(self, lengths: dict[str, int]):
+        self.lengths = lengths
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self.lengths)
+
+
+def test_queue_depth_sums_priority_steps(monkeypatch) -> None:
+    lengths = {"batch": 2, "batch\x06\x163": 5, "interactive\x06\x169": 1}
+    monkeypatch.setattr("app.redis_client.get_redis", lambda: _Redis(lengths))
+
+    (family,) = QueueDepthCollector(["batch", "interactive"]).collect()
+
+    assert {s.labels["queue"]: s.value for s in family.samples} == {"batch": 7, "interactive": 1}
@@ -0,0 +1,146 @@
+"""
+Route-level SQL budgets.
+
+Each hot route is called against the migrated Postgres (DATABASE_URL, as in
+CI) with enough seeded rows that an N+1 would show, and pinned with
+`assert_max_queries`: the budget counts every statement of the request,
+including the auth lookup and anything run while a body streams, and no
+statement may repeat.  Without a database the module is skipped locally and
+fails in CI.
+"""
+
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.api.deps import get_current_user
+from app.config import settings
+from app.core.query_budget import assert_max_queries
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.main import app
+from app.tools.audit_chain_tool import append_audit_entries
+
+ROWS = 30
+
+
+def _connect():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except OperationalError as e:
+        db.close()
+        if os.getenv("CI"):
+            pytest.fail(f"route budgets need Postgres: {e}")
+        pytest.skip("Postgres not available")
+    return db
+
+
+def _seed(db, tenant_id, user_id, conversation_id) -> list[str]:
+    db.execute(
+        text("INSERT INTO tenants (id, name, slug) VALUES (:tid, 'Budget', :slug)"),
+        {"tid": tenant_id, "slug": f"budget-{tenant_id}"},
+    )
+    db.execute(
+        text("""
+            INSERT INTO users (id, tenant_id, email, full_name, password_hash, role)
+            VALUES (:uid, :tid, :email, 'Budget User', 'x', 'admin')
+        """),
+        {"uid": user_id, "tid": tenant_id, "email": f"budget-{user_id}@test.com"},
+    )
+    db.execute(
+        text("""
+            INSERT INTO tax_rules (tenant_id, rule_code, tax_type, rate, valid_from)
+            VALUES (:tid, 'STD_CBS', 'CBS', 0.0925, '2026-01-01'),
+                   (:tid, 'STD_IBS', 'IBS', 0.1200, '2026-01-01')
+        """),
+        {"tid": tenant_id},
+    )
+    job_ids = [str(uuid4()) for _ in range(ROWS)]
+    db.execute(
+        text("""
+            INSERT INTO jobs (id, tenant_id, job_type, status, payload, result)
+            VALUES (:id, :tid, 'task_a_validate_cbs_ibs', 'SUCCESS', '{}', CAST(:result AS jsonb))
+        """),
+        [{"id": j, "tid": tenant_id, "result": '{"status": "PASS"}'} for j in job_ids],
+    )
+    append_audit_entries(db, tenant_id, [
+        {"action": "validation_pass", "entity_type": "invoice", "user_id": user_id,
+         "payload": {"invoice_number": f"NF-{i}", "status": "PASS"}}
+        for i in range(ROWS)
+    ])
+    db.execute(
+        text("INSERT INTO conversations (id, tenant_id, user_id, title) VALUES (:cid, :tid, :uid, 'b')"),
+        {"cid": conversation_id, "tid": tenant_id, "uid": user_id},
+    )
+    db.execute(
+        text("INSERT INTO messages (conversation_id, role, content) VALUES (:cid, 'user', :c)"),
+        [{"cid": conversation_id, "c": f"m{i}"} for i in range(ROWS)],
+    )
+    db.commit()
+    return job_ids
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    db = _connect()
+    tenant_id, user_id, conversation_id = str(uuid4()), str(uuid4()), str(uuid4())
+    try:
+        job_ids = _seed(db, tenant_id, user_id, conversation_id)
+        yield {
+            "job_id": job_ids[0],
+            "conversation_id": conversation_id,
+            "headers": {"Authorization": f"Bearer {create_access_token(user_id)}"},
+        }
+    finally:
+        db.rollback()
+        db.execute(text("DELETE FROM messages WHERE conversation_id = :cid"), {"cid": conversation_id})
+        db.execute(text("DELETE FROM conversations WHERE id = :cid"), {"cid": conversation_id})
+        db.execute(text("DELETE FROM tenants WHERE id = :tid"), {"tid": tenant_id})   # cascades
+        db.commit()
+        db.close()
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    # Other API tests override auth module-wide; budgets include the real lookup
+    monkeypatch.delitem(app.dependency_overrides, get_current_user, raising=False)
+    return TestClient(app)
+
+
+_VALIDATE_BODY = {
+    "invoice_number": "NF-BUDGET",
+    "issue_date": "2026-03-01",
+    "declared_cbs": "185.00",
+    "declared_ibs": "240.00",
+    "items": [{"sku": f"S{i}", "base_amount": "100"} for i in range(20)],
+}
+
+
+# (method, path, body, budget) – auth is one statement of every budget
+@pytest.mark.parametrize("method, path, body, budget", [
+    ("GET", "/api/v1/jobs/{job_id}", None, 2),
+    ("GET", "/api/v1/jobs/{job_id}/result", None, 2),
+    ("GET", "/api/v1/jobs?limit=50", None, 2),
+    ("GET", f"/api/v1/jobs?limit={settings.JOBS_STREAM_THRESHOLD + 1}", None, 3),
+    ("POST", "/api/v1/audit/search", {"status": "PASS", "limit": 100}, 2),
+    ("GET", "/api/v1/audit/export?format=csv", None, 2),
+    ("GET", "/api/v1/chat/conversations", None, 2),
+    ("GET", "/api/v1/chat/conversations/{conversation_id}/messages?limit=20", None, 3),
+    # tenant slug, rules, and one 4-statement audit-chain append
+    ("POST", "/api/v1/tasks/validate", _VALIDATE_BODY, 7),
+])
+def test_route_stays_within_query_budget(
+    seeded: dict, client: TestClient, method: str, path: str, body, budget: int,
+) -> None:
+    url = path.format(**seeded)
+
+    with assert_max_queries(budget, max_repeats=1):
+        r = client.request(method, url, json=body, headers=seeded["headers"])
+        r.read()
+
+    assert r.status_code == 200, r.text
@@ -0,0 +1,40 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.routers.tasks import TaskCPortfolioRequest, TaskCRequest
+
+
+def test_task_c_request_parses_amount_and_date() -> None:
+    req = TaskCRequest(
+        simulation_name="base", base_amount="1000.50", scenarios=[], ref_date="2026-01-31",
+    )
+    assert req.base_amount == Decimal("1000.50")
+    assert req.ref_date == date(2026, 1, 31)
+
+
+@pytest.mark.parametrize("field,value", [("base_amount", "lots"), ("ref_date", "31/01/2026")])
+def test_task_c_request_rejects_bad_input(field: str, value: str) -> None:
+    payload = {"simulation_name": "base", "base_amount": "1000", "scenarios": [], field: value}
+    with pytest.raises(ValidationError):       # FastAPI answers 422
+        TaskCRequest(**payload)
+
+
+@pytest.mark.parametrize("field,value", [
+    ("company_id", "acme"),
+    ("reference_period", "2026-13"),
+    ("reference_period", "2026-1"),
+    ("ref_date", "tomorrow"),
+])
+def test_portfolio_request_rejects_bad_input(field: str, value: str) -> None:
+    payload: dict[str, object] = {
+        "simulation_name": "base",
+        "company_id": "0b6f3c52-5d2c-4a57-9f0e-1f4f0c6b2a11",
+        "reference_period": "2026-01",
+        "scenarios": [],
+        field: value,
+    }
+    with pytest.raises(ValidationError):
+        TaskCPortfolioRequest(**payload)
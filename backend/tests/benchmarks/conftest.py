@@ -0,0 +1,44 @@
+"""
+Hot-path benchmarks (pytest-benchmark).
+
+Skipped in the regular test run.  Run them with:
+
+    pytest tests/benchmarks --benchmark-only --benchmark-warmup=on --benchmark-min-rounds=20
+    BENCH_SCALES=1000,100000,1000000 pytest tests/benchmarks --benchmark-only
+
+The default scales start at 1000 items: below that a run takes tens of
+microseconds and its timing is mostly noise.  The 100k/1M scales run in the
+nightly workflow (.github/workflows/bench-nightly.yml), enforced against the
+baseline it keeps for its runner.
+
+Baselines live in tests/benchmarks/baselines/<machine id>/ and are only
+meaningful on the machine that recorded them.  None is committed until one
+is recorded on the reference runner, with the same options:
+
+    pytest tests/benchmarks --benchmark-only --benchmark-warmup=on --benchmark-min-rounds=20 \
+        --benchmark-storage=tests/benchmarks/baselines --benchmark-save=baseline
+
+tools/qa_gates/run_gates.py compares against it, or, with --perf-base-ref
+(as CI runs it), against the merge-base benchmarked on the same runner in
+the same job, interleaved with HEAD; those regressions fail the gate.
+"""
+
+import os
+
+import pytest
+
+SCALES = [int(s) for s in os.environ.get("BENCH_SCALES", "1000,10000").split(",") if s.strip()]
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark-only")
+    for item in items:
+        if "benchmark" in getattr(item, "fixturenames", ()):
+            item.add_marker(skip)
+
+
+@pytest.fixture(params=SCALES, ids=lambda n: f"n={n}")
+def scale(request) -> int:
+    return request.param
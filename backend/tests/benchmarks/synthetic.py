@@ -0,0 +1,99 @@
+"""Deterministic synthetic invoices / receivables for the benchmark suite."""
+
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+CBS_RATE = Decimal("0.0925")
+IBS_RATE = Decimal("0.1200")
+
+RULES = [
+    {"rule_code": "STD_CBS", "tax_type": "CBS", "rate": CBS_RATE, "valid_from": "2026-01-01", "valid_to": None},
+    {"rule_code": "STD_IBS", "tax_type": "IBS", "rate": IBS_RATE, "valid_from": "2026-01-01", "valid_to": None},
+]
+
+
+def _amount(rng: random.Random) -> Decimal:
+    return Decimal(rng.randint(100, 1_000_000)) / 100
+
+
+def items(n: int, seed: int = 1) -> list[dict]:
+    """Invoice items with declared taxes that match the standard rates."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        base = _amount(rng)
+        out.append({
+            "sku": f"SKU-{i:07d}",
+            "base_amount": str(base),
+            "cbs_rule_code": "STD_CBS",
+            "ibs_rule_code": "STD_IBS",
+            "declared_cbs": str((base * CBS_RATE).quantize(Decimal("0.01"), ROUND_HALF_UP)),
+            "declared_ibs": str((base * IBS_RATE).quantize(Decimal("0.01"), ROUND_HALF_UP)),
+        })
+    return out
+
+
+def invoices(n_items: int, items_per_invoice: int = 10, seed: int = 1) -> list[dict]:
+    """`n_items` items grouped into invoices (Task B / Task D shape)."""
+    flat = items(n_items, seed)
+    out = []
+    for start in range(0, len(flat), items_per_invoice):
+        chunk = flat[start:start + items_per_invoice]
+        total = sum((Decimal(it["base_amount"]) for it in chunk), Decimal("0"))
+        out.append({
+            "invoice_number": f"INV-{start // items_per_invoice:07d}",
+            "items": chunk,
+            "total_amount": str(total),
+            "declared_cbs": str(sum((Decimal(it["declared_cbs"]) for it in chunk), Decimal("0"))),
+            "declared_ibs": str(sum((Decimal(it["declared_ibs"]) for it in chunk), Decimal("0"))),
+        })
+    return out
+
+
+def receivables_csv(invoice_list: list[dict], seed: int = 1) -> bytes:
+    """Receivables for ~95% of the invoices, some short-paid, plus a few unknown ones."""
+    rng = random.Random(seed)
+    lines = ["invoice_number;expected_amount;received_amount;received_date"]
+    for inv in invoice_list:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        received = Decimal(inv["total_amount"]) - (Decimal("1.00") if roll > 0.97 else 0)
+        lines.append(f"{inv['invoice_number']};{inv['total_amount']};{received};2026-02-15")
+    for i in range(max(1, len(invoice_list) // 100)):
+        lines.append(f"UNK-{i:07d};10.00;10.00;2026-02-15")
+    return "\n".join(lines).encode("utf-8")
+
+
+def erp_csv(n_items: int, items_per_invoice: int = 10, seed: int = 1) -> bytes:
+    rng = random.Random(seed)
+    lines = [
+        "invoice_number;issue_date;cnpj_emitter;cnpj_recipient;sku;description;"
+        "ncm_code;quantity;unit_price;total_price"
+    ]
+    for i in range(n_items):
+        qty = rng.randint(1, 20)
+        unit = _amount(rng)
+        lines.append(
+            f"INV-{i // items_per_invoice:07d};2026-02-15;11222333000181;44555666000199;"
+            f"SKU-{i:07d};Item {i};22030000;{qty};{unit};{unit * qty}"
+        )
+    return "\n".join(lines).encode("utf-8")
+
+
+def nfe_xml(n_items: int, seed: int = 1) -> bytes:
+    rng = random.Random(seed)
+    dets = []
+    for i in range(n_items):
+        unit = _amount(rng)
+        dets.append(
+            f'<det nItem="{i + 1}"><prod><cProd>SKU-{i:07d}</cProd><xProd>Item {i}</xProd>'
+            f"<NCM>22030000</NCM><qCom>1</qCom><vUnCom>{unit}</vUnCom><vProd>{unit}</vProd></prod></det>"
+        )
+    return (
+        '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe"><NFe><infNFe>'
+        "<ide><nNF>1</nNF><dhEmi>2026-02-15T10:00:00-03:00</dhEmi></ide>"
+        "<emit><CNPJ>11222333000181</CNPJ></emit><dest><CNPJ>44555666000199</CNPJ></dest>"
+        + "".join(dets)
+        + "<total><ICMSTot><vNF>0</vNF></ICMSTot></total></infNFe></NFe></nfeProc>"
+    ).encode("utf-8")
@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.tasks.task_a_validate import _rate_map, _validate_invoice  # noqa: E402
+from app.tasks.task_b_report import _build_report  # noqa: E402
+from app.tasks.task_d_reconciliation import _parse_receivables, _reconcile  # noqa: E402
+from app.tools import validation_tool  # noqa: E402
+from app.tools.erp_connector_tool import import_csv_invoices, import_xml_nfe  # noqa: E402
+
+from . import synthetic  # noqa: E402
+
+REF_DATE = date(2026, 2, 15)
+
+_items = lru_cache(maxsize=None)(synthetic.items)
+_invoices = lru_cache(maxsize=None)(synthetic.invoices)
+
+
+def test_validate_invoice_items(benchmark, scale, monkeypatch) -> None:
+    monkeypatch.setattr(validation_tool, "get_tax_rules", lambda *a, **k: synthetic.RULES)
+    items = _items(scale)
+
+    result = benchmark(validation_tool.validate_invoice_items, "t-1", items, REF_DATE)
+
+    assert result["total_items"] == scale
+    assert result["status"] == "PASS"
+
+
+def test_task_a_calculation(benchmark, scale) -> None:
+    rate_map = _rate_map(synthetic.RULES, REF_DATE)
+    items = _items(scale)
+    declared_cbs = sum((Decimal(it["declared_cbs"]) for it in items), Decimal("0"))
+    declared_ibs = sum((Decimal(it["declared_ibs"]) for it in items), Decimal("0"))
+
+    result = benchmark(
+        _validate_invoice,
+        invoice_number="INV-1",
+        issue_date=REF_DATE.isoformat(),
+        declared_cbs=str(declared_cbs),
+        declared_ibs=str(declared_ibs),
+        items=items,
+        rate_map=rate_map,
+    )
+
+    assert len(result["items"]) == scale
+    assert result["status"] == "PASS"
+
+
+def test_task_b_report(benchmark, scale) -> None:
+    invoices = _invoices(scale)
+
+    report, totals, details = benchmark(
+        _build_report, "ACME", "11222333000181", "2026-02", "20260215T000000Z",
+        synthetic.CBS_RATE, synthetic.IBS_RATE, invoices,
+    )
+
+    assert len(details) == len(invoices)
+
+
+def test_task_d_reconciliation(benchmark, scale) -> None:
+    invoices = _invoices(scale, items_per_invoice=1)
+    csv_bytes = synthetic.receivables_csv(invoices)
+    invoice_map = {inv["invoice_number"]: Decimal(inv["total_amount"]) for inv in invoices}
+
+    def run():
+        return _reconcile(_parse_receivables(csv_bytes), invoice_map, Decimal("0.01"))
+
+    total, matched, exceptions = benchmark(run)
+
+    assert total >= scale
+
+
+def test_erp_csv_import(benchmark, scale) -> None:
+    data = synthetic.erp_csv(scale)
+
+    result = benchmark(import_csv_invoices, data)
+
+    assert sum(len(inv["items"]) for inv in result) == scale
+
+
+def test_erp_nfe_import(benchmark, scale) -> None:
+    data = synthetic.nfe_xml(scale)
+
+    result = benchmark(import_xml_nfe, data)
+
+    assert len(result["items"]) == scale
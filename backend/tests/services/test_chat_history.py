@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable
+from uuid import uuid4
+
+import pytest
+import redis
+
+from app.services import chat_history
+from app.services.chat_history import bump_recent_generation, list_messages, message_entry, push_recent
+
+CID = str(uuid4())
+T0 = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class _FakeRedis:
+    """Just the commands the recent-messages cache uses, with WATCH semantics."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.versions: dict[str, int] = {}
+
+    def _touch(self, key: str) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key: str) -> Any:
+        value = self.data.get(key)
+        return None if value is None else str(value)
+
+    def incr(self, key: str) -> int:
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        self._touch(key)
+        return self.data[key]
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+            self._touch(key)
+
+    def lrange(self, key: str, start: int, end: int) -> list[str]:
+        return list(self.data.get(key, []))[start:end + 1]
+
+    def rpush(self, key: str, *values: str) -> None:
+        self.data.setdefault(key, []).extend(values)
+        self._touch(key)
+
+    def lpushx(self, key: str, value: str) -> None:
+        if key in self.data:
+            self.data[key].insert(0, value)
+            self._touch(key)
+
+    def ltrim(self, key: str, start: int, end: int) -> None:
+        if key in self.data:
+            self.data[key] = self.data[key][start:end + 1]
+
+    def pipeline(self) -> "_FakePipeline":
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, r: _FakeRedis) -> None:
+        self.r = r
+        self.queued: list[Callable[[], Any]] = []
+        self.watched: dict[str, int] = {}
+        self.immediate = False
+
+    def __enter__(self) -> "_FakePipeline":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def watch(self, *keys: str) -> None:
+        self.watched = {k: self.r.versions.get(k, 0) for k in keys}
+        self.immediate = True
+
+    def multi(self) -> None:
+        self.immediate = False
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        command = getattr(self.r, name)
+
+        def call(*args: Any) -> Any:
+            if self.immediate:
+                return command(*args)
+            self.queued.append(lambda: command(*args))
+        return call
+
+    def execute(self) -> list[Any]:
+        if any(self.r.versions.get(k, 0) != v for k, v in self.watched.items()):
+            raise redis.WatchError()
+        return [command() for command in self.queued]
+
+
+def _row(n: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid4(), role="user", content=f"m{n}", metadata={}, created_at=T0 + timedelta(minutes=n),
+    )
+
+
+class _Db:
+    """messages table; `on_read` runs just before the reader's SELECT sees the rows."""
+
+    def __init__(self, rows: list[SimpleNamespace]) -> None:
+        self.rows = rows
+        self.on_read: Callable[[], None] = lambda: None
+
+    def execute(self, stmt: Any, params: dict) -> Any:
+        self.on_read()
+        newest_first = sorted(self.rows, key=lambda r: r.created_at, reverse=True)
+        return SimpleNamespace(fetchall=lambda: newest_first[:params["limit"] + 1])
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> _FakeRedis:
+    fake = _FakeRedis()
+    monkeypatch.setattr(chat_history, "get_redis", lambda: fake)
+    monkeypatch.setattr(chat_history.settings, "CHAT_RECENT_CACHE_SIZE", 10)
+    return fake
+
+
+def _write(db: _Db, new: list[SimpleNamespace]) -> None:
+    """ChatService order: bump generation, commit, then push."""
+    bump_recent_generation(CID)
+    db.rows.extend(new)
+    push_recent(CID, [message_entry(m) for m in new])
+
+
+def _ids(entries: list[dict]) -> list[str]:
+    return [e["id"] for e in entries]
+
+
+@pytest.mark.parametrize("bump", ["after_reader_gen_read", "before_reader_gen_read"])
+def test_reader_racing_a_writer_never_serves_duplicates(fake_redis: _FakeRedis, bump: str) -> None:
+    db = _Db([_row(0), _row(1)])
+    new = [_row(2), _row(3)]
+    if bump == "before_reader_gen_read":
+        bump_recent_generation(CID)
+
+    # The reader has read the generation; the writer commits before the
+    # reader's SELECT, and pushes only after the reader tried to fill.
+    def writer_commits() -> None:
+        db.on_read = lambda: None
+        if bump == "after_reader_gen_read":
+            bump_recent_generation(CID)
+        db.rows.extend(new)
+
+    db.on_read = writer_commits
+    first, _ = list_messages(db, CID, limit=10)   # type: ignore[arg-type]
+    push_recent(CID, [message_entry(m) for m in new])
+
+    expected = _ids([message_entry(r) for r in sorted(db.rows, key=lambda r: r.created_at, reverse=True)])
+    assert _ids(first) == expected
+    again, _ = list_messages(db, CID, limit=10)   # type: ignore[arg-type]
+    assert _ids(again) == expected
+
+
+def test_writer_push_extends_a_cached_conversation(fake_redis: _FakeRedis) -> None:
+    db = _Db([_row(0), _row(1)])
+    list_messages(db, CID, limit=10)         # type: ignore[arg-type]  # fills the cache
+
+    new = [_row(2)]
+    _write(db, new)
+
+    cached = chat_history._recent_get(CID, 10)
+    assert cached is not None
+    assert _ids(cached)[0] == str(new[0].id)
+    assert len(cached) == 3
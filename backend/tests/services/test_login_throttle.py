@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+from passlib.context import CryptContext
+
+from app.core import security
+from app.services import login_throttle as throttle_module
+from app.services.login_throttle import LoginThrottle, client_ip
+
+
+@pytest.fixture
+def throttle(monkeypatch: pytest.MonkeyPatch) -> LoginThrottle:
+    monkeypatch.setattr(throttle_module, "get_redis", lambda: None)
+    monkeypatch.setattr(throttle_module.settings, "LOGIN_MAX_FAILURES_ACCOUNT", 3)
+    monkeypatch.setattr(throttle_module.settings, "LOGIN_MAX_FAILURES_IP", 5)
+    return LoginThrottle()
+
+
+def test_account_locks_after_max_failures_and_resets(throttle: LoginThrottle) -> None:
+    for _ in range(3):
+        throttle.check_or_raise("acme", "a@x.com", "10.0.0.1")
+        throttle.record_failure("acme", "A@x.com ", "10.0.0.1")
+
+    with pytest.raises(HTTPException) as exc:
+        throttle.check_or_raise("acme", "a@x.com", "10.0.0.2")
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) > 0
+
+    throttle.reset("acme", "a@x.com")
+    throttle.check_or_raise("acme", "a@x.com", "10.0.0.2")
+
+
+def test_ip_locks_across_accounts(throttle: LoginThrottle) -> None:
+    for n in range(5):
+        throttle.record_failure("acme", f"user{n}@x.com", "10.0.0.9")
+    with pytest.raises(HTTPException):
+        throttle.check_or_raise("acme", "fresh@x.com", "10.0.0.9")
+    throttle.check_or_raise("acme", "fresh@x.com", "10.0.0.10")
+
+
+def test_outdated_hash_is_upgraded(monkeypatch: pytest.MonkeyPatch) -> None:
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("pw")
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+
+    ok, new_hash = asyncio.run(security.verify_and_update_password("pw", old_hash))
+    assert ok and new_hash and new_hash.startswith("$2b$05$")
+    assert asyncio.run(security.verify_and_update_password("wrong", old_hash)) == (False, None)
+
+
+@pytest.mark.parametrize("peer,forwarded,expected", [
+    ("203.0.113.7", "198.51.100.1", "203.0.113.7"),          # untrusted peer: header ignored
+    ("10.0.0.2", "198.51.100.1", "198.51.100.1"),
+    ("10.0.0.2", "6.6.6.6, 198.51.100.1, 10.0.0.3", "198.51.100.1"),   # spoofed left-most entry
+    ("10.0.0.2", None, "10.0.0.2"),
+])
+def test_client_ip_uses_forwarded_for_only_from_trusted_proxies(
+    monkeypatch: pytest.MonkeyPatch, peer: str, forwarded: str | None, expected: str,
+) -> None:
+    monkeypatch.setattr(throttle_module.settings, "LOGIN_TRUSTED_PROXIES", ["10.0.0.0/8"])
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    request = Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+    assert client_ip(request) == expected
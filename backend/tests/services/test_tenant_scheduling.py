@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+from celery.exceptions import Ignore
+
+from app.celery_app import celery
+from app.services import tenant_scheduling
+from app.services.tenant_scheduling import QUEUE_INTERACTIVE, TenantFairTask, tenant_limit
+from app.tasks.task_a_validate import task_a_validate_cbs_ibs
+from app.tasks.task_b_report import task_b_compliance_report
+
+TENANT = "11111111-1111-1111-1111-111111111111"
+
+
+def test_tasks_are_routed_by_type() -> None:
+    router = celery.amqp.router
+    assert router.route({}, task_a_validate_cbs_ibs.name)["queue"].name == "interactive"
+    assert router.route({}, task_b_compliance_report.name)["queue"].name == "batch"
+
+
+def test_tenant_weight_scales_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(tenant_scheduling.settings, "TENANT_WEIGHTS", {TENANT: 0.5})
+    monkeypatch.setattr(tenant_scheduling.settings, "TENANT_MAX_CONCURRENCY_INTERACTIVE", 4)
+    assert tenant_limit(TENANT, QUEUE_INTERACTIVE) == 2
+    assert tenant_limit("other", QUEUE_INTERACTIVE) == 4
+
+
+def test_task_at_cap_is_requeued_with_same_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent: list[dict] = []
+    monkeypatch.setattr(tenant_scheduling, "acquire_slot", lambda tid, q: None)
+    monkeypatch.setattr(
+        task_a_validate_cbs_ibs, "apply_async",
+        lambda args=None, kwargs=None, **options: sent.append({"kwargs": kwargs, **options}),
+    )
+
+    chord = {"task": "task_a_validate_batch_finalize", "options": {}}
+    task_a_validate_cbs_ibs.push_request(
+        id="job-1", called_directly=False, headers={}, group="group-1", chord=chord,
+    )
+    try:
+        with pytest.raises(Ignore):
+            task_a_validate_cbs_ibs(tenant_id=TENANT, tenant_slug="t", invoice_number="INV-1")
+    finally:
+        task_a_validate_cbs_ibs.pop_request()
+
+    assert sent[0]["task_id"] == "job-1"
+    assert sent[0]["headers"] == {"tenant_requeues": 1}
+    assert sent[0]["kwargs"]["tenant_id"] == TENANT
+    assert (sent[0]["group_id"], sent[0]["chord"]) == ("group-1", chord)    # still counts for its chord
+
+
+def test_requeues_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(tenant_scheduling.TASK_QUEUES, "test_tenant_fair_probe", tenant_scheduling.QUEUE_BATCH)
+    monkeypatch.setattr(tenant_scheduling.settings, "TENANT_REQUEUE_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(tenant_scheduling, "acquire_slot", lambda tid, q: None)
+    monkeypatch.setattr(_probe, "apply_async", lambda *a, **kw: pytest.fail("requeued past the bound"))
+
+    _probe.push_request(id="job-2", called_directly=False, headers={"tenant_requeues": 3})
+    try:
+        assert _probe(tenant_id=TENANT) == {"seen_id": "job-2"}
+    finally:
+        _probe.pop_request()
+
+
+@celery.task(name="test_tenant_fair_probe", bind=True, base=TenantFairTask)
+def _probe(self, tenant_id: str) -> dict:
+    return {"seen_id": self.request.id}
+
+
+def test_worker_request_context_is_kept(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(tenant_scheduling.TASK_QUEUES, "test_tenant_fair_probe", tenant_scheduling.QUEUE_BATCH)
+    monkeypatch.setattr(tenant_scheduling, "acquire_slot", lambda tid, q: "slot")
+    monkeypatch.setattr(tenant_scheduling, "release_slot", lambda tid, q, token: None)
+
+    assert _probe.apply(kwargs={"tenant_id": TENANT}, task_id="job-1").get() == {"seen_id": "job-1"}
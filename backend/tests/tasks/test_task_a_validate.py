@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from celery.app.trace import build_tracer
+from celery.backends.cache import CacheBackend
+from celery.result import AsyncResult
+from kombu.utils.uuid import uuid
+
+from app.celery_app import celery
+from app.services import tenant_scheduling
+from app.tasks import task_a_validate
+from app.tasks.task_a_validate import _audit_entry, _rate_map, _validate_invoice
+from app.tools.audit_chain_tool import GENESIS_HASH, row_hash
+
+TENANT = "11111111-1111-4111-8111-111111111111"
+
+RULES = [
+    {"rule_code": "STD_CBS", "tax_type": "CBS", "rate": 0.1, "valid_from": "2026-03-01", "valid_to": None},
+    {"rule_code": "STD_CBS", "tax_type": "CBS", "rate": 0.0925, "valid_from": "2026-01-01", "valid_to": None},
+    {"rule_code": "STD_IBS", "tax_type": "IBS", "rate": 0.12, "valid_from": "2026-01-01", "valid_to": None},
+]
+
+
+def test_rate_map_picks_rule_valid_on_each_date() -> None:
+    assert _rate_map(RULES, date(2026, 2, 15))[("STD_CBS", "CBS")] == Decimal("0.0925")
+    assert _rate_map(RULES, date(2026, 3, 15))[("STD_CBS", "CBS")] == Decimal("0.1")
+    assert ("STD_CBS", "CBS") not in _rate_map(RULES, date(2025, 12, 31))
+
+
+def test_validate_invoice_and_audit_entry() -> None:
+    result = _validate_invoice(
+        invoice_number="INV-1",
+        issue_date="2026-02-15",
+        declared_cbs="92.50",
+        declared_ibs="120.00",
+        items=[{"sku": "A", "base_amount": "600"}, {"sku": "B", "base_amount": "400"}],
+        rate_map=_rate_map(RULES, date(2026, 2, 15)),
+    )
+    assert result["status"] == "PASS"
+
+    entry = _audit_entry(result)
+    assert entry["action"] == "validation_pass"
+    assert entry["entity_id"] is None
+    assert entry["payload"]["items_count"] == 2
+    assert "items" not in entry["payload"]
+
+
+# ── Batch chord ──────────────────────────────────────────────
+# The chord runs through a fake worker: messages are kept in an outbox and
+# traced as a worker would (non-eager, with the published options as the
+# request), results go to an in-memory cache backend that counts chord
+# parts like the Redis one.
+class _Worker:
+    def __init__(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.outbox: list[tuple[str, tuple, dict, dict]] = []
+        monkeypatch.setattr(celery, "_backend_cache", CacheBackend(app=celery, backend="memory"))
+        monkeypatch.setattr(celery, "send_task", self.send_task)
+
+    def send_task(self, name, args=None, kwargs=None, task_id=None, **options):
+        task_id = task_id or uuid()
+        self.outbox.append((name, tuple(args or ()), dict(kwargs or {}), {**options, "task_id": task_id}))
+        return AsyncResult(task_id, app=celery)
+
+    def run(self) -> list[str]:
+        ran = []
+        while self.outbox:
+            name, args, kwargs, options = self.outbox.pop(0)
+            request = {
+                **(options.get("headers") or {}),     # custom headers are top-level in a worker
+                "id": options["task_id"],
+                "task": name,
+                "group": options.get("group_id"),
+                "group_index": options.get("group_index"),
+                "chord": options.get("chord"),
+                "root_id": options.get("root_id"),
+                "parent_id": options.get("parent_id"),
+                "callbacks": options.get("link"),
+                "errbacks": options.get("link_error"),
+                "headers": options.get("headers"),
+                "delivery_info": {"priority": options.get("priority")},
+            }
+            build_tracer(name, celery.tasks[name], app=celery)(options["task_id"], args, kwargs, request)
+            ran.append(name)
+        return ran
+
+
+@pytest.fixture
+def batch(monkeypatch: pytest.MonkeyPatch):
+    invoices = {
+        f"00000000-0000-4000-8000-00000000000{i}": {
+            "id": f"00000000-0000-4000-8000-00000000000{i}",
+            "invoice_number": f"INV-{i}",
+            "issue_date": "2026-02-15",
+            "declared_cbs": "92.50",
+            "declared_ibs": "120.00",
+            "items": [{"sku": "A", "base_amount": "1000"}],
+        }
+        for i in range(5)
+    }
+    state: dict = {"status": [], "slots": 0, "broken": set(), "audited": [], "counted": {}}
+
+    def load(tenant_id, ids):
+        if state["broken"] & set(ids):
+            raise RuntimeError("invoice store unavailable")
+        return [invoices[i] for i in ids]
+
+    def acquire(tenant_id, queue):
+        state["slots"] += 1
+        return None if state["slots"] == 1 else "slot"     # first chunk finds the tenant at its cap
+
+    monkeypatch.setattr(task_a_validate, "list_invoice_refs", lambda tid, **kw: [
+        {"id": i, "issue_date": inv["issue_date"]} for i, inv in invoices.items()
+    ])
+    monkeypatch.setattr(task_a_validate, "get_tax_rules_window", lambda *a: RULES)
+    monkeypatch.setattr(task_a_validate, "load_invoices_with_items", load)
+    def append(db, tid, entries):
+        # Hash each entry as the real append does; rejects non-UUID entity ids
+        for e in entries:
+            row_hash(
+                GENESIS_HASH, 1, tid, e["action"], e["entity_type"], e["entity_id"], "c",
+                user_id=e.get("user_id"), created_at=datetime.now(timezone.utc),
+            )
+        state["audited"].extend(e["entity_id"] for e in entries)
+        return []
+
+    def increment(job_id, counters, once_key=None, db=None):
+        if once_key in state["counted"]:
+            return False
+        state["counted"][once_key] = counters
+        return True
+
+    monkeypatch.setattr(task_a_validate, "SessionLocal", MagicMock)
+    monkeypatch.setattr(task_a_validate, "append_audit_entries", append)
+    monkeypatch.setattr(task_a_validate, "job_increment_counters", increment)
+    monkeypatch.setattr(task_a_validate, "insert_audit_log", lambda **kw: {"id": "audit-1"})
+    monkeypatch.setattr(
+        task_a_validate, "job_status_update",
+        lambda job_id, status, result=None, error_message=None: state["status"].append(
+            (job_id, status, result or error_message),
+        ),
+    )
+    monkeypatch.setattr(tenant_scheduling, "acquire_slot", acquire)
+    monkeypatch.setattr(tenant_scheduling, "release_slot", lambda tid, q, token: None)
+    monkeypatch.setattr(tenant_scheduling, "requeue_delay", lambda attempt: 0)
+    state["invoices"] = list(invoices)
+    return state
+
+
+def _start_batch(worker: _Worker) -> list[str]:
+    task_a_validate.task_a_validate_batch.apply_async(
+        kwargs={"tenant_id": TENANT, "tenant_slug": "t", "chunk_size": 2}, task_id="parent-job",
+    )
+    return worker.run()
+
+
+def test_batch_finalizes_after_a_requeued_chunk(monkeypatch: pytest.MonkeyPatch, batch: dict) -> None:
+    ran = _start_batch(_Worker(monkeypatch))
+
+    assert ran.count("task_a_validate_chunk") == 4                # 3 chunks, one of them requeued
+    assert ran[-1] == "task_a_validate_batch_finalize"
+    job_id, status, result = batch["status"][-1]
+    assert (job_id, status) == ("parent-job", "SUCCESS")
+    assert (result["chunks"], result["processed"], result["passed"]) == (3, 5, 5)
+    assert sorted(batch["audited"]) == sorted(batch["invoices"])    # audit rows point at the invoices
+    assert sorted(batch["counted"]) == ["chunk-0", "chunk-1", "chunk-2"]
+
+
+def test_redelivered_chunk_is_not_counted_twice(monkeypatch: pytest.MonkeyPatch, batch: dict) -> None:
+    ids = sorted(batch["invoices"])[:2]
+    sessions: list = []
+    monkeypatch.setattr(task_a_validate, "SessionLocal", lambda: sessions.append(MagicMock()) or sessions[-1])
+
+    for _ in range(2):
+        task_a_validate.task_a_validate_chunk.run(
+            tenant_id=TENANT, parent_job_id="parent-job", invoice_ids=ids, rules=RULES, chunk_index=0,
+        )
+
+    assert batch["counted"] == {"chunk-0": {"processed": 2, "passed": 2, "failed": 0, "errors": 0}}
+    assert sessions[0].commit.called and not sessions[0].rollback.called
+    assert sessions[1].rollback.called and not sessions[1].commit.called
+
+
+def test_failed_chunk_fails_the_batch(monkeypatch: pytest.MonkeyPatch, batch: dict) -> None:
+    batch["broken"].add(sorted(batch["invoices"])[-1])
+
+    ran = _start_batch(_Worker(monkeypatch))
+
+    assert "task_a_validate_batch_finalize" not in ran
+    job_id, status, error = batch["status"][-1]
+    assert (job_id, status) == ("parent-job", "FAILED")
+    assert "chunk failed" in error
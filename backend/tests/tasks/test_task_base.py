@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from app.celery_app import celery
+from app.tasks import base
+from app.tasks.base import JobBackedTask
+
+
+@celery.task(name="test_job_backed", bind=True, base=JobBackedTask, result_persisted=True)
+def _job_backed(self, value: str) -> dict:
+    return {"status": "PASS", "value": value, "seen_id": self.request.id}
+
+
+def test_worker_request_context_is_kept() -> None:
+    result = _job_backed.apply(args=("x",), task_id="job-1").get()
+    assert result["seen_id"] == "job-1"
+
+
+def test_ack_mode_stores_only_ack(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(base.settings, "CELERY_RESULT_MODE", "ack")
+
+    assert _job_backed.apply(args=("x",), task_id="job-2").get() == {
+        "ack": True, "job_id": "job-2", "status": "PASS",
+    }
+    # Direct calls (sync API path) still return the full result
+    assert _job_backed("x")["value"] == "x"
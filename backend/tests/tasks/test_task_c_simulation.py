@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from app.tasks.task_c_simulation import _run_scenarios
+
+STD_CBS = Decimal("0.0925")
+STD_IBS = Decimal("0.12")
+
+
+def test_single_base_matches_direct_calculation() -> None:
+    base_scenario, results = _run_scenarios(
+        [{"base": Decimal("1000")}],
+        STD_CBS,
+        STD_IBS,
+        [{"name": "CBS + 2pp", "cbs_rate_override": "0.1125"}],
+    )
+
+    assert base_scenario["cbs_amount"] == "92.50"
+    assert base_scenario["ibs_amount"] == "120.00"
+    assert base_scenario["effective_rate"] == "21.25%"
+    assert results[0]["cbs_amount"] == "112.50"
+    assert results[0]["delta_vs_current"] == "20.00"
+
+
+def test_portfolio_groups_keep_ncm_rates_and_exemptions() -> None:
+    groups = [
+        {"ncm_code": "1001", "items_count": 3, "base": "1000", "ncm_cbs_rate": None,
+         "ncm_ibs_rate": None, "is_exempt": False},
+        {"ncm_code": "2002", "items_count": 2, "base": "500", "ncm_cbs_rate": "0.05",
+         "ncm_ibs_rate": "0.06", "is_exempt": False},
+        {"ncm_code": "3003", "items_count": 1, "base": "200", "ncm_cbs_rate": None,
+         "ncm_ibs_rate": None, "is_exempt": True},
+    ]
+
+    base_scenario, results = _run_scenarios(
+        groups, STD_CBS, STD_IBS, [{"name": "CBS 10%", "cbs_rate_override": "0.10"}],
+    )
+
+    # 1000 * 0.0925 + 500 * 0.05 ; exempt group contributes nothing
+    assert base_scenario["cbs_amount"] == "117.50"
+    assert base_scenario["ibs_amount"] == "150.00"
+    # Override only replaces the standard rate
+    assert results[0]["cbs_amount"] == "125.00"
+    assert results[0]["ibs_amount"] == "150.00"
+
+
+def test_empty_portfolio_does_not_divide_by_zero() -> None:
+    base_scenario, results = _run_scenarios([], STD_CBS, STD_IBS, [{"name": "noop"}])
+
+    assert base_scenario["total_tax"] == "0"
+    assert base_scenario["effective_rate"] == "N/A"
+    assert results[0]["delta_pct"] == "N/A"
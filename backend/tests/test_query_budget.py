@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import query_budget
+from app.core.query_budget import (
+    assert_max_queries,
+    check_budget,
+    install_query_budget,
+    instrument_engine,
+    track_queries,
+)
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+
+
+def _lookup_each(n: int) -> None:
+    with engine.connect() as conn:
+        for i in range(n):
+            conn.execute(text("SELECT :i"), {"i": i})
+
+
+def test_statements_are_counted_per_scope() -> None:
+    with track_queries("GET /x") as stats:
+        _lookup_each(3)
+
+    assert stats.count == 3
+    assert stats.statements == {"SELECT ?": 3}
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(caplog) -> None:
+    with track_queries("GET /x") as stats:
+        _lookup_each(6)
+
+    assert check_budget(stats, "route") == ["repeat"]
+    assert "Possible N+1" in caplog.text
+
+
+def test_assert_max_queries() -> None:
+    with assert_max_queries(2):
+        _lookup_each(2)
+    with pytest.raises(AssertionError, match="3 SQL statements executed, budget 2"):
+        with assert_max_queries(2):
+            _lookup_each(3)
+    with pytest.raises(AssertionError, match="repeated 2 times"):
+        with assert_max_queries(10, max_repeats=1):
+            _lookup_each(2)
+
+
+def test_streamed_response_body_is_counted(monkeypatch) -> None:
+    checked: list[tuple[str, int]] = []
+    monkeypatch.setattr(query_budget, "check_budget", lambda stats, kind: checked.append((stats.scope, stats.count)))
+
+    app = FastAPI()
+    install_query_budget(app)
+
+    @app.get("/stream")
+    def stream():
+        def body():
+            for i in range(3):
+                with engine.connect() as conn:
+                    yield str(conn.execute(text("SELECT :i"), {"i": i}).scalar())
+        return StreamingResponse(body())
+
+    assert TestClient(app).get("/stream").text == "012"
+    assert checked == [("/stream", 3)]
+
+
+def test_assert_max_queries_counts_statements_of_a_request() -> None:
+    app = FastAPI()
+    install_query_budget(app)
+
+    @app.get("/lookup")
+    def lookup():
+        _lookup_each(3)
+        return {}
+
+    with pytest.raises(AssertionError, match="3 SQL statements executed, budget 2"):
+        with assert_max_queries(2):
+            TestClient(app).get("/lookup")
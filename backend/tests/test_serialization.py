@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+from app.core.serialization import CONTENT_TYPE, MSGPACK_EXT, dumps, loads, register_serializers
+
+
+def test_extension_types_round_trip() -> None:
+    payload = {
+        "amount": Decimal("1234.5600"),
+        "id": uuid4(),
+        "issue_date": date(2026, 3, 1),
+        "at": datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc),
+        "items": [{"base_amount": Decimal("10.00"), "sku": "A"}],
+    }
+    assert loads(dumps(payload)) == payload
+
+
+def test_large_bodies_are_compressed() -> None:
+    items = [{"sku": f"SKU-{i % 10}", "base_amount": Decimal("100.00")} for i in range(5000)]
+    encoded = dumps({"items": items})
+    assert encoded[:1] == b"\x01"
+    assert loads(encoded)["items"] == items
+    assert dumps({"items": items[:2]})[:1] == b"\x00"
+
+
+def test_registered_with_kombu() -> None:
+    register_serializers()
+    content_type, encoding, body = kombu_dumps(((), {"a": Decimal("1")}, {}), serializer=MSGPACK_EXT)
+    assert content_type == CONTENT_TYPE
+    assert kombu_loads(body, content_type, encoding) == [[], {"a": Decimal("1")}, {}]
@@ -0,0 +1,37 @@
+"""Cold-start guard: importing the API must not pull in worker-only dependencies."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+# Loaded on first use (task triggers, S3 offload, HubSpot), never at import
+DEFERRED_MODULES = ["celery", "kombu", "boto3", "botocore", "httpx", "msgpack", "app.celery_app"]
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3.0"))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main  # noqa: F401
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _probe() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % (DEFERRED_MODULES,)],
+        cwd=BACKEND_ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_api_import_defers_worker_dependencies_and_fits_budget() -> None:
+    result = _probe()
+
+    assert result["loaded"] == []
+    assert result["elapsed"] < STARTUP_BUDGET_SECONDS
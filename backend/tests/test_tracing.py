@@ -0,0 +1,46 @@
+import importlib.util
+
+import pytest
+
+from app.celery_app import celery
+from app.config import settings
+from app.core import tracing
+from app.tasks.base import JobBackedTask
+
+
+@celery.task(name="test_traced_job", base=JobBackedTask)
+def _traced_job(tenant_id: str) -> str:
+    return "done"
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("opentelemetry") is not None,
+    reason="checks the missing-package fallback",
+)
+def test_tracing_degrades_without_opentelemetry(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "OTEL_ENABLED", True)
+    monkeypatch.setattr(tracing, "_configured", False)
+
+    tracing.setup_tracing("test")
+    tracing.annotate_span(job_id="j-1")
+
+    assert tracing._configured is False
+
+
+def test_job_tasks_annotate_the_current_span(monkeypatch) -> None:
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_configured", True)      # as after setup_tracing()
+
+    with provider.get_tracer("test").start_as_current_span("run/test_traced_job"):
+        assert _traced_job.apply(kwargs={"tenant_id": "t-1"}, task_id="job-1").get() == "done"
+
+    (span,) = exporter.get_finished_spans()
+    assert span.attributes["tribultz.job_id"] == "job-1"
+    assert span.attributes["tribultz.tenant_id"] == "t-1"
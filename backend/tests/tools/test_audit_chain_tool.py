@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+import pytest
+
+from app.tools.audit_chain_tool import (
+    GENESIS_HASH,
+    _verify_rows,
+    audit_checksum,
+    merkle_root,
+    row_hash,
+)
+
+TENANT = "11111111-1111-1111-1111-111111111111"
+USER = "22222222-2222-2222-2222-222222222222"
+T0 = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def _chain(n: int) -> list[SimpleNamespace]:
+    rows, prev = [], GENESIS_HASH
+    for seq in range(1, n + 1):
+        payload = {"n": seq, "status": "PASS"}
+        checksum = audit_checksum(payload)
+        link = row_hash(
+            prev, seq, TENANT, "validate", "invoice", None, checksum, user_id=USER, created_at=T0,
+        )
+        rows.append(SimpleNamespace(
+            id=f"row-{seq}", chain_seq=seq, prev_hash=prev, row_hash=link,
+            user_id=UUID(USER), action="validate", entity_type="invoice", entity_id=None,
+            created_at=T0, payload={**payload, "_checksum": checksum},
+        ))
+        prev = link
+    return rows
+
+
+def test_checksum_is_key_order_independent():
+    assert audit_checksum({"a": 1, "b": [1, 2]}) == audit_checksum({"b": [1, 2], "a": 1})
+
+
+def test_intact_chain_verifies():
+    assert _verify_rows(TENANT, GENESIS_HASH, 1, _chain(5)) is None
+
+
+def test_reports_first_broken_link():
+    rows = _chain(5)
+    rows[2].payload["status"] = "FAIL"
+    rows[3].payload["status"] = "FAIL"
+    assert _verify_rows(TENANT, GENESIS_HASH, 1, rows) == {
+        "chain_seq": 3, "id": "row-3", "reason": "payload_checksum",
+    }
+
+
+@pytest.mark.parametrize("field, value", [
+    ("user_id", UUID("33333333-3333-3333-3333-333333333333")),
+    ("user_id", None),
+    ("created_at", T0 + timedelta(days=1)),
+])
+def test_detects_rewritten_author_or_time(field, value):
+    rows = _chain(3)
+    setattr(rows[1], field, value)
+    assert _verify_rows(TENANT, GENESIS_HASH, 1, rows) == {
+        "chain_seq": 2, "id": "row-2", "reason": "row_hash",
+    }
+
+
+def test_detects_deleted_row():
+    rows = _chain(5)
+    del rows[1]
+    assert _verify_rows(TENANT, GENESIS_HASH, 1, rows)["reason"] == "missing_row"
+
+
+def test_merkle_root_depends_on_order():
+    hashes = [r.row_hash for r in _chain(3)]
+    assert merkle_root(hashes) != merkle_root(list(reversed(hashes)))
+    assert merkle_root([]) == GENESIS_HASH
+
+
+def test_row_hash_uses_canonical_uuids():
+    entity = UUID("0b6f3c52-5d2c-4a57-9f0e-1f4f0c6b2a11")
+    canonical = row_hash(
+        GENESIS_HASH, 1, TENANT, "validate", "invoice", str(entity), "c", user_id=USER, created_at=T0,
+    )
+    for spelling in (entity, entity.hex, f"{{{str(entity).upper()}}}"):
+        assert row_hash(
+            GENESIS_HASH, 1, TENANT, "validate", "invoice", spelling, "c",
+            user_id=USER.replace("-", ""), created_at=T0.astimezone(timezone(timedelta(hours=-3))),
+        ) == canonical
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.tools import job_progress_tool
+from app.tools.job_progress_tool import ProgressReporter
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.writes: list[dict] = []
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.writes.append(json.loads(value))
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(job_progress_tool.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_updates_are_coalesced(monkeypatch: pytest.MonkeyPatch, clock: list[float]) -> None:
+    fake = _FakeRedis()
+    persisted: list[dict] = []
+    monkeypatch.setattr(job_progress_tool, "get_redis", lambda: fake)
+    monkeypatch.setattr(job_progress_tool, "_persist", lambda job_id, p: persisted.append(p))
+
+    reporter = ProgressReporter("job-1", total=1000, phase="validating")
+    for _ in range(500):                 # 500 items within the same second
+        reporter.update(advance=1)
+    clock[0] += 1.5
+    reporter.update(advance=1)
+    reporter.finish()
+
+    assert len(fake.writes) == 3         # first update, after 1s, finish
+    assert len(persisted) == 2           # first update, finish
+    assert persisted[-1]["processed"] == 1000
+    assert persisted[-1]["phase"] == "done"
+    assert fake.writes[1]["percent"] == 50.1
+    assert fake.writes[1]["eta"] is not None
+
+
+def test_reporter_without_job_is_noop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(job_progress_tool, "get_redis", lambda: pytest.fail("no redis"))
+    ProgressReporter(None, total=3).update(advance=1)
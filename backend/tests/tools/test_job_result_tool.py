@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import gzip
+import json
+from hashlib import sha256
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.tools import job_result_tool, postgres_tool, s3_tool
+
+
+def test_small_results_stay_inline() -> None:
+    result = {"status": "PASS", "items": [{"sku": "A"}]}
+    assert job_result_tool.offload_if_large("job-1", "tenant-1", result) is result
+
+
+def _fake_s3(monkeypatch) -> dict[str, bytes]:
+    stored: dict[str, bytes] = {}
+
+    def fake_put_object(key, data, **kwargs):
+        stored[key] = data
+        return {"key": key, "checksum_sha256": sha256(data).hexdigest(), "size_bytes": len(data)}
+
+    def fake_get_object_stream(key, **kwargs):
+        data = stored[key]
+        for i in range(0, len(data), 1000):
+            yield data[i:i + 1000]
+
+    monkeypatch.setattr(settings, "JOB_RESULT_INLINE_MAX_BYTES", 1024)
+    monkeypatch.setattr(s3_tool, "put_object", fake_put_object)
+    monkeypatch.setattr(s3_tool, "get_object_stream", fake_get_object_stream)
+    return stored
+
+
+def test_large_results_are_offloaded_and_stream_back(monkeypatch) -> None:
+    _fake_s3(monkeypatch)
+    result = {
+        "status": "FAIL",
+        "invoice_number": "INV-1",
+        "items": [{"sku": f"SKU-{i}", "cbs_amount": "9.25"} for i in range(500)],
+    }
+    pointer = job_result_tool.offload_if_large("job-2", "tenant-1", result)
+
+    assert job_result_tool.is_offloaded(pointer)
+    assert pointer["storage_key"] == "job-results/tenant-1/job-2.json.gz"
+    assert pointer["summary"] == {"status": "FAIL", "invoice_number": "INV-1", "items_count": 500}
+    assert pointer["compressed_bytes"] < pointer["size_bytes"]
+
+    body = b"".join(job_result_tool.stream_offloaded_result(pointer))
+    assert json.loads(body) == result
+    assert sha256(body).hexdigest() == pointer["checksum_sha256"]
+
+
+def test_checksum_mismatch_is_not_served_in_full(monkeypatch) -> None:
+    stored = _fake_s3(monkeypatch)
+    pointer = job_result_tool.offload_if_large("job-3", "tenant-1", {"items": ["x" * 40] * 200})
+    stored[pointer["storage_key"]] = gzip.compress(b'{"items": []}')
+
+    body = b""
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        for chunk in job_result_tool.stream_offloaded_result(pointer):
+            body += chunk
+    assert body == b""                          # last (here: only) chunk withheld
+
+
+class _Session:
+    """Records statements and whether a transaction is open (autobegin, like SQLAlchemy)."""
+
+    def __init__(self, log: list[str]) -> None:
+        self.log = log
+        self.in_tx = False
+
+    def execute(self, stmt, params=None):
+        self.in_tx = True
+        sql = str(stmt).strip()
+        self.log.append(sql.split()[0])
+        assert "FOR UPDATE" not in sql
+        row = SimpleNamespace(
+            tenant_id="tenant-1", id="job-4", status="SUCCESS", updated_at=SimpleNamespace(isoformat=lambda: "t"),
+        )
+        return SimpleNamespace(fetchone=lambda: row)
+
+    def rollback(self) -> None:
+        self.in_tx = False
+        self.log.append("ROLLBACK")
+
+    def commit(self) -> None:
+        self.in_tx = False
+        self.log.append("COMMIT")
+
+    def close(self) -> None:
+        pass
+
+
+def test_result_is_uploaded_outside_any_transaction(monkeypatch) -> None:
+    stored = _fake_s3(monkeypatch)
+    log: list[str] = []
+    session = _Session(log)
+    put = s3_tool.put_object
+
+    def put_outside_tx(key, data, **kwargs):
+        assert not session.in_tx, "S3 upload ran inside a DB transaction"
+        log.append("PUT")
+        return put(key, data, **kwargs)
+
+    monkeypatch.setattr(s3_tool, "put_object", put_outside_tx)
+    monkeypatch.setattr(postgres_tool, "_session", lambda: session)
+
+    postgres_tool.job_status_update("job-4", "SUCCESS", result={"items": ["x" * 40] * 200})
+
+    assert log[:5] == ["SELECT", "ROLLBACK", "PUT", "UPDATE", "COMMIT"]
+    assert "job-results/tenant-1/job-4.json.gz" in stored
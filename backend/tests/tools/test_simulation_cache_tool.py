@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.tools.simulation_cache_tool import simulation_fingerprint
+
+RULES = [
+    {
+        "rule_code": "STD_CBS",
+        "tax_type": "CBS",
+        "rate": 0.0925,
+        "valid_from": "2026-01-01",
+        "valid_to": None,
+        "updated_at": "2026-01-01T00:00:00+00:00",
+    },
+    {
+        "rule_code": "STD_IBS",
+        "tax_type": "IBS",
+        "rate": 0.12,
+        "valid_from": "2026-01-01",
+        "valid_to": None,
+        "updated_at": "2026-01-01T00:00:00+00:00",
+    },
+]
+
+SCENARIOS = [
+    {"name": "CBS + 2pp", "cbs_rate_override": "0.1125", "ibs_rate_override": None},
+    {"name": "IBS - 1pp", "cbs_rate_override": None, "ibs_rate_override": "0.11"},
+]
+
+
+def _fp(**overrides) -> str:
+    kwargs = {
+        "base_inputs": {"base_amount": "1000"},
+        "scenarios": SCENARIOS,
+        "rules": RULES,
+        "ref_date": date(2026, 3, 1),
+    }
+    kwargs.update(overrides)
+    return simulation_fingerprint(**kwargs)
+
+
+def test_fingerprint_ignores_numeric_formatting_and_rule_order() -> None:
+    reformatted = [
+        {**SCENARIOS[0], "cbs_rate_override": "0.11250"},
+        SCENARIOS[1],
+    ]
+    assert _fp() == _fp(scenarios=reformatted, rules=list(reversed(RULES)))
+
+
+def test_fingerprint_changes_when_rules_change() -> None:
+    updated = [{**RULES[0], "updated_at": "2026-02-01T00:00:00+00:00"}, RULES[1]]
+    rerated = [{**RULES[0], "rate": 0.1}, RULES[1]]
+    assert _fp(rules=updated) != _fp()
+    assert _fp(rules=rerated) != _fp()
+
+
+def test_fingerprint_depends_on_inputs_and_scenario_order() -> None:
+    assert _fp(base_inputs={"base_amount": "1001"}) != _fp()
+    assert _fp(ref_date=date(2026, 3, 2)) != _fp()
+    assert _fp(scenarios=list(reversed(SCENARIOS))) != _fp()
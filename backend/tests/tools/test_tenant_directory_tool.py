@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from app.tools import tenant_directory_tool as directory
+
+TENANT = {"id": "11111111-1111-1111-1111-111111111111", "slug": "acme", "is_active": True}
+
+
+@pytest.fixture
+def loads(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+
+    def fake_load(db, where, value):
+        calls.append(value)
+        return dict(TENANT) if value in (TENANT["id"], TENANT["slug"]) else None
+
+    monkeypatch.setattr(directory, "get_redis", lambda: None)
+    monkeypatch.setattr(directory, "_load", fake_load)
+    monkeypatch.setattr(directory, "_local", {})
+    return calls
+
+
+def test_lookup_by_slug_also_fills_id(loads: list[str]) -> None:
+    assert directory.get_tenant_by_slug("acme") == TENANT
+    assert directory.get_tenant_by_slug("acme") == TENANT
+    assert directory.get_tenant_slug(TENANT["id"]) == "acme"
+    assert loads == ["acme"]
+
+
+def test_misses_are_not_cached(loads: list[str]) -> None:
+    assert directory.get_tenant_by_slug("nope") is None
+    assert directory.get_tenant_by_slug("nope") is None
+    assert loads == ["nope", "nope"]
+
+
+def test_invalidate_forces_reload(loads: list[str]) -> None:
+    directory.get_tenant_by_id(TENANT["id"])
+    directory.invalidate_tenant(TENANT["id"], "acme")
+    directory.get_tenant_by_id(TENANT["id"])
+    directory.get_tenant_by_slug("acme")
+    assert loads == [TENANT["id"], TENANT["id"]]
@@ -114,6 +114,7 @@ CREATE TABLE IF NOT EXISTS invoices (
 
 CREATE INDEX IF NOT EXISTS idx_invoices_tenant  ON invoices(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_invoices_company ON invoices(tenant_id, company_id);
+CREATE INDEX IF NOT EXISTS idx_invoices_company_issue_date ON invoices(tenant_id, company_id, issue_date);
 
 -- ------------------------------------------------------------
 -- 7. Invoice Items (itens da nota)
@@ -163,18 +164,98 @@ CREATE INDEX IF NOT EXISTS idx_tax_credits_company ON tax_credits(tenant_id, com
 -- 9. Audit Log
 -- ------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS audit_log (
-    id          UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id          UUID          NOT NULL DEFAULT gen_random_uuid(),
     tenant_id   UUID          NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
     user_id     UUID          REFERENCES users(id) ON DELETE SET NULL,
     action      VARCHAR(100)  NOT NULL,
     entity_type VARCHAR(100),
     entity_id   UUID,
     payload     JSONB,
-    created_at  TIMESTAMPTZ   NOT NULL DEFAULT now()
-);
+    created_at  TIMESTAMPTZ   NOT NULL DEFAULT now(),
+    chain_seq   BIGINT,
+    prev_hash   CHAR(64),
+    row_hash    CHAR(64),
+    payload_invoice_number TEXT GENERATED ALWAYS AS (payload->>'invoice_number') STORED,
+    payload_status         TEXT GENERATED ALWAYS AS (payload->>'status') STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT;
 
-CREATE INDEX IF NOT EXISTS idx_audit_log_tenant ON audit_log(tenant_id);
+-- Monthly partitions (audit_log_pYYYYMM); Celery beat keeps creating them ahead
+DO $$
+DECLARE
+    m          date := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'audit_log_p' || to_char(m, 'YYYYMM'),
+            m::text || ' 00:00:00+00',
+            (m + interval '1 month')::date::text || ' 00:00:00+00'
+        );
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_tenant_created ON audit_log(tenant_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_audit_log_entity ON audit_log(entity_type, entity_id);
+CREATE INDEX IF NOT EXISTS idx_audit_log_chain ON audit_log(tenant_id, chain_seq)
+    WHERE chain_seq IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_audit_log_payload ON audit_log USING gin (payload jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_audit_log_invoice_number
+    ON audit_log(tenant_id, payload_invoice_number, created_at DESC)
+    WHERE payload_invoice_number IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_audit_log_status
+    ON audit_log(tenant_id, payload_status, created_at DESC)
+    WHERE payload_status IS NOT NULL;
+
+-- Per-tenant hash chain head (locked FOR UPDATE by every audit writer)
+CREATE TABLE IF NOT EXISTS audit_chain_heads (
+    tenant_id  UUID PRIMARY KEY REFERENCES tenants(id) ON DELETE CASCADE,
+    last_seq   BIGINT      NOT NULL DEFAULT 0,
+    last_hash  CHAR(64)    NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Merkle checkpoints: verification resumes after the latest seq_to
+CREATE TABLE IF NOT EXISTS audit_checkpoints (
+    id          UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id   UUID        NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    seq_from    BIGINT      NOT NULL,
+    seq_to      BIGINT      NOT NULL,
+    merkle_root CHAR(64)    NOT NULL,
+    head_hash   CHAR(64)    NOT NULL,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_audit_checkpoints_tenant ON audit_checkpoints(tenant_id, seq_to DESC);
+
+-- ------------------------------------------------------------
+-- 10. Jobs (async task tracking)
+-- ------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS jobs (
+    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id       UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    job_type        VARCHAR(100) NOT NULL,
+    status          VARCHAR(30)  NOT NULL DEFAULT 'QUEUED',
+    idempotency_key VARCHAR(200),
+    payload         JSONB NOT NULL DEFAULT '{}',
+    result          JSONB,
+    error_message   TEXT,
+    progress        JSONB,
+    created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    updated_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    UNIQUE (tenant_id, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(tenant_id, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant_created
+    ON jobs(tenant_id, created_at DESC, id DESC) INCLUDE (status, job_type, updated_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant_status_created
+    ON jobs(tenant_id, status, created_at DESC, id DESC) INCLUDE (job_type, updated_at);
 
 -- ============================================================
 -- SEED DATA
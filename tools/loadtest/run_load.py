@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Load harness for the Tribultz API.
+
+Virtual users log in once, then loop over a weighted mix of scenarios
+(chat, synchronous validation, async Task A + job polling, job listing)
+until --duration elapses.  Reports throughput and latency percentiles per
+endpoint to reports/load_report.md (and --json).
+
+Targets:
+  * --base-url http://localhost:8000   the stack from infra/docker-compose.yml
+  * --in-process                       the FastAPI app via httpx's ASGI transport,
+                                       Celery tasks run eagerly (no broker/worker);
+                                       still needs Postgres at DATABASE_URL
+
+Local stand-ins (never production):
+    docker compose -f infra/docker-compose.yml up -d db redis minio
+    python tools/loadtest/run_load.py --in-process --seed --users 50 --duration 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from seed import DEFAULT_PASSWORD, LOADTEST_PREFIX, backend_on_path, seed
+
+REPORT = Path("reports/load_report.md")
+
+DEFAULT_MIX = {"chat": 2, "validate": 4, "task_async": 2, "jobs_list": 2}
+TERMINAL = {"SUCCESS", "FAILED", "CANCELLED"}
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> list[dict]:
+        rows = []
+        for name in sorted(self.latencies):
+            samples = sorted(self.latencies[name])
+            rows.append({
+                "name": name,
+                "count": len(samples),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                **{f"p{p}_ms": round(percentile(samples, p) * 1000, 1) for p in (50, 90, 95, 99)},
+                "max_ms": round(samples[-1] * 1000, 1),
+            })
+        return rows
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, round(p / 100 * len(sorted_samples) + 0.5) - 1))
+    return sorted_samples[rank]
+
+
+def parse_mix(raw: str | None) -> dict[str, int]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown scenario '{name}' (known: {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+# ── Scenarios ─────────────────────────────────────────────────
+def invoice(rng: random.Random, n_items: int) -> dict:
+    items, cbs, ibs = [], 0.0, 0.0
+    for i in range(n_items):
+        base = round(rng.uniform(10, 5000), 2)
+        cbs += round(base * 0.0925, 2)
+        ibs += round(base * 0.12, 2)
+        items.append({"sku": f"SKU-{i}", "description": f"Item {i}", "base_amount": f"{base:.2f}"})
+    return {
+        "invoice_number": f"INV-LT-{rng.randint(1, 10**9)}",
+        "issue_date": "2026-02-15",
+        "declared_cbs": f"{cbs:.2f}",
+        "declared_ibs": f"{ibs:.2f}",
+        "items": items,
+    }
+
+
+async def timed(stats: Stats, name: str, coro) -> httpx.Response | None:
+    started = time.perf_counter()
+    try:
+        r = await coro
+    except httpx.HTTPError:
+        stats.record(name, time.perf_counter() - started, False)
+        return None
+    stats.record(name, time.perf_counter() - started, r.status_code < 400)
+    return r
+
+
+async def scenario_chat(client, headers, stats, rng, args) -> None:
+    msg = {"message": f"validar nota INV-{rng.randint(1, 99999)}"}
+    await timed(stats, "POST /api/v1/chat/message", client.post("/api/v1/chat/message", json=msg, headers=headers))
+
+
+async def scenario_validate(client, headers, stats, rng, args) -> None:
+    body = {"company_id": "loadtest", **invoice(rng, args.items)}
+    await timed(stats, "POST /validate/cbs-ibs", client.post("/validate/cbs-ibs", json=body, headers=headers))
+
+
+async def scenario_task_async(client, headers, stats, rng, args) -> None:
+    started = time.perf_counter()
+    body = {**invoice(rng, args.items), "async_mode": True}
+    r = await timed(stats, "POST /api/v1/tasks/validate", client.post("/api/v1/tasks/validate", json=body, headers=headers))
+    if r is None or r.status_code >= 400:
+        return
+    job_id = r.json().get("job_id")
+    status = ""
+    for _ in range(args.max_polls):
+        p = await timed(stats, "GET /api/v1/jobs/{job_id}", client.get(f"/api/v1/jobs/{job_id}", headers=headers))
+        status = p.json().get("status", "") if p is not None and p.status_code == 200 else ""
+        if status in TERMINAL:
+            break
+        await asyncio.sleep(args.poll_interval)
+    stats.record("job end-to-end", time.perf_counter() - started, status == "SUCCESS")
+
+
+async def scenario_jobs_list(client, headers, stats, rng, args) -> None:
+    await timed(stats, "GET /api/v1/jobs", client.get("/api/v1/jobs", params={"limit": 20}, headers=headers))
+
+
+SCENARIOS = {
+    "chat": scenario_chat,
+    "validate": scenario_validate,
+    "task_async": scenario_task_async,
+    "jobs_list": scenario_jobs_list,
+}
+
+
+async def virtual_user(n: int, client: httpx.AsyncClient, account: dict, stats: Stats, deadline: float, mix: dict, args) -> None:
+    rng = random.Random(args.seed_value + n)
+    r = await timed(stats, "POST /api/v1/auth/login", client.post("/api/v1/auth/login", json=account))
+    if r is None or r.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        await SCENARIOS[rng.choices(names, weights)[0]](client, headers, stats, rng, args)
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+# ── Runner ────────────────────────────────────────────────────
+def make_client(args) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    if not args.in_process:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+    backend_on_path()
+    from app.celery_app import celery
+    from app.main import app
+
+    celery.conf.task_always_eager = True          # tasks run inline: no broker, no worker
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+
+
+async def run(args, accounts: list[dict], mix: dict) -> tuple[Stats, float]:
+    stats = Stats()
+    async with make_client(args) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = [
+            virtual_user(n, client, accounts[n % len(accounts)], stats, deadline, mix, args)
+            for n in range(args.users)
+        ]
+        await asyncio.gather(*users)
+        return stats, time.monotonic() - started
+
+
+def write_report(rows: list[dict], args, elapsed: float) -> None:
+    REPORT.parent.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+    target = "in-process (ASGI)" if args.in_process else args.base_url
+    total = sum(r["count"] for r in rows)
+    lines = [
+        "# Load Test Report — Tribultz\n",
+        f"**Generated:** {ts}  ",
+        f"**Target:** {target}  ",
+        f"**Virtual users:** {args.users} for {elapsed:.0f}s  ",
+        f"**Throughput:** {total / elapsed:.1f} req/s\n" if elapsed else "",
+        "| Endpoint | Requests | Errors | req/s | p50 ms | p90 ms | p95 ms | p99 ms | max ms |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {r['name']} | {r['count']} | {r['errors']} | {r['rps']} | {r['p50_ms']} | "
+            f"{r['p90_ms']} | {r['p95_ms']} | {r['p99_ms']} | {r['max_ms']} |"
+        )
+    REPORT.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    target = ap.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000")
+    target.add_argument("--in-process", action="store_true")
+    ap.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds")
+    ap.add_argument("--mix", default=None, help="e.g. chat=1,validate=5,task_async=2,jobs_list=2")
+    ap.add_argument("--items", type=int, default=5, help="items per synthetic invoice")
+    ap.add_argument("--think-time", type=float, default=0.0, help="mean pause between actions (s)")
+    ap.add_argument("--poll-interval", type=float, default=0.5)
+    ap.add_argument("--max-polls", type=int, default=60)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", action="store_true", help="seed tenants/users/rules first (needs DATABASE_URL)")
+    ap.add_argument("--tenants", type=int, default=10)
+    ap.add_argument("--users-per-tenant", type=int, default=5)
+    ap.add_argument("--password", default=DEFAULT_PASSWORD)
+    ap.add_argument("--seed-value", type=int, default=42, help="RNG seed for payloads")
+    ap.add_argument("--json", type=Path, default=None, help="also write raw summary JSON")
+    args = ap.parse_args()
+
+    mix = parse_mix(args.mix)
+    if args.seed:
+        accounts = seed(args.tenants, args.users_per_tenant, args.password)
+    else:
+        accounts = [
+            {"tenant_slug": f"{LOADTEST_PREFIX}{t:03d}", "email": f"user{u}@loadtest.local", "password": args.password}
+            for t in range(args.tenants) for u in range(args.users_per_tenant)
+        ]
+
+    stats, elapsed = asyncio.run(run(args, accounts, mix))
+    rows = stats.summary(elapsed)
+    write_report(rows, args, elapsed)
+    if args.json:
+        args.json.write_text(json.dumps({"elapsed": elapsed, "endpoints": rows}, indent=2), encoding="utf-8")
+    for r in rows:
+        print(f"{r['name']:<36} n={r['count']:<6} err={r['errors']:<4} p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+    print(f"Wrote {REPORT}")
+    return 0 if not stats.errors else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Seed load-test tenants, users and tax rules into the database pointed to
+by DATABASE_URL (local Postgres container — never production).
+
+    python tools/loadtest/seed.py --tenants 20 --users-per-tenant 5
+
+Idempotent: tenants are `loadtest-NNN`, users `userN@loadtest.local`,
+all with the password given by --password.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+LOADTEST_PREFIX = "loadtest-"
+DEFAULT_PASSWORD = "loadtest-pw"
+
+RULES = [
+    ("STD_CBS", "CBS", "0.0925"),
+    ("STD_IBS", "IBS", "0.1200"),
+]
+
+
+def backend_on_path() -> None:
+    backend = Path(__file__).resolve().parents[2] / "backend"
+    if str(backend) not in sys.path:
+        sys.path.insert(0, str(backend))
+
+
+def seed(tenants: int, users_per_tenant: int, password: str) -> list[dict]:
+    """Upsert the load-test population; returns [{tenant_slug, email, password}]."""
+    backend_on_path()
+    from sqlalchemy import text
+
+    from app.core.security import get_password_hash
+    from app.database import SessionLocal
+    from app.tools.tenant_directory_tool import invalidate_tenant
+
+    password_hash = get_password_hash(password)   # one bcrypt round for everyone
+    accounts: list[dict] = []
+    seeded: list[tuple] = []
+    db = SessionLocal()
+    try:
+        for t in range(tenants):
+            slug = f"{LOADTEST_PREFIX}{t:03d}"
+            tenant_id = db.execute(
+                text("""
+                    INSERT INTO tenants (name, slug) VALUES (:name, :slug)
+                    ON CONFLICT (slug) DO UPDATE SET is_active = TRUE
+                    RETURNING id
+                """),
+                {"name": f"Load Test {t:03d}", "slug": slug},
+            ).scalar_one()
+            seeded.append((tenant_id, slug))
+            for code, tax_type, rate in RULES:
+                db.execute(
+                    text("""
+                        INSERT INTO tax_rules (tenant_id, rule_code, description, tax_type, rate, valid_from)
+                        VALUES (:tid, :code, 'load test', :tax_type, :rate, DATE '2026-01-01')
+                        ON CONFLICT (tenant_id, rule_code, valid_from) DO NOTHING
+                    """),
+                    {"tid": tenant_id, "code": code, "tax_type": tax_type, "rate": rate},
+                )
+            for u in range(users_per_tenant):
+                email = f"user{u}@loadtest.local"
+                db.execute(
+                    text("""
+                        INSERT INTO users (tenant_id, email, full_name, password_hash)
+                        VALUES (:tid, :email, :name, :hash)
+                        ON CONFLICT (tenant_id, email)
+                        DO UPDATE SET password_hash = EXCLUDED.password_hash, is_active = TRUE
+                    """),
+                    {"tid": tenant_id, "email": email, "name": f"Load User {u}", "hash": password_hash},
+                )
+                accounts.append({"tenant_slug": slug, "email": email, "password": password})
+        db.commit()
+    finally:
+        db.close()
+    for tenant_id, slug in seeded:                # is_active may have flipped back on
+        invalidate_tenant(str(tenant_id), slug)
+    return accounts
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tenants", type=int, default=10)
+    ap.add_argument("--users-per-tenant", type=int, default=5)
+    ap.add_argument("--password", default=DEFAULT_PASSWORD)
+    ap.add_argument("--out", type=Path, default=None, help="write the account list as JSON")
+    args = ap.parse_args()
+
+    accounts = seed(args.tenants, args.users_per_tenant, args.password)
+    if args.out:
+        args.out.write_text(json.dumps(accounts, indent=2), encoding="utf-8")
+    print(f"Seeded {args.tenants} tenants / {len(accounts)} users")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
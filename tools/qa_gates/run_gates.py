@@ -2,14 +2,26 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import inspect
+import json
+import os
+import platform
 import subprocess
 import sys
-from dataclasses import dataclass
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterator
 
 REPORT = Path("reports/qa_gates_report.md")
+BENCH_DIR = Path("tests/benchmarks")                   # relative to backend root
+BENCH_BASELINES = BENCH_DIR / "baselines"
+CACHE_DIR = Path(".qa_gates_cache")
+IMPORTTIME_REPORT = Path("reports/importtime_report.md")
 
 def sh(cmd: list[str], cwd: Path | None = None) -> tuple[int, str]:
     try:
@@ -54,6 +66,8 @@ class SubGate:
     name: str
     ok: bool
     detail: str = ""
+    skipped: bool = False                     # could not be evaluated here; does not fail the gate
+    advisory: bool = False                    # reported, but does not fail the gate
 
 def http_contract_security_gates(backend_root: Path, strict: bool) -> tuple[bool, list[SubGate]]:
     subs: list[SubGate] = []
@@ -188,9 +202,440 @@ def http_contract_security_gates(backend_root: Path, strict: bool) -> tuple[bool
         return ok_all, subs
     return ok_all, subs
 
+BENCH_OPTIONS = ["--benchmark-only", "--benchmark-warmup=on", "--benchmark-min-rounds=20"]
+BASE_REF_PAIRS = 2   # merge-base/HEAD runs interleaved, fastest of each kept
+MACHINE_FIELDS = ("system", "machine", "python_implementation", "python_version")
+CPU_FIELDS = ("brand_raw", "count")
+
+def machine_id() -> str:
+    """Same key pytest-benchmark uses for its storage folders."""
+    bits = platform.architecture()[0]
+    return f"{platform.system()}-{platform.python_implementation()}-{'.'.join(platform.python_version_tuple()[:2])}-{bits}"
+
+def latest_baseline(backend_root: Path, explicit: Path | None) -> Path | None:
+    """Newest baseline recorded under this machine id (never one from another machine)."""
+    if explicit:
+        return explicit if explicit.exists() else None
+    own = sorted((backend_root / BENCH_BASELINES / machine_id()).glob("*.json"))
+    return own[-1] if own else None
+
+def machine_key(data: dict) -> dict[str, object]:
+    """The machine_info fields two runs must share for their timings to be comparable."""
+    info = data.get("machine_info", {})
+    cpu = info.get("cpu", {})
+    return {**{k: info.get(k) for k in MACHINE_FIELDS}, **{f"cpu.{k}": cpu.get(k) for k in CPU_FIELDS}}
+
+def benchmark_stats(data: dict) -> dict[str, dict[str, float]]:
+    return {
+        b["name"]: {k: float(b["stats"][k]) for k in ("median", "q1", "q3")}
+        for b in data.get("benchmarks", [])
+    }
+
+def is_regression(base: dict[str, float], cur: dict[str, float], tolerance: float) -> bool:
+    """
+    Slower by more than `tolerance` on the median AND outside the baseline's
+    noise: the current lower quartile is above the baseline's upper one.
+    """
+    return cur["median"] > base["median"] * (1 + tolerance) and cur["q1"] > base["q3"]
+
+def run_benchmarks(backend_root: Path, extra: list[str]) -> tuple[int, str, dict | None]:
+    """Run the benchmark suite under `backend_root` → (exit code, output, JSON report or None)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Path(tmp) / "bench.json"
+        code, out = sh(
+            ["pytest", "-q", str(BENCH_DIR), *BENCH_OPTIONS, f"--benchmark-json={report}", *extra],
+            cwd=backend_root,
+        )
+        data = json.loads(report.read_text(encoding="utf-8")) if code == 0 and report.exists() else None
+    return code, out, data
+
+def fastest_stats(runs: list[dict]) -> dict[str, dict[str, float]]:
+    """Per benchmark, the stats of the run with the lowest median (the least disturbed one)."""
+    best: dict[str, dict[str, float]] = {}
+    for data in runs:
+        for name, stats in benchmark_stats(data).items():
+            if name not in best or stats["median"] < best[name]["median"]:
+                best[name] = stats
+    return best
+
+@contextmanager
+def merge_base_tree(backend_root: Path, ref: str) -> Iterator[tuple[str, Path | None, str, bool]]:
+    """
+    Check out the merge-base of HEAD and `ref` in a temporary worktree and
+    yield (sha, its backend root or None, detail, absent); the worktree is
+    removed on exit.  The backend root is None when the checkout failed, or
+    when the merge-base has no benchmark suite yet (`absent`).
+    """
+    code, sha = sh(["git", "merge-base", "HEAD", ref])
+    if code != 0:
+        yield "", None, f"git merge-base HEAD {ref} failed:\n{sha}", False
+        return
+    code, top = sh(["git", "rev-parse", "--show-toplevel"])
+    if code != 0:
+        yield sha, None, top, False
+        return
+    relative = backend_root.resolve().relative_to(Path(top).resolve())
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = Path(tmp) / "base"
+        code, out = sh(["git", "worktree", "add", "--detach", str(tree), sha])
+        if code != 0:
+            yield sha, None, out, False
+            return
+        try:
+            base_root = tree / relative
+            if not (base_root / BENCH_DIR).exists():
+                yield sha, None, f"{sha[:12]} has no {BENCH_DIR}", True
+            else:
+                yield sha, base_root, "", False
+        finally:
+            sh(["git", "worktree", "remove", "--force", str(tree)])
+
+def performance_gates(
+    backend_root: Path, strict: bool, tolerance: float, baseline: Path | None,
+    enforce: bool = False, record: bool = False, base_ref: str | None = None,
+) -> tuple[bool, list[SubGate], str]:
+    """
+    Run the benchmark suite and compare each benchmark against a baseline from
+    this same machine (see is_regression): with `base_ref`, the merge-base
+    benchmarked in this job, which is enforced; otherwise the latest stored
+    baseline, whose regressions only fail the gate with `enforce` (a stable
+    reference runner).  Returns (ok, sub-gates, markdown table of deltas).
+    """
+    subs: list[SubGate] = []
+    ok_all = True
+
+    # 1) Benchmarks; with base_ref, interleaved with the merge-base on this
+    # runner so a slow patch of the machine hits both sides
+    compare = f"no benchmark regressed more than {tolerance:.0%}"
+    save = ["--benchmark-storage", str(BENCH_BASELINES), "--benchmark-save=baseline"] if record else []
+    base_runs: list[dict] = []
+    head_runs: list[dict] = []
+    base_label = ""
+    with ExitStack() as stack:
+        base_root: Path | None = None
+        if base_ref and not record:
+            sha, base_root, detail, absent = stack.enter_context(merge_base_tree(backend_root, base_ref))
+            if absent:
+                subs.append(SubGate(compare, True, detail, skipped=True))
+            elif base_root is None:
+                subs.append(SubGate(compare, not strict, f"could not check out {base_ref}: {detail}"))
+                return ok_all and not strict, subs, ""
+            else:
+                base_label, enforce = f"merge-base {sha[:12]} (this run, best of {BASE_REF_PAIRS})", True
+        for _ in range(BASE_REF_PAIRS if base_root else 1):
+            if base_root:
+                _, out, data = run_benchmarks(base_root, [])
+                if data is None:
+                    subs.append(SubGate(compare, not strict, f"could not benchmark {base_ref}:\n{out[-1200:]}"))
+                    return ok_all and not strict, subs, ""
+                base_runs.append(data)
+            code, out, data = run_benchmarks(backend_root, save)
+            if data is None:
+                missing_plugin = "unrecognized arguments: --benchmark" in out
+                g_ok = not strict and missing_plugin
+                subs.append(SubGate("benchmark suite (pytest-benchmark)", g_ok, out[-1200:]))
+                return ok_all and g_ok, subs, ""
+            head_runs.append(data)
+
+    current_data = head_runs[-1]
+    current = fastest_stats(head_runs)
+    subs.append(SubGate("benchmark suite (pytest-benchmark)", True, f"{len(current)} benchmarks"))
+    if record:
+        subs.append(SubGate("baseline recorded", True, f"{BENCH_BASELINES / machine_id()}"))
+        return ok_all, subs, ""
+
+    # 2) Comparison, only against the same machine
+    if base_ref and not base_label:
+        return ok_all, subs, ""
+    if base_runs:
+        base = fastest_stats(base_runs)
+    else:
+        base_path = latest_baseline(backend_root, baseline)
+        if base_path is None:
+            subs.append(SubGate(compare, True, f"no baseline for {machine_id()} under {BENCH_BASELINES}", skipped=True))
+            return ok_all, subs, ""
+        base_data = json.loads(base_path.read_text(encoding="utf-8"))
+        base_label = str(base_path)
+        if machine_key(base_data) != machine_key(current_data):
+            detail = f"baseline={base_path} was recorded on another machine:\n{machine_key(base_data)}\nvs {machine_key(current_data)}"
+            subs.append(SubGate(compare, True, detail, skipped=True))
+            return ok_all, subs, ""
+        base = benchmark_stats(base_data)
+
+    rows = ["| Benchmark | Baseline median (ms) | Current median (ms) | Δ | Status |", "|---|---|---|---|---|"]
+    regressions: list[str] = []
+    for name in sorted(current):
+        cur = current[name]
+        if name not in base:
+            rows.append(f"| {name} | — | {cur['median'] * 1000:.3f} | new | ➖ |")
+            continue
+        b = base[name]
+        delta = (cur["median"] - b["median"]) / b["median"] if b["median"] else 0.0
+        regressed = is_regression(b, cur, tolerance)
+        if regressed:
+            regressions.append(f"{name} {delta:+.1%}")
+        icon = "❌" if regressed else ("✅" if delta <= 0 else "➖")
+        rows.append(f"| {name} | {b['median'] * 1000:.3f} | {cur['median'] * 1000:.3f} | {delta:+.1%} | {icon} |")
+
+    g_ok = not regressions
+    detail = f"baseline={base_label}"
+    if regressions:
+        detail += "\nregressions over " + f"{tolerance:.0%}: " + ", ".join(regressions)
+    subs.append(SubGate(compare, g_ok, detail, advisory=not enforce))
+    if enforce:
+        ok_all &= g_ok
+    return ok_all, subs, "\n".join(rows) + "\n"
+
+# ── Gate runners (each returns ok + its report section body) ──
+def output_block(out: str) -> str:
+    return "\n**Output:**\n```text\n" + out[:8000] + "\n```\n"
+
+def run_ruff(ctx: "Ctx") -> tuple[bool, list[str]]:
+    code, out = sh(["ruff", "check", "."], cwd=ctx.backend_root)
+    ok = (code == 0)
+    return ok, [gate_line("ruff check .", ok)] + ([] if ok else [output_block(out)])
+
+def run_pyright(ctx: "Ctx") -> tuple[bool, list[str]]:
+    code, out = sh(["npx", "--yes", "pyright@1.1.386"], cwd=ctx.backend_root)
+    ok = (code == 0)
+    return ok, [gate_line("npx pyright@1.1.386", ok)] + ([] if ok else [output_block(out)])
+
+def run_pytest(ctx: "Ctx") -> tuple[bool, list[str]]:
+    # Includes the route-level SQL query budgets (tests/api/test_route_query_budgets.py)
+    code, out = sh(["pytest", "-q"], cwd=ctx.backend_root)
+    ok = (code == 0)
+    return ok, [gate_line("pytest -q", ok)] + ([] if ok else [output_block(out)])
+
+def run_http(ctx: "Ctx") -> tuple[bool, list[str]]:
+    http_ok, subs = http_contract_security_gates(ctx.backend_root, strict=ctx.strict)
+    lines = [gate_line("HTTP contract/security probes (wired)", http_ok)]
+    for sg in subs:
+        lines.append(gate_line(f"{sg.name}", sg.ok))
+        if sg.detail and not sg.ok:
+            lines.append("\n```text\n" + sg.detail[:1200] + "\n```\n")
+        elif sg.detail and sg.ok:
+            lines.append(f"\n```text\n{sg.detail[:400]}\n```\n")
+    return http_ok, lines
+
+def run_performance(ctx: "Ctx") -> tuple[bool, list[str]]:
+    args = ctx.args
+    perf_ok, subs, table = performance_gates(
+        ctx.backend_root, ctx.strict, args.perf_tolerance, args.perf_baseline,
+        enforce=args.perf_enforce, record=args.perf_record, base_ref=args.perf_base_ref,
+    )
+    lines = [gate_line(f"performance within {args.perf_tolerance:.0%} of baseline", perf_ok)]
+    for sg in subs:
+        if sg.skipped:
+            lines.append(f"- ➖ **{sg.name}** skipped\n")
+        elif sg.advisory and not sg.ok:
+            lines.append(f"- ⚠️ **{sg.name}** (advisory)\n")
+        else:
+            lines.append(gate_line(sg.name, sg.ok))
+        if sg.detail and (not sg.ok or sg.skipped):
+            lines.append("\n```text\n" + sg.detail[:1200] + "\n```\n")
+    if table:
+        lines.append("\n" + table)
+    return perf_ok, lines
+
+def importtime_profile(backend_root: Path) -> tuple[int, float, list[tuple[int, int, int, str]]]:
+    """python -X importtime -c 'import app.main' → (exit code, total seconds, [(depth, self_us, cum_us, module)])."""
+    code, out = sh([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=backend_root)
+    rows: list[tuple[int, int, int, str]] = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((depth, int(self_us), int(cum_us), name.strip()))
+    total = next((cum for depth, _, cum, name in rows if depth == 0 and name == "app.main"), 0) / 1e6
+    return code, total, rows
+
+def run_startup(ctx: "Ctx") -> tuple[bool, list[str]]:
+    budget = ctx.args.startup_budget
+    code, total, rows = importtime_profile(ctx.backend_root)
+    ok = code == 0 and total <= budget
+
+    direct = sorted((r for r in rows if r[0] == 1), key=lambda r: -r[2])[:15]   # imported by app.main
+    heaviest = sorted(rows, key=lambda r: -r[1])[:20]
+    report = [
+        "# Import-time profile — `import app.main`\n",
+        f"**Total:** {total * 1000:.0f} ms (budget {budget * 1000:.0f} ms)\n",
+        "## Imported by app.main (cumulative)\n",
+        "| Module | Cumulative ms |", "|---|---|",
+        *[f"| {name} | {cum / 1000:.1f} |" for _, _, cum, name in direct],
+        "\n## Heaviest modules (self time)\n",
+        "| Module | Self ms | Cumulative ms |", "|---|---|---|",
+        *[f"| {name} | {own / 1000:.1f} | {cum / 1000:.1f} |" for _, own, cum, name in heaviest],
+    ]
+    IMPORTTIME_REPORT.parent.mkdir(parents=True, exist_ok=True)
+    IMPORTTIME_REPORT.write_text("\n".join(report) + "\n", encoding="utf-8")
+
+    lines = [gate_line(f"import app.main within {budget:.1f}s ({total:.2f}s)", ok)]
+    lines.append(f"\nProfile: `{IMPORTTIME_REPORT}`\n")
+    return ok, lines
+
+def run_frontend(ctx: "Ctx") -> tuple[bool, list[str]]:
+    ok_front = True
+    msg = "No frontend detected."
+    for root in (Path("."), Path("frontend")):
+        if (root / "package-lock.json").exists():
+            code, out = sh(["npm", "ci"], cwd=root)
+            ok_front &= (code == 0)
+            if ok_front:
+                code2, out2 = sh(["npm", "run", "build"], cwd=root)
+                ok_front &= (code2 == 0)
+                msg = (out + "\n" + out2).strip()
+            else:
+                msg = out
+            break
+    return ok_front, [gate_line("frontend build (best-effort local)", ok_front)] + ([] if ok_front else [output_block(msg)])
+
+
+# ── Scheduling + cache ────────────────────────────────────────
+@dataclass
+class Ctx:
+    backend_root: Path
+    strict: bool
+    args: argparse.Namespace
+
+@dataclass
+class Gate:
+    key: str
+    title: str
+    run: Callable[[Ctx], tuple[bool, list[str]]]
+    inputs: list[str]                         # globs (repo-relative) whose content keys the cache
+    deps: list[str] = field(default_factory=list)
+    exclusive: bool = False                   # run alone (timing-sensitive)
+    cacheable: bool = True
+
+def gates(backend: str) -> list[Gate]:
+    py = [f"{backend}/**/*.py", f"{backend}/requirements.txt"]
+    return [
+        Gate("ruff", "Gate: ruff", run_ruff, py + [f"{backend}/ruff.toml", f"{backend}/pyproject.toml"]),
+        Gate("pyright", "Gate: pyright", run_pyright, py + ["pyrightconfig.json", f"{backend}/pyrightconfig.json"]),
+        Gate("pytest", "Gate: pytest", run_pytest, py),
+        Gate(
+            "http", "Gate: contract + security (HTTP)", run_http,
+            [f"{backend}/app/**/*.py", f"{backend}/tests/api/**/*.py"],
+            deps=["pytest"],   # both write to the same database
+        ),
+        Gate("startup", "Gate: startup (import time)", run_startup, py, exclusive=True, cacheable=False),
+        Gate(
+            "performance", "Gate: performance", run_performance,
+            py + [f"{backend}/tests/benchmarks/baselines/**/*.json"],
+            deps=["pytest"], exclusive=True,
+        ),
+        Gate(
+            "frontend", "Gate: frontend build", run_frontend,
+            ["package.json", "package-lock.json", "frontend/package*.json", "frontend/*.ts",
+             "frontend/*.mjs", "frontend/src/**/*", "frontend/public/**/*"],
+        ),
+    ]
+
+def input_hash(gate: Gate, ctx: Ctx) -> str:
+    """sha256 over the gate's input files (path + content) and its settings."""
+    h = hashlib.sha256()
+    h.update(f"{gate.key}|{ctx.args.mode}|{sys.version_info[:2]}".encode())
+    if gate.key == "performance":
+        h.update(f"{ctx.args.perf_tolerance}|{ctx.args.perf_baseline}|{ctx.args.perf_enforce}|{ctx.args.perf_record}".encode())
+        h.update(os.environ.get("BENCH_SCALES", "").encode())
+        if ctx.args.perf_base_ref:
+            h.update(sh(["git", "merge-base", "HEAD", ctx.args.perf_base_ref])[1].encode())
+    files = sorted({p for pattern in gate.inputs for p in Path(".").glob(pattern) if p.is_file()})
+    for p in files:
+        if "__pycache__" in p.parts or "node_modules" in p.parts:
+            continue
+        h.update(str(p).encode())
+        h.update(hashlib.sha256(p.read_bytes()).digest())
+    return h.hexdigest()
+
+def cache_load(key: str, digest: str) -> list[str] | None:
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data["lines"] if data.get("hash") == digest else None
+
+def cache_store(key: str, digest: str, lines: list[str]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    (CACHE_DIR / f"{key}.json").write_text(json.dumps({"hash": digest, "lines": lines}), encoding="utf-8")
+
+def run_gate(gate: Gate, ctx: Ctx, use_cache: bool) -> tuple[bool, list[str], bool]:
+    """Returns (ok, lines, from_cache).  Only passing results are cached."""
+    digest = input_hash(gate, ctx) if gate.cacheable else ""
+    if use_cache and gate.cacheable:
+        cached = cache_load(gate.key, digest)
+        if cached is not None:
+            return True, cached, True
+    try:
+        ok, lines = gate.run(ctx)
+    except Exception as e:  # a crashing gate is a failing gate, not a crashed run
+        ok, lines = False, [gate_line(gate.key, False), output_block(f"{type(e).__name__}: {e}")]
+    if ok and gate.cacheable:
+        cache_store(gate.key, digest, lines)
+    return ok, lines, False
+
+def run_all(selected: list[Gate], ctx: Ctx, workers: int, use_cache: bool) -> dict[str, tuple[bool, list[str], bool]]:
+    """
+    Run gates on a thread pool (the gates mostly wait on subprocesses).
+    A gate starts once all its deps have finished; if a dep failed it is
+    reported as failed without running.  Exclusive gates run alone.
+    """
+    results: dict[str, tuple[bool, list[str], bool]] = {}
+    pending = {g.key: g for g in selected}
+    running: dict[Future, Gate] = {}
+    known = set(pending)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            for key, gate in list(pending.items()):
+                deps = [d for d in gate.deps if d in known]
+                if any(d not in results for d in deps):
+                    continue
+                if gate.exclusive and running:
+                    continue
+                if any(g.exclusive for g in running.values()):
+                    break
+                del pending[key]
+                failed = [d for d in deps if not results[d][0]]
+                if failed:
+                    results[key] = (False, [gate_line(f"skipped: depends on failing {', '.join(failed)}", False)], False)
+                    continue
+                running[pool.submit(run_gate, gate, ctx, use_cache)] = gate
+                if gate.exclusive:
+                    break
+            if not running:
+                if pending and not any(k in results for k in pending):
+                    raise RuntimeError(f"Unschedulable gates: {', '.join(pending)}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                gate = running.pop(fut)
+                results[gate.key] = fut.result()
+                ok, _, cached = results[gate.key]
+                print(f"[{'cached' if cached else ('ok' if ok else 'FAIL')}] {gate.key}")
+    return results
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--mode", choices=["local", "ci"], default="local")
+    ap.add_argument("--perf-tolerance", type=float, default=0.25, help="allowed median slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--perf-baseline", type=Path, default=None, help="pytest-benchmark JSON to compare against")
+    ap.add_argument("--perf-enforce", action="store_true",
+                    help="fail on benchmark regressions (only on a reference runner); advisory otherwise")
+    ap.add_argument("--perf-record", action="store_true",
+                    help="save this run as the machine's baseline instead of comparing")
+    ap.add_argument("--perf-record-missing", action="store_true",
+                    help="record a baseline when this machine has none yet, compare otherwise (nightly)")
+    ap.add_argument("--perf-base-ref", default=None,
+                    help="benchmark the merge-base with this ref in the same run and enforce against it")
+    ap.add_argument("--skip-perf", action="store_true")
+    ap.add_argument("--only", action="append", default=None, metavar="GATE",
+                    help="run just this gate (repeatable), e.g. --only performance for the nightly benchmarks")
+    ap.add_argument("--startup-budget", type=float, default=2.0, help="max seconds for `import app.main`")
+    ap.add_argument("--workers", type=int, default=4, help="gates run concurrently")
+    ap.add_argument("--no-cache", action="store_true", help="re-run gates even if their inputs are unchanged")
     args = ap.parse_args()
 
     strict = (args.mode == "ci")
@@ -198,74 +643,29 @@ def main() -> int:
     Path("reports").mkdir(parents=True, exist_ok=True)
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
     backend_root = detect_backend_root()
+    if args.perf_record_missing and latest_baseline(backend_root, args.perf_baseline) is None:
+        args.perf_record = True
+    ctx = Ctx(backend_root=backend_root, strict=strict, args=args)
+
+    all_gates = gates(backend_root.as_posix())
+    selected = [
+        g for g in all_gates
+        if not (args.skip_perf and g.key == "performance") and (not args.only or g.key in args.only)
+    ]
+    results = run_all(selected, ctx, args.workers, use_cache=not args.no_cache)
 
     content: list[str] = [f"# QA Gates Report — Tribultz (Sprint 4)\n\n**Generated:** {ts}\n\n"]
     overall_ok = True
-
-    # Gate: ruff
-    content.append(section("Gate: ruff"))
-    code, out = sh(["ruff", "check", "."], cwd=backend_root)
-    ok = (code == 0)
-    overall_ok &= ok
-    content.append(gate_line("ruff check .", ok))
-    if not ok:
-        content.append("\n**Output:**\n```text\n" + out[:8000] + "\n```\n")
-
-    # Gate: pyright
-    content.append(section("Gate: pyright"))
-    code, out = sh(["npx", "--yes", "pyright@1.1.386"], cwd=backend_root)
-    ok = (code == 0)
-    overall_ok &= ok
-    content.append(gate_line("npx pyright@1.1.386", ok))
-    if not ok:
-        content.append("\n**Output:**\n```text\n" + out[:8000] + "\n```\n")
-
-    # Gate: pytest
-    content.append(section("Gate: pytest"))
-    code, out = sh(["pytest", "-q"], cwd=backend_root)
-    ok = (code == 0)
-    overall_ok &= ok
-    content.append(gate_line("pytest -q", ok))
-    if not ok:
-        content.append("\n**Output:**\n```text\n" + out[:8000] + "\n```\n")
-
-    # Gate: contract + security (HTTP) — now wired (no PENDING)
-    content.append(section("Gate: contract + security (HTTP)"))
-    http_ok, subs = http_contract_security_gates(backend_root, strict=strict)
-    overall_ok &= http_ok
-    content.append(gate_line("HTTP contract/security probes (wired)", http_ok))
-    for sg in subs:
-        content.append(gate_line(f"{sg.name}", sg.ok))
-        if sg.detail and not sg.ok:
-            content.append("\n```text\n" + sg.detail[:1200] + "\n```\n")
-        elif sg.detail and sg.ok:
-            content.append(f"\n```text\n{sg.detail[:400]}\n```\n")
-
-    # Gate: frontend build (best-effort local)
-    content.append(section("Gate: frontend build"))
-    ok_front = True
-    msg = "No frontend detected."
-    if Path("package-lock.json").exists():
-        code, out = sh(["npm", "ci"])
-        ok_front &= (code == 0)
-        if ok_front:
-            code2, out2 = sh(["npm", "run", "build"])
-            ok_front &= (code2 == 0)
-            msg = (out + "\n" + out2).strip()
-        else:
-            msg = out
-    elif Path("frontend/package-lock.json").exists():
-        code, out = sh(["npm", "ci"], cwd=Path("frontend"))
-        ok_front &= (code == 0)
-        if ok_front:
-            code2, out2 = sh(["npm", "run", "build"], cwd=Path("frontend"))
-            ok_front &= (code2 == 0)
-            msg = (out + "\n" + out2).strip()
-        else:
-            msg = out
-    content.append(gate_line("frontend build (best-effort local)", ok_front))
-    if not ok_front:
-        content.append("\n**Output:**\n```text\n" + msg[:8000] + "\n```\n")
+    for gate in all_gates:
+        content.append(section(gate.title))
+        if gate.key not in results:
+            content.append(f"- ➖ **{gate.key}** skipped ({'--only' if args.only else '--skip-perf'})\n")
+            continue
+        ok, lines, cached = results[gate.key]
+        overall_ok &= ok
+        if cached:
+            content.append("_Cached: inputs unchanged since the last passing run._\n")
+        content.extend(lines)
 
     # Verdict
     content.append(section("Verdict"))